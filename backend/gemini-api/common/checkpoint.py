@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from redis.asyncio import Redis
+except Exception:
+    Redis = None  # type: ignore
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def input_hash(*parts: Any) -> str:
+    """단계 입력(템플릿 + 실행 파라미터 + 앞 단계 출력)의 해시. 입력이 바뀌면 체크포인트 무효"""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ──────────────────────────────────────────────────────────────
+# 파이프라인 단계 체크포인트: (run_id, step, input_hash) → outputs
+#   - 저장: 단계 성공 시 outputs(JSON) 를 ckpt:{run_id}:{step} 에 TTL 로 기록
+#   - 복원: 같은 run_id 로 resume 하면 input_hash 가 같은 단계는 호출 없이 outputs 를 되살림
+#     → 첫 미완료 단계부터 다시 실행 (앞 단계 출력이 바뀌면 해시가 달라져 뒤 단계도 재실행)
+#   - Redis 가 없거나 실패하면 프로세스 내 dict (같은 프로세스에서의 재시도만 복구)
+# ──────────────────────────────────────────────────────────────
+class CheckpointStore:
+    def __init__(self, redis_url: Optional[str] = None, *, ttl_sec: int = 7 * 86400, prefix: str = "ckpt"):
+        self.ttl_sec = ttl_sec
+        self.prefix = prefix
+        self._redis_url = redis_url if (redis_url and Redis) else None
+        self._redis = None
+        self._mem: Dict[str, Tuple[float, str]] = {}
+        self.saves = 0
+        self.restores = 0
+        self.misses = 0
+
+    def _client(self):
+        if self._redis is None and self._redis_url:
+            self._redis = Redis.from_url(self._redis_url)
+        return self._redis
+
+    def _key(self, run_id: str, step: str) -> str:
+        return f"{self.prefix}:{run_id}:{step}"
+
+    def _prune(self, now: float) -> None:
+        for k in [k for k, (exp, _) in self._mem.items() if exp < now]:
+            self._mem.pop(k, None)
+
+    async def _get_raw(self, key: str) -> Optional[str]:
+        r = self._client()
+        if r is not None:
+            try:
+                raw = await r.get(key)
+                return raw.decode("utf-8") if isinstance(raw, bytes) else raw
+            except Exception as e:
+                logger.warning(f"[checkpoint] redis get failed: {e}")
+        hit = self._mem.get(key)
+        if hit is None or hit[0] < time.time():
+            return None
+        return hit[1]
+
+    async def _set_raw(self, key: str, raw: str) -> None:
+        r = self._client()
+        if r is not None:
+            try:
+                await r.setex(key, self.ttl_sec, raw)
+                return
+            except Exception as e:
+                logger.warning(f"[checkpoint] redis set failed, keeping in memory: {e}")
+        now = time.time()
+        self._prune(now)
+        self._mem[key] = (now + self.ttl_sec, raw)
+
+    async def load(self, run_id: str, step: str, ihash: str) -> Optional[Dict[str, Any]]:
+        """→ {"outputs", "note"} (해시가 다르거나 없으면 None)"""
+        raw = await self._get_raw(self._key(run_id, step))
+        if raw is None:
+            self.misses += 1
+            return None
+        try:
+            d = json.loads(raw)
+        except Exception:
+            self.misses += 1
+            return None
+        if d.get("input_hash") != ihash:
+            self.misses += 1
+            return None
+        self.restores += 1
+        return d
+
+    async def save(self, run_id: str, step: str, ihash: str, outputs: Dict[str, Any], note: Optional[str]) -> None:
+        try:
+            raw = json.dumps(
+                {"input_hash": ihash, "outputs": outputs, "note": note, "saved_at": time.time()},
+                ensure_ascii=False,
+            )
+        except (TypeError, ValueError) as e:
+            logger.warning(f"[checkpoint] step {step} outputs not serializable, skipped: {e}")
+            return
+        await self._set_raw(self._key(run_id, step), raw)
+        self.saves += 1
+
+    async def aclose(self) -> None:
+        if self._redis is not None:
+            try:
+                await self._redis.aclose()
+            except Exception:
+                pass
+            self._redis = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "saves": self.saves,
+            "restores": self.restores,
+            "misses": self.misses,
+            "redis": bool(self._redis_url),
+            "mem_entries": len(self._mem),
+        }
+
+
+checkpoint_store = CheckpointStore(settings.redis_url, ttl_sec=settings.CHECKPOINT_TTL_SEC)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+class CircuitOpenError(RuntimeError):
+    """모델 회로가 열려 있어(장애 판단) 호출하지 않고 즉시 실패"""
+
+
+# ──────────────────────────────────────────────────────────────
+# 모델별 서킷 브레이커
+#   closed    : 정상. 연속 실패 N회 또는 최근 window 의 에러율이 임계 이상이면 open
+#   open      : 호출 차단. open_sec 가 지나면 half_open
+#   half_open : probe 요청만 통과. 성공하면 closed, 실패하면 다시 open
+# 재시도 가능한 장애(429/5xx/타임아웃)만 실패로 셉니다(400 등 요청 자체 문제는 중립).
+# ──────────────────────────────────────────────────────────────
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = 5,
+        error_rate_threshold: float = 0.5,
+        window_sec: float = 60.0,
+        min_calls: int = 10,
+        open_sec: float = 30.0,
+        half_open_probes: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.window_sec = window_sec
+        self.min_calls = min_calls
+        self.open_sec = open_sec
+        self.half_open_probes = half_open_probes
+
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._consecutive_failures = 0
+        self._probes_in_flight = 0
+        self._events: Deque[Tuple[float, bool]] = deque()  # (ts, ok)
+        self.opened_count = 0
+        self.rejected = 0
+
+    # --- 상태 ---
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_sec:
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+        return self._state
+
+    def available(self) -> bool:
+        """부작용 없이 지금 호출을 보낼 수 있는지(라우팅 판단용)"""
+        st = self.state
+        if st == self.CLOSED:
+            return True
+        if st == self.HALF_OPEN:
+            return self._probes_in_flight < self.half_open_probes
+        return False
+
+    def try_acquire(self) -> bool:
+        """실제 호출 직전 호출. half_open 이면 probe 슬롯을 점유"""
+        st = self.state
+        if st == self.CLOSED:
+            return True
+        if st == self.HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+            self._probes_in_flight += 1
+            return True
+        self.rejected += 1
+        return False
+
+    # --- 결과 기록 ---
+    def _prune(self, now: float) -> None:
+        while self._events and now - self._events[0][0] > self.window_sec:
+            self._events.popleft()
+
+    def record_success(self) -> None:
+        now = time.monotonic()
+        self._events.append((now, True))
+        self._prune(now)
+        self._consecutive_failures = 0
+        if self._state == self.HALF_OPEN:
+            self._state = self.CLOSED
+            self._events.clear()
+        self._probes_in_flight = 0
+
+    def record_failure(self) -> None:
+        now = time.monotonic()
+        self._events.append((now, False))
+        self._prune(now)
+        self._consecutive_failures += 1
+        if self._state == self.HALF_OPEN:
+            self._open(now)
+            return
+        if self._state == self.CLOSED and self._should_open():
+            self._open(now)
+
+    def record_neutral(self) -> None:
+        """장애와 무관한 실패: 상태는 그대로, probe 슬롯만 반납"""
+        if self._state == self.HALF_OPEN and self._probes_in_flight > 0:
+            self._probes_in_flight -= 1
+
+    def _should_open(self) -> bool:
+        if self._consecutive_failures >= self.failure_threshold:
+            return True
+        if len(self._events) >= self.min_calls:
+            failures = sum(1 for _, ok in self._events if not ok)
+            return failures / len(self._events) >= self.error_rate_threshold
+        return False
+
+    def _open(self, now: float) -> None:
+        self._state = self.OPEN
+        self._opened_at = now
+        self._probes_in_flight = 0
+        self.opened_count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        calls = len(self._events)
+        failures = sum(1 for _, ok in self._events if not ok)
+        return {
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "window_calls": calls,
+            "window_error_rate": round(failures / calls, 3) if calls else None,
+            "opened_count": self.opened_count,
+            "rejected": self.rejected,
+        }
+
+
+class BreakerRegistry:
+    """
+    모델명 → CircuitBreaker, 그리고 폴백 체인 라우팅.
+    fallbacks: {"gemini-2.5-flash": ["gemini-2.5-flash-lite"], ...}
+    """
+
+    def __init__(self, *, fallbacks: Optional[Dict[str, List[str]]] = None, **breaker_kwargs: Any):
+        self.fallbacks = fallbacks or {}
+        self._kwargs = breaker_kwargs
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, model: str) -> CircuitBreaker:
+        br = self._breakers.get(model)
+        if br is None:
+            br = CircuitBreaker(model, **self._kwargs)
+            self._breakers[model] = br
+        return br
+
+    def chain(self, model: str) -> List[str]:
+        out = [model]
+        for m in self.fallbacks.get(model, []):
+            if m not in out:
+                out.append(m)
+        return out
+
+    def route(self, model: str) -> str:
+        """체인에서 지금 호출 가능한 첫 모델. 전부 열려 있으면 CircuitOpenError"""
+        chain = self.chain(model)
+        for m in chain:
+            if self.get(m).available():
+                return m
+        raise CircuitOpenError(f"circuit open for {' → '.join(chain)}")
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {k: v.snapshot() for k, v in self._breakers.items()}
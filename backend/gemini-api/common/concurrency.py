@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Any
+
+
+# ──────────────────────────────────────────────────────────────
+# AIMD 동시성 제한기
+#   - 성공: window += increase / window  (window 만큼 성공하면 +increase, TCP 혼잡제어와 동일)
+#   - 과부하(429/RESOURCE_EXHAUSTED): window *= decrease_factor
+#   - 그 외 실패(5xx/타임아웃 등): window 유지
+# ──────────────────────────────────────────────────────────────
+class _Slot:
+    __slots__ = ("_limiter", "acquired_at", "_overloaded")
+
+    def __init__(self, limiter: "AdaptiveLimiter", acquired_at: float):
+        self._limiter = limiter
+        self.acquired_at = acquired_at
+        self._overloaded = False
+
+    def overloaded(self) -> None:
+        """이 호출이 쿼터 초과로 실패했음을 표시 → 반납 시 window 축소"""
+        self._overloaded = True
+
+    def _finish(self, exc_type) -> None:
+        if self._overloaded:
+            outcome = "overloaded"
+        elif exc_type is None:
+            outcome = "success"
+        elif issubclass(exc_type, (asyncio.CancelledError, GeneratorExit)):
+            outcome = "cancelled"  # 헤지 패자/소비자 중단: window 에 영향 없음
+        else:
+            outcome = "failed"
+        self._limiter._release(self, outcome)
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        name: str,
+        *,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+    ):
+        self.name = name
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.increase = float(increase)
+        self.decrease_factor = float(decrease_factor)
+        self._window = float(min(max(initial, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # 같은 버스트에서 동시에 실패한 호출들이 window 를 연달아 반감시키지 않도록
+        # 마지막 축소 이후에 획득된 슬롯만 다시 축소할 수 있습니다.
+        self._last_decrease_at = 0.0
+        self.successes = 0
+        self.overloads = 0
+        self.failures = 0
+
+    # --- 상태 ---
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._window))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for w in self._waiters if not w.done())
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "window": round(self._window, 2),
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "queued": self.queued,
+            "successes": self.successes,
+            "overloads": self.overloads,
+            "failures": self.failures,
+        }
+
+    # --- 획득/반납 ---
+    async def acquire(self) -> _Slot:
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return _Slot(self, time.monotonic())
+
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # 슬롯을 넘겨받은 직후 취소됨 → 다음 대기자에게 양보
+                self._in_flight -= 1
+                self._wake()
+            else:
+                try:
+                    self._waiters.remove(fut)
+                except ValueError:
+                    pass
+            raise
+        return _Slot(self, time.monotonic())
+
+    def slot(self) -> "_AcquireCtx":
+        """async with limiter.slot() as s: ...  (실패 원인이 429 면 s.overloaded())"""
+        return _AcquireCtx(self)
+
+    def _release(self, slot: _Slot, outcome: str) -> None:
+        self._in_flight -= 1
+        if outcome == "success":
+            self.successes += 1
+            self._window = min(float(self.max_limit), self._window + self.increase / max(self._window, 1.0))
+        elif outcome == "overloaded":
+            self.overloads += 1
+            if slot.acquired_at >= self._last_decrease_at:
+                self._window = max(float(self.min_limit), self._window * self.decrease_factor)
+                self._last_decrease_at = time.monotonic()
+        elif outcome == "failed":
+            self.failures += 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            fut = self._waiters.popleft()
+            if fut.done():
+                continue
+            self._in_flight += 1
+            fut.set_result(None)
+
+
+class _AcquireCtx:
+    __slots__ = ("_limiter", "_slot")
+
+    def __init__(self, limiter: AdaptiveLimiter):
+        self._limiter = limiter
+        self._slot: Optional[_Slot] = None
+
+    async def __aenter__(self) -> _Slot:
+        self._slot = await self._limiter.acquire()
+        return self._slot
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._slot is not None:
+            self._slot._finish(exc_type)
+
+
+class LimiterRegistry:
+    """모델명 → AdaptiveLimiter (최초 사용 시 생성)"""
+
+    def __init__(self, **limiter_kwargs: Any):
+        self._kwargs = limiter_kwargs
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+
+    def get(self, key: str) -> AdaptiveLimiter:
+        lim = self._limiters.get(key)
+        if lim is None:
+            lim = AdaptiveLimiter(key, **self._kwargs)
+            self._limiters[key] = lim
+        return lim
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {k: v.snapshot() for k, v in self._limiters.items()}
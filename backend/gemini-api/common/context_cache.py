@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from google.genai import types as gatypes
+
+from common.response_cache import make_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("name", "expires_at", "retry_at")
+
+    def __init__(self, name: Optional[str], expires_at: float = 0.0, retry_at: float = 0.0):
+        self.name = name              # None 이면 생성 실패/대상 아님(negative entry)
+        self.expires_at = expires_at
+        self.retry_at = retry_at
+
+
+# ──────────────────────────────────────────────────────────────
+# 프롬프트 접두부 컨텍스트 캐시 (Gemini cached_content)
+#   - 키: model + 접두부 contents 의 해시 → prompts 행이 수정되면 텍스트가 바뀌어 자동으로 새 캐시
+#     (이전 캐시는 TTL 만료로 정리)
+#   - 만료 refresh_margin_sec 전에 사용되면 TTL 연장
+#   - 최소 토큰 미만/생성 실패는 negative_ttl_sec 동안 기억해 매번 재시도하지 않음
+#   - 같은 키의 동시 생성은 키별 Lock 으로 한 번만
+# ──────────────────────────────────────────────────────────────
+class ContextCacheManager:
+    def __init__(
+        self,
+        client: Any,
+        *,
+        ttl_sec: int,
+        refresh_margin_sec: float,
+        min_tokens: int,
+        chars_per_token: float,
+        negative_ttl_sec: float = 600.0,
+    ):
+        self.client = client
+        self.ttl_sec = ttl_sec
+        self.refresh_margin_sec = refresh_margin_sec
+        self.min_tokens = min_tokens
+        self.chars_per_token = max(chars_per_token, 0.1)
+        self.negative_ttl_sec = negative_ttl_sec
+        self._entries: Dict[str, _Entry] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.creates = 0
+        self.reuses = 0
+        self.refreshes = 0
+        self.skipped_small = 0
+        self.failures = 0
+        self.invalidations = 0
+        self.cached_tokens = 0
+
+    @staticmethod
+    def _text_chars(contents: List[gatypes.Content]) -> int:
+        return sum(len(p.text or "") for c in contents for p in (c.parts or []))
+
+    def _prune(self, now: float, keep: str) -> None:
+        for k in [k for k, e in self._entries.items() if k != keep and max(e.expires_at, e.retry_at) < now]:
+            self._entries.pop(k, None)
+            self._locks.pop(k, None)
+
+    async def lookup(self, model: str, prefix: List[gatypes.Content]) -> Optional[str]:
+        """접두부에 해당하는 cached_content 이름(없으면 생성). 캐시를 쓸 수 없으면 None"""
+        if self._text_chars(prefix) / self.chars_per_token < self.min_tokens:
+            self.skipped_small += 1
+            return None
+
+        key = make_cache_key(model, prefix)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            if entry.name and entry.expires_at - now > self.refresh_margin_sec:
+                self.reuses += 1
+                return entry.name
+            if entry.name is None and entry.retry_at > now:
+                return None
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is not None and entry.name:
+                if entry.expires_at - now > self.refresh_margin_sec:
+                    self.reuses += 1
+                    return entry.name
+                if entry.expires_at > now:
+                    try:
+                        await self.client.aio.caches.update(
+                            name=entry.name,
+                            config=gatypes.UpdateCachedContentConfig(ttl=f"{self.ttl_sec}s"),
+                        )
+                        entry.expires_at = now + self.ttl_sec
+                        self.refreshes += 1
+                        return entry.name
+                    except Exception as e:
+                        logger.warning(f"[genai:ctx-cache] ttl refresh failed ({entry.name}): {e}")
+
+            self._prune(now, keep=key)
+            try:
+                cached = await self.client.aio.caches.create(
+                    model=model,
+                    config=gatypes.CreateCachedContentConfig(
+                        contents=prefix,
+                        ttl=f"{self.ttl_sec}s",
+                        display_name=f"prompt-prefix-{key[:16]}",
+                    ),
+                )
+            except Exception as e:
+                self.failures += 1
+                self._entries[key] = _Entry(None, retry_at=now + self.negative_ttl_sec)
+                logger.warning(f"[genai:ctx-cache] create failed ({model}, key={key[:12]}): {e}")
+                return None
+
+            self._entries[key] = _Entry(cached.name, expires_at=now + self.ttl_sec)
+            self.creates += 1
+            logger.info(f"[genai:ctx-cache] created {cached.name} ({model}, key={key[:12]})")
+            return cached.name
+
+    def invalidate(self, name: str) -> None:
+        """서버에서 사라진 캐시(만료/삭제)를 참조해 실패했을 때 호출 → 다음 조회에서 재생성"""
+        for k in [k for k, e in self._entries.items() if e.name == name]:
+            self._entries.pop(k, None)
+            self.invalidations += 1
+
+    def record_usage(self, response: Any) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        n = getattr(usage, "cached_content_token_count", None)
+        if isinstance(n, int):
+            self.cached_tokens += n
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "entries": sum(1 for e in self._entries.values() if e.name),
+            "creates": self.creates,
+            "reuses": self.reuses,
+            "refreshes": self.refreshes,
+            "skipped_small": self.skipped_small,
+            "failures": self.failures,
+            "invalidations": self.invalidations,
+            "cached_tokens": self.cached_tokens,
+        }
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Dict, Optional, Set
+
+try:
+    from redis.asyncio import Redis
+except Exception:
+    Redis = None  # type: ignore
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, bus: "EventBus", channel: str, queue: asyncio.Queue):
+        self.bus = bus
+        self.channel = channel
+        self._q = queue
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        return await self._q.get()
+
+    async def get(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """timeout 안에 이벤트가 없으면 asyncio.TimeoutError"""
+        return await asyncio.wait_for(self._q.get(), timeout)
+
+    def close(self) -> None:
+        self.bus._unsubscribe(self.channel, self._q)
+
+
+# ──────────────────────────────────────────────────────────────
+# 프로세스 내 이벤트 버스 (+ Redis pub/sub 중계)
+#   - subscribe(channel): 채널별 asyncio.Queue 로 이 프로세스에서 난 이벤트를 바로 받음 (Subscription)
+#   - 발행 측은 encode() 로 origin 을 붙여 Redis 에 PUBLISH (job_store 는 상태 갱신 파이프라인에 같이 실음)
+#   - listen(): 패턴 구독 연결 하나로 다른 프로세스(레플리카/워커)의 이벤트를 받아 로컬 구독자에게 전달
+#     (자기 origin 은 이미 로컬로 전달했으므로 무시) → SSE 클라이언트 수와 무관하게 Redis 연결 1개
+# ──────────────────────────────────────────────────────────────
+class EventBus:
+    def __init__(self, redis_url: Optional[str] = None, *, pattern: str = "job-events:*", max_queue: int = 1000):
+        self.pattern = pattern
+        self.max_queue = max_queue
+        self.origin = uuid.uuid4().hex
+        self._redis_url = redis_url if (redis_url and Redis) else None
+        self._pub = None
+        self._subs: Dict[str, Set[asyncio.Queue]] = {}
+        self.published = 0
+        self.relayed = 0
+        self.dropped = 0
+
+    @property
+    def distributed(self) -> bool:
+        return bool(self._redis_url)
+
+    def encode(self, event: Dict[str, Any]) -> str:
+        return json.dumps({**event, "_origin": self.origin}, ensure_ascii=False, default=str)
+
+    def emit_local(self, channel: str, event: Dict[str, Any]) -> None:
+        for q in self._subs.get(channel, ()):
+            try:
+                q.put_nowait(event)
+            except asyncio.QueueFull:
+                self.dropped += 1  # 느린 구독자: 최신 상태는 스냅샷으로 다시 받음
+
+    async def publish(self, channel: str, event: Dict[str, Any]) -> None:
+        self.emit_local(channel, event)
+        self.published += 1
+        if not self._redis_url:
+            return
+        try:
+            if self._pub is None:
+                self._pub = Redis.from_url(self._redis_url)
+            await self._pub.publish(channel, self.encode(event))
+        except Exception as e:
+            logger.warning(f"[event-bus] publish failed: {e}")
+
+    def subscribe(self, channel: str) -> "Subscription":
+        """채널 구독 (호출 즉시 등록 → 이후 이벤트는 유실 없음). 다 쓰면 close()"""
+        q: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+        self._subs.setdefault(channel, set()).add(q)
+        return Subscription(self, channel, q)
+
+    def _unsubscribe(self, channel: str, q: asyncio.Queue) -> None:
+        subs = self._subs.get(channel)
+        if subs is not None:
+            subs.discard(q)
+            if not subs:
+                self._subs.pop(channel, None)
+
+    async def listen(self) -> None:
+        """다른 프로세스 이벤트 중계 (앱 시작 시 태스크로 실행, redis_url 이 없으면 바로 종료)"""
+        if not self._redis_url:
+            return
+        while True:
+            client = Redis.from_url(self._redis_url)
+            try:
+                pubsub = client.pubsub()
+                await pubsub.psubscribe(self.pattern)
+                async for msg in pubsub.listen():
+                    if msg.get("type") != "pmessage":
+                        continue
+                    channel = msg["channel"].decode("utf-8") if isinstance(msg["channel"], bytes) else msg["channel"]
+                    if channel not in self._subs:
+                        continue
+                    try:
+                        ev = json.loads(msg["data"])
+                    except Exception:
+                        continue
+                    if ev.pop("_origin", None) == self.origin:
+                        continue
+                    self.relayed += 1
+                    self.emit_local(channel, ev)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[event-bus] listener error, reconnecting: {e}")
+                await asyncio.sleep(5.0)
+            finally:
+                try:
+                    await client.aclose()
+                except Exception:
+                    pass
+
+    async def aclose(self) -> None:
+        if self._pub is not None:
+            try:
+                await self._pub.aclose()
+            except Exception:
+                pass
+            self._pub = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "channels": len(self._subs),
+            "subscribers": sum(len(s) for s in self._subs.values()),
+            "published": self.published,
+            "relayed": self.relayed,
+            "dropped": self.dropped,
+            "redis": self.distributed,
+        }
+
+
+event_bus = EventBus(settings.redis_url)
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+# ──────────────────────────────────────────────────────────────
+# 키(모델:단계)별 최근 지연시간 분포
+# ──────────────────────────────────────────────────────────────
+class LatencyTracker:
+    def __init__(self, *, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, key: str, seconds: float) -> None:
+        dq = self._samples.get(key)
+        if dq is None:
+            dq = deque(maxlen=self.window)
+            self._samples[key] = dq
+        dq.append(seconds)
+
+    def percentile(self, key: str, p: float) -> Optional[float]:
+        """표본이 min_samples 미만이면 None(헤지 안 함)"""
+        dq = self._samples.get(key)
+        if not dq or len(dq) < self.min_samples:
+            return None
+        ordered = sorted(dq)
+        idx = min(len(ordered) - 1, max(0, int(round(p * (len(ordered) - 1)))))
+        return ordered[idx]
+
+    def count(self, key: str) -> int:
+        dq = self._samples.get(key)
+        return len(dq) if dq else 0
+
+
+class _HedgeCounters:
+    __slots__ = ("calls", "hedged", "hedge_wins")
+
+    def __init__(self):
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+
+# ──────────────────────────────────────────────────────────────
+# 헤지 요청: 최근 지연의 p 분위를 넘겨도 응답이 없으면 같은 요청을 하나 더 보내고
+# 먼저 성공한 쪽을 채택, 나머지는 취소 (한쪽이 실패해도 다른 쪽 결과를 기다림)
+# ──────────────────────────────────────────────────────────────
+class Hedger:
+    def __init__(self, *, percentile: float, min_delay_sec: float, window: int, min_samples: int):
+        self.percentile = percentile
+        self.min_delay_sec = min_delay_sec
+        self.tracker = LatencyTracker(window=window, min_samples=min_samples)
+        self._counters: Dict[str, _HedgeCounters] = {}
+
+    def _c(self, key: str) -> _HedgeCounters:
+        c = self._counters.get(key)
+        if c is None:
+            c = _HedgeCounters()
+            self._counters[key] = c
+        return c
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        d = self.tracker.percentile(key, self.percentile)
+        if d is None:
+            return None
+        return max(d, self.min_delay_sec)
+
+    async def run(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[T]],
+        *,
+        allow_hedge: Callable[[], bool] = lambda: True,
+    ) -> T:
+        """
+        factory: 매번 새 요청 코루틴을 만드는 함수
+        allow_hedge: 헤지를 쏘기 직전 호출(예: 동시성 제한기에 여유가 없으면 False)
+        """
+        counters = self._c(key)
+        counters.calls += 1
+        delay = self.hedge_delay(key)
+
+        async def _timed() -> tuple:
+            t0 = time.monotonic()
+            res = await factory()
+            return res, time.monotonic() - t0
+
+        primary = asyncio.ensure_future(_timed())
+        tasks = [primary]
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done and allow_hedge():
+                    counters.hedged += 1
+                    tasks.append(asyncio.ensure_future(_timed()))
+
+            pending = set(tasks)
+            first_exc: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    exc = t.exception()
+                    if exc is not None:
+                        if first_exc is None or t is primary:
+                            first_exc = exc
+                        continue
+                    res, elapsed = t.result()
+                    self.tracker.record(key, elapsed)
+                    if t is not primary:
+                        counters.hedge_wins += 1
+                    return res
+            raise first_exc  # 모두 실패
+        finally:
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        for key, c in self._counters.items():
+            delay = self.hedge_delay(key)
+            out[key] = {
+                "calls": c.calls,
+                "hedged": c.hedged,
+                "hedge_wins": c.hedge_wins,
+                "hedge_rate": round(c.hedged / c.calls, 3) if c.calls else None,
+                "win_rate": round(c.hedge_wins / c.hedged, 3) if c.hedged else None,
+                "hedge_after_sec": round(delay, 2) if delay is not None else None,
+                "samples": self.tracker.count(key),
+            }
+        return out
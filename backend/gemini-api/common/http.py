@@ -1,22 +1,25 @@
-import asyncio, os, mimetypes
+import os, mimetypes
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 import httpx
 from settings import settings                      # ← 여기만
-from common.retry import jittered_backoff
+from common.retry import jittered_backoff, RetryBudgetExceeded, spend_attempt, budget_timeout, budget_sleep
 
 async def robust_post_form(url: str, data: Dict[str, Any], *, max_retries: int | None = None) -> Dict[str, Any]:
     retries = max_retries if max_retries is not None else settings.STEP_MAX_RETRIES
     last_err: Optional[Exception] = None
     for attempt in range(retries):
         try:
-            async with httpx.AsyncClient(timeout=httpx.Timeout(settings.HTTP_TIMEOUT_SEC)) as client:
+            spend_attempt("http:post")
+            async with httpx.AsyncClient(timeout=httpx.Timeout(budget_timeout(settings.HTTP_TIMEOUT_SEC))) as client:
                 r = await client.post(url, data=data)
                 r.raise_for_status()
                 return r.json()
+        except RetryBudgetExceeded:
+            raise
         except Exception as e:
             last_err = e
-            await asyncio.sleep(jittered_backoff(attempt, max_backoff=settings.STEP_MAX_BACKOFF))
+            await budget_sleep(jittered_backoff(attempt, max_backoff=settings.STEP_MAX_BACKOFF))
     raise last_err or RuntimeError(f"POST failed: {url}")
 
 async def robust_upload_images(image_paths: List[str], url: str, *, max_retries: int | None = None) -> List[Dict[str, Any]]:
@@ -29,14 +32,21 @@ async def robust_upload_images(image_paths: List[str], url: str, *, max_retries:
             last_err: Optional[Exception] = None
             for attempt in range(retries):
                 try:
+                    spend_attempt("http:upload")
                     with open(fn, "rb") as f:
-                        r = await client.post(url, files={"image": (fn, f, mime)})
+                        r = await client.post(
+                            url,
+                            files={"image": (fn, f, mime)},
+                            timeout=budget_timeout(settings.HTTP_TIMEOUT_SEC),
+                        )
                         r.raise_for_status()
                         results.append(r.json())
                         break
+                except RetryBudgetExceeded:
+                    raise
                 except Exception as e:
                     last_err = e
-                    await asyncio.sleep(jittered_backoff(attempt, max_backoff=settings.STEP_MAX_BACKOFF))
+                    await budget_sleep(jittered_backoff(attempt, max_backoff=settings.STEP_MAX_BACKOFF))
             else:
                 raise last_err or RuntimeError(f"upload failed: {fn}")
     return results
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps, features
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+_FORMATS = {"webp": ("WEBP", "webp"), "avif": ("AVIF", "avif"), "jpeg": ("JPEG", "jpg")}
+
+_pool: Optional[ProcessPoolExecutor] = None
+_totals = {"images": 0, "optimized": 0, "kept_original": 0, "failed": 0, "bytes_before": 0, "bytes_after": 0}
+
+
+# ──────────────────────────────────────────────────────────────
+# 워커 프로세스에서 실행되는 함수 (pickle 가능하도록 모듈 최상위, 인자는 기본 타입만)
+# ──────────────────────────────────────────────────────────────
+def _optimize_file(path: str, max_dim: int, fmt: str, quality: int) -> Dict[str, Any]:
+    """
+    리사이즈(긴 변 max_dim) → fmt 로 재인코딩(EXIF/ICC 등 메타데이터는 넘기지 않아 제거).
+    결과가 원본보다 크면 원본 유지
+    """
+    src = Path(path)
+    before = src.stat().st_size
+    pil_format, ext = _FORMATS.get(fmt, _FORMATS["webp"])
+    if pil_format == "AVIF" and not features.check("avif"):
+        pil_format, ext = _FORMATS["webp"]
+
+    with Image.open(src) as im:
+        im = ImageOps.exif_transpose(im)  # 회전 정보는 픽셀에 반영한 뒤 EXIF 를 버림
+        if max(im.size) > max_dim:
+            im.thumbnail((max_dim, max_dim), Image.Resampling.LANCZOS)
+        if pil_format == "JPEG" and im.mode not in ("RGB", "L"):
+            im = im.convert("RGB")
+        elif im.mode not in ("RGB", "RGBA", "L", "LA"):
+            im = im.convert("RGBA" if "A" in im.getbands() or "transparency" in im.info else "RGB")
+        dst = src.with_suffix(f".{ext}") if src.suffix.lower() != f".{ext}" else src.with_name(f"{src.stem}.opt.{ext}")
+        save_kwargs: Dict[str, Any] = {"quality": quality}
+        if pil_format == "WEBP":
+            save_kwargs["method"] = 6
+        elif pil_format == "JPEG":
+            save_kwargs.update(optimize=True, progressive=True)
+        im.save(dst, pil_format, **save_kwargs)
+        width, height = im.size
+
+    after = dst.stat().st_size
+    if after >= before:
+        dst.unlink(missing_ok=True)
+        return {"path": str(src), "bytes_before": before, "bytes_after": before, "optimized": False}
+    return {
+        "path": str(dst), "bytes_before": before, "bytes_after": after, "optimized": True,
+        "width": width, "height": height, "format": ext,
+    }
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # 멀티스레드인 uvicorn 프로세스를 fork 하지 않도록 forkserver(없으면 spawn)로 워커 생성
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool = ProcessPoolExecutor(
+            max_workers=max(1, settings.IMG_OPTIMIZE_WORKERS),
+            mp_context=multiprocessing.get_context(method),
+        )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _reset_broken_pool(pool: ProcessPoolExecutor) -> None:
+    """워커 프로세스가 죽으면(OOM 등) 풀 전체가 깨짐 → 버리고 다음 호출에서 새로 만듦"""
+    if _pool is pool:
+        logger.warning("[image] optimize pool broken, recreating")
+        shutdown_pool()
+
+
+def image_optimize_stats() -> Dict[str, Any]:
+    before, after = _totals["bytes_before"], _totals["bytes_after"]
+    return {**_totals, "saved_ratio": round(1 - after / before, 3) if before else None}
+
+
+# ──────────────────────────────────────────────────────────────
+# 업로드 전 최적화: 프로세스 풀에서 병렬 처리, 실패한 파일은 원본 그대로 업로드
+# ──────────────────────────────────────────────────────────────
+async def optimize_images(paths: List[str]) -> Tuple[List[str], Dict[str, Any]]:
+    """→ (업로드할 경로 리스트(입력 순서 유지), {"bytes_before", "bytes_after", "optimized", ...})"""
+    summary = {"images": len(paths), "optimized": 0, "bytes_before": 0, "bytes_after": 0}
+    if not paths or not settings.IMG_OPTIMIZE_ENABLED:
+        return list(paths), summary
+
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    fmt = (settings.IMG_OUTPUT_FORMAT or "webp").strip().lower()
+    jobs: List[asyncio.Future] = []
+    try:
+        for p in paths:
+            jobs.append(loop.run_in_executor(pool, _optimize_file, p, settings.IMG_MAX_DIMENSION, fmt, settings.IMG_QUALITY))
+        results: List[Any] = await asyncio.gather(*jobs, return_exceptions=True)
+    except BrokenProcessPool as e:
+        # 깨진 풀이면 제출 단계에서 바로 실패 → 이번 이미지는 전부 원본 업로드
+        for job in jobs:
+            job.cancel()
+        results = [e] * len(paths)
+    if any(isinstance(r, BrokenProcessPool) for r in results):
+        _reset_broken_pool(pool)
+
+    out: List[str] = []
+    for p, res in zip(paths, results):
+        _totals["images"] += 1
+        if isinstance(res, BaseException):
+            logger.warning(f"[image] optimize failed ({p}): {res}")
+            _totals["failed"] += 1
+            out.append(p)
+            try:
+                size = os.path.getsize(p)
+            except OSError:
+                size = 0
+            summary["bytes_before"] += size
+            summary["bytes_after"] += size
+            continue
+        out.append(res["path"])
+        summary["bytes_before"] += res["bytes_before"]
+        summary["bytes_after"] += res["bytes_after"]
+        if res["optimized"]:
+            summary["optimized"] += 1
+            _totals["optimized"] += 1
+        else:
+            _totals["kept_original"] += 1
+
+    _totals["bytes_before"] += summary["bytes_before"]
+    _totals["bytes_after"] += summary["bytes_after"]
+    logger.info(
+        f"[image] optimized {summary['optimized']}/{len(paths)}: "
+        f"{summary['bytes_before']} → {summary['bytes_after']} bytes"
+    )
+    return out, summary
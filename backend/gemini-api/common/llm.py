@@ -1,11 +1,14 @@
 from __future__ import annotations
 
-import asyncio
+import inspect
 import random
 import logging
-from typing import Optional, Any
+from typing import Optional, Any, Callable
 
 from settings import settings  # STEP_MAX_RETRIES 등
+from common.retry import RetryBudgetExceeded, budget_sleep
+from common.circuit_breaker import CircuitOpenError
+from common.metering import meter_request
 logger = logging.getLogger(__name__)
 
 # 타입 힌트: 문자열/ContentRequest/메시지 리스트/SDK 유사 dict 등
@@ -70,14 +73,23 @@ async def generate_text_with_retry(
     prompt: PromptLike,     # 문자열/메시지 리스트/ContentRequest/SDK 유사 dict
     *,
     max_retries: int | None = None,
+    use_cache: bool = True,
+    hedge: Optional[bool] = None,
+    step: Optional[str] = None,
+    cache_prefix: int = 0,
 ) -> str:
     """
     서비스 계층(ContentGenerateService.generate_content)이
     내부에서 prompt를 Google GenAI SDK 타입으로 정규화합니다.
     여기서는 재시도/백오프만 담당합니다.
+    재시도 횟수/대기는 현재 실행의 RetryBudget(common.retry)에 함께 묶입니다.
+    use_cache=False 면 서비스의 응답 캐시를 건너뜁니다.
+    hedge/step 은 서비스의 헤지 요청 옵션(step 별로 지연 분포를 따로 추적)으로 전달됩니다.
+    cache_prefix 는 앞에서부터 몇 개의 메시지를 컨텍스트 캐시로 보낼지(고정 프롬프트 템플릿 턴)입니다.
     """
     retries = max_retries if max_retries is not None else settings.STEP_MAX_RETRIES
     last_err: Optional[Exception] = None
+    meter_request()
 
     for attempt in range(retries):
         try:
@@ -85,21 +97,146 @@ async def generate_text_with_retry(
             # - generate_content(model, contents="...")          (문자열)
             # - generate_content(model, contents=[...])          (메시지/SDK 유사 dict)
             # - generate_content(ContentRequest(...))            (요청 객체)
-            resp = await service.generate_content(model, prompt)
+            resp = await service.generate_content(
+                model, prompt, use_cache=use_cache, hedge=hedge, step=step, cache_prefix=cache_prefix
+            )
             text = to_text(resp)
             if not text:
                 raise RuntimeError("empty text")
             return text
 
+        except (RetryBudgetExceeded, CircuitOpenError):
+            raise
         except Exception as e:
             last_err = e
             sleep = jittered_backoff(attempt)
             logger.warning(f"[genai:text] attempt {attempt+1}/{retries} failed: {e} → sleep {sleep:.2f}s")
-            await asyncio.sleep(sleep)
+            await budget_sleep(sleep)
 
     raise last_err or RuntimeError("generate_text_with_retry failed")
 
 
+# ──────────────────────────────────────────────────────────────
+# 스트리밍 텍스트 생성 리트라이
+# ──────────────────────────────────────────────────────────────
+class StreamAbort(RuntimeError):
+    """스트리밍 도중 출력이 잘못됐음이 확실해져 조기 중단(→ 재시도)"""
+
+
+# (누적 텍스트, 최종 여부) → 문제가 있으면 StreamAbort
+StreamGuard = Callable[[str, bool], None]
+# 누적 텍스트 → None | awaitable
+ChunkCallback = Callable[[str], Any]
+
+HTML_GUARD_PROBE_CHARS = 1500
+
+
+def html_stream_guard(text: str, final: bool) -> None:
+    """
+    HTML 을 내야 하는 단계용 가드.
+    - 초반 HTML_GUARD_PROBE_CHARS 글자 안에 코드펜스도 태그도 없으면 중단
+    - 최종 출력의 코드펜스가 닫히지 않았거나 </html> 이 없으면 잘린 출력으로 간주
+    """
+    if not final:
+        if len(text) >= HTML_GUARD_PROBE_CHARS:
+            head = text[:HTML_GUARD_PROBE_CHARS]
+            if "```" not in head and "<" not in head:
+                raise StreamAbort(f"no code fence / HTML markup in first {HTML_GUARD_PROBE_CHARS} chars")
+        return
+
+    if "<" not in text:
+        raise StreamAbort("no HTML markup in output")
+    if text.count("```") % 2 == 1:
+        raise StreamAbort("unterminated code fence (truncated output)")
+    low = text.lower()
+    if "<html" in low and "</html>" not in low:
+        raise StreamAbort("missing </html> (truncated output)")
+
+
+def _chunk_text(chunk: Any) -> str:
+    try:
+        parts = chunk.candidates[0].content.parts or []
+    except Exception:
+        return ""
+    return "".join(t for t in (getattr(p, "text", None) for p in parts) if isinstance(t, str))
+
+
+def chunk_finish_reason(chunk: Any) -> Optional[str]:
+    """스트림 청크의 FinishReason enum/str → 'STOP' | 'MAX_TOKENS' | ... (없으면 None)"""
+    try:
+        reason = chunk.candidates[0].finish_reason
+    except Exception:
+        return None
+    if reason is None:
+        return None
+    return str(getattr(reason, "value", reason))
+
+
+async def generate_text_stream_with_retry(
+    service,
+    model: str | Any,
+    prompt: PromptLike,
+    *,
+    on_chunk: Optional[ChunkCallback] = None,
+    guard: Optional[StreamGuard] = None,
+    max_retries: int | None = None,
+    use_cache: bool = True,
+    cache_prefix: int = 0,
+) -> str:
+    """
+    ContentGenerateService.generate_content_stream 기반 텍스트 생성.
+    - 청크가 올 때마다 on_chunk(누적 텍스트) 호출 → 진행 상황(부분 출력) 전달
+    - guard(누적 텍스트, final) 가 StreamAbort 를 던지면 남은 토큰을 기다리지 않고 끊고 재시도
+    - finish_reason == MAX_TOKENS 면 잘린 출력으로 보고 재시도
+    재시도 시에는 같은 (잘못된) 응답을 다시 받지 않도록 캐시 조회를 건너뛰고 새 결과로 덮어씁니다.
+    cache_prefix: generate_text_with_retry 와 동일
+    """
+    retries = max_retries if max_retries is not None else settings.STEP_MAX_RETRIES
+    last_err: Optional[Exception] = None
+    meter_request()
+
+    for attempt in range(retries):
+        stream = service.generate_content_stream(
+            model, prompt, use_cache=use_cache, refresh_cache=attempt > 0, cache_prefix=cache_prefix
+        )
+        try:
+            text = ""
+            finish: Optional[str] = None
+            async for chunk in stream:
+                finish = chunk_finish_reason(chunk) or finish
+                delta = _chunk_text(chunk)
+                if not delta:
+                    continue
+                text += delta
+                if on_chunk is not None:
+                    res = on_chunk(text)
+                    if inspect.isawaitable(res):
+                        await res
+                if guard is not None:
+                    guard(text, False)
+
+            text = text.strip()
+            if not text:
+                raise RuntimeError("empty text")
+            if finish == "MAX_TOKENS":
+                raise StreamAbort("truncated output (MAX_TOKENS)")
+            if guard is not None:
+                guard(text, True)
+            return text
+
+        except (RetryBudgetExceeded, CircuitOpenError):
+            raise
+        except Exception as e:
+            last_err = e
+            sleep = jittered_backoff(attempt)
+            logger.warning(f"[genai:stream] attempt {attempt+1}/{retries} failed: {e} → sleep {sleep:.2f}s")
+            await budget_sleep(sleep)
+        finally:
+            await stream.aclose()
+
+    raise last_err or RuntimeError("generate_text_stream_with_retry failed")
+
+
 # ──────────────────────────────────────────────────────────────
 # 이미지 생성 리트라이
 # ──────────────────────────────────────────────────────────────
@@ -117,6 +254,7 @@ async def generate_images_with_retry(
     """
     retries = max_retries if max_retries is not None else settings.STEP_MAX_RETRIES
     last_err: Optional[Exception] = None
+    meter_request()
 
     for attempt in range(retries):
         try:
@@ -128,10 +266,12 @@ async def generate_images_with_retry(
                 raise RuntimeError("no images returned")
             return paths
 
+        except (RetryBudgetExceeded, CircuitOpenError):
+            raise
         except Exception as e:
             last_err = e
             sleep = jittered_backoff(attempt)
             logger.warning(f"[genai:image] attempt {attempt+1}/{retries} failed: {e} → sleep {sleep:.2f}s")
-            await asyncio.sleep(sleep)
+            await budget_sleep(sleep)
 
     raise last_err or RuntimeError("generate_images_with_retry failed")
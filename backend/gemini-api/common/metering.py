@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+
+# ──────────────────────────────────────────────────────────────
+# 실행 단위(파이프라인 1회) 계측: Gemini 호출마다 토큰/시간/대기/재시도를 단계별로 집계
+#   - RetryBudget 과 같은 방식으로 contextvar 로 전달 → 서비스 계층에서 바로 기록
+#   - 단계는 set_step(pid) 로 지정(태스크는 생성 시 컨텍스트를 복사하므로 병렬 단계도 각자 유지)
+# ──────────────────────────────────────────────────────────────
+_FIELDS = (
+    "requests",         # 논리 요청 수(재시도 루프 1회 = 1)
+    "calls",            # 실제 SDK 호출 수(재시도/헤지 포함)
+    "failed_calls",
+    "cache_hits",       # 응답 캐시로 호출 없이 끝난 요청
+    "prompt_tokens",
+    "output_tokens",
+    "thinking_tokens",
+    "cached_tokens",    # 컨텍스트 캐시에서 읽은 입력 토큰
+    "wall_sec",         # SDK 호출 시간 합
+    "queue_wait_sec",   # RPM/TPM 버킷 + 동시성 슬롯 대기 합
+)
+
+
+def _empty() -> Dict[str, float]:
+    return {k: 0 for k in _FIELDS}
+
+
+def _usage_int(usage: Any, name: str) -> int:
+    v = getattr(usage, name, None)
+    return v if isinstance(v, int) else 0
+
+
+class RunMeter:
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.steps: Dict[str, Dict[str, float]] = {}
+        self.models: Dict[str, int] = {}
+
+    def _bucket(self, step: Optional[str]) -> Dict[str, float]:
+        key = step or "-"
+        b = self.steps.get(key)
+        if b is None:
+            b = _empty()
+            self.steps[key] = b
+        return b
+
+    def record_request(self, step: Optional[str]) -> None:
+        self._bucket(step)["requests"] += 1
+
+    def record_cache_hit(self, step: Optional[str]) -> None:
+        self._bucket(step)["cache_hits"] += 1
+
+    def record_call(
+        self,
+        step: Optional[str],
+        model: str,
+        *,
+        response: Any = None,
+        wall_sec: float = 0.0,
+        queue_wait_sec: float = 0.0,
+        ok: bool = True,
+    ) -> None:
+        b = self._bucket(step)
+        b["calls"] += 1
+        if not ok:
+            b["failed_calls"] += 1
+        b["wall_sec"] += wall_sec
+        b["queue_wait_sec"] += queue_wait_sec
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            b["prompt_tokens"] += _usage_int(usage, "prompt_token_count")
+            b["output_tokens"] += _usage_int(usage, "candidates_token_count")
+            b["thinking_tokens"] += _usage_int(usage, "thoughts_token_count")
+            b["cached_tokens"] += _usage_int(usage, "cached_content_token_count")
+        self.models[model] = self.models.get(model, 0) + 1
+
+    @staticmethod
+    def _finish(b: Dict[str, float]) -> Dict[str, Any]:
+        out: Dict[str, Any] = {k: (round(v, 3) if isinstance(v, float) else v) for k, v in b.items()}
+        out["retries"] = max(0, b["calls"] - (b["requests"] - b["cache_hits"]))
+        return out
+
+    def snapshot(self) -> Dict[str, Any]:
+        total = _empty()
+        for b in self.steps.values():
+            for k in _FIELDS:
+                total[k] += b[k]
+        return {
+            "elapsed_sec": round(time.monotonic() - self.started_at, 2),
+            "total": self._finish(total),
+            "steps": {k: self._finish(v) for k, v in self.steps.items()},
+            "models": dict(self.models),
+        }
+
+
+_current_meter: ContextVar[Optional[RunMeter]] = ContextVar("run_meter", default=None)
+_current_step: ContextVar[Optional[str]] = ContextVar("run_step", default=None)
+
+
+def current_meter() -> Optional[RunMeter]:
+    return _current_meter.get()
+
+
+def current_step() -> Optional[str]:
+    return _current_step.get()
+
+
+@contextmanager
+def run_meter(meter: Optional[RunMeter] = None) -> Iterator[RunMeter]:
+    """with run_meter() as meter: ... → 블록 안의 모든 Gemini 호출이 meter 에 기록됨"""
+    m = meter or RunMeter()
+    token = _current_meter.set(m)
+    step_token = _current_step.set(None)
+    try:
+        yield m
+    finally:
+        _current_step.reset(step_token)
+        _current_meter.reset(token)
+
+
+def set_step(step: Optional[str]) -> None:
+    """이후 호출을 이 단계로 집계 (run_meter 블록이 끝나면 원복)"""
+    _current_step.set(step)
+
+
+def meter_request() -> None:
+    m = _current_meter.get()
+    if m is not None:
+        m.record_request(_current_step.get())
+
+
+def meter_cache_hit() -> None:
+    m = _current_meter.get()
+    if m is not None:
+        m.record_cache_hit(_current_step.get())
+
+
+def meter_call(model: str, **kwargs: Any) -> None:
+    m = _current_meter.get()
+    if m is not None:
+        m.record_call(_current_step.get(), model, **kwargs)
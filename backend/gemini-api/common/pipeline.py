@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from common.checkpoint import CheckpointStore, input_hash
+from common.metering import set_step
+
+logger = logging.getLogger(__name__)
+
+STEP_KINDS = ("text", "image", "upload", "publish")
+
+# 단계 함수: 컨텍스트를 받아 선언한 outputs 의 값을 dict 로 반환
+StepFn = Callable[["StepContext"], Awaitable[Optional[Dict[str, Any]]]]
+# 단계가 끝날 때마다(성공/실패 무관) 단계 id 로 호출
+StepDoneCallback = Callable[[str], Any]
+# 단계 진행 이벤트(dict): step_started / step_finished(outcome, note, elapsed_sec)
+StepEventCallback = Callable[[Dict[str, Any]], Any]
+
+
+@dataclass(frozen=True)
+class StepDef:
+    """
+    파이프라인 단계 선언.
+    pid: pipelines.prompt_array 에 들어가는 프롬프트 id (템플릿은 prompts 테이블에서 조회)
+    inputs/outputs: 실행 상태(state) 키. 같은 파이프라인에서 inputs 를 만드는 단계가 끝나야 실행됨
+    model: 단계 기본 모델(요청의 llm_model 이 있으면 그쪽이 우선)
+    """
+    pid: str
+    kind: str
+    run: StepFn
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    model: Optional[str] = None
+    description: str = ""
+
+    def __post_init__(self):
+        if self.kind not in STEP_KINDS:
+            raise ValueError(f"unknown step kind: {self.kind}")
+
+
+@dataclass
+class StepContext:
+    step: StepDef
+    tmpl: str
+    templates: Dict[str, str]   # 파이프라인 전체 pid → 템플릿 (이전 단계 템플릿을 히스토리로 쓰는 단계용)
+    state: Dict[str, Any]       # 실행 파라미터 + 앞 단계 outputs
+    note: Optional[str] = None  # step_log 에 남길 요약(없으면 "ok")
+
+    @property
+    def pid(self) -> str:
+        return self.step.pid
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.state.get(key, default)
+
+    def require(self, key: str) -> Any:
+        v = self.state.get(key)
+        if not v:
+            raise RuntimeError(f"{key} is empty")
+        return v
+
+    def model(self, default: Optional[str] = None) -> str:
+        """단계 모델: 요청 llm_model > 단계 기본 모델 > default(ContentRequest.model)"""
+        model = self.get("llm_model") or self.step.model or default
+        if not model:
+            raise RuntimeError(f"No LLM model specified for step {self.pid}")
+        return model
+
+    async def publish_gate(self) -> None:
+        """포스팅 직전: 여러 실행이 공유하는 포스팅 속도 제한(publish_limiter)이 있으면 자리 확보"""
+        limiter = self.get("publish_limiter")
+        if limiter is not None:
+            await limiter.acquire(0)
+
+
+@dataclass
+class PipelinePlan:
+    steps: List[StepDef]
+    deps: Dict[str, Set[str]]
+    unknown: List[str] = field(default_factory=list)
+
+    def levels(self) -> List[List[str]]:
+        """동시에 실행될 수 있는 단계 묶음(로그/디버깅용)"""
+        out: List[List[str]] = []
+        placed: Set[str] = set()
+        remaining = [s.pid for s in self.steps]
+        while remaining:
+            level = [p for p in remaining if self.deps[p] <= placed]
+            if not level:
+                raise ValueError(f"pipeline has a dependency cycle: {remaining}")
+            out.append(level)
+            placed.update(level)
+            remaining = [p for p in remaining if p not in placed]
+        return out
+
+
+# ──────────────────────────────────────────────────────────────
+# 선언형 DAG 파이프라인 엔진
+#   - prompt_array 의 id 를 등록된 StepDef 로 매핑(미등록 id 는 unknown_step_skipped)
+#   - 의존성: 단계의 inputs 를 outputs 로 선언한 같은 파이프라인의 다른 단계
+#   - 의존성이 끝난 단계는 바로 실행 → 독립 단계는 동시에, 전체 시간은 가장 긴 의존 체인 길이
+#   - 단계 실패는 기존처럼 step_log 에 error 로 남기고 계속(뒤 단계는 필요한 입력이 없으면 스스로 실패)
+#   - 각 단계는 별도 태스크라서 set_step 이 단계별 계측으로 분리됨
+#   - checkpoints/run_id 가 있으면 성공한 단계 outputs 를 저장, resume=True 면
+#     입력 해시(템플릿 + 실행 파라미터 + inputs 값)가 같은 단계는 저장된 outputs 로 건너뜀
+#   - on_step_event: 의존 단계가 끝나 실행을 시작할 때 / 끝났을 때(상태, 소요 시간) 동기 호출
+# ──────────────────────────────────────────────────────────────
+class PipelineEngine:
+    def __init__(self, registry: Iterable[StepDef]):
+        self.registry: Dict[str, StepDef] = {s.pid: s for s in registry}
+
+    def plan(self, prompt_ids: List[str]) -> PipelinePlan:
+        steps: List[StepDef] = []
+        unknown: List[str] = []
+        for pid in prompt_ids:
+            sd = self.registry.get(pid)
+            if sd is None:
+                unknown.append(pid)
+            elif any(s.pid == pid for s in steps):
+                logger.warning(f"[pipeline] duplicated step {pid} ignored")
+            else:
+                steps.append(sd)
+
+        producers: Dict[str, Set[str]] = {}
+        for s in steps:
+            for k in s.outputs:
+                producers.setdefault(k, set()).add(s.pid)
+        deps = {s.pid: {p for k in s.inputs for p in producers.get(k, ()) if p != s.pid} for s in steps}
+
+        plan = PipelinePlan(steps=steps, deps=deps, unknown=unknown)
+        plan.levels()  # 순환 의존이면 ValueError
+        return plan
+
+    async def run(
+        self,
+        plan: PipelinePlan,
+        *,
+        templates: Dict[str, str],
+        state: Dict[str, Any],
+        step_log: Dict[str, str],
+        on_step_done: Optional[StepDoneCallback] = None,
+        on_step_event: Optional[StepEventCallback] = None,
+        checkpoints: Optional[CheckpointStore] = None,
+        run_id: Optional[str] = None,
+        resume: bool = False,
+    ) -> Dict[str, Any]:
+        if run_id is None:
+            checkpoints = None
+        # 실행 파라미터(문자열/숫자 등 단순 값만)는 모든 단계 해시에 포함
+        params = {k: v for k, v in state.items() if v is None or isinstance(v, (str, int, float, bool))}
+        for pid in plan.unknown:
+            step_log[pid] = "unknown_step_skipped"
+        done: Dict[str, asyncio.Event] = {s.pid: asyncio.Event() for s in plan.steps}
+        logger.info(f"[pipeline] levels={plan.levels()}")
+
+        def emit(event: Dict[str, Any]) -> None:
+            if on_step_event is None:
+                return
+            try:
+                on_step_event(event)
+            except Exception as e:
+                logger.warning(f"[pipeline] step event callback failed: {e}")
+
+        async def run_one(sd: StepDef) -> None:
+            for d in plan.deps[sd.pid]:
+                await done[d].wait()
+            set_step(sd.pid)
+            t0 = time.monotonic()
+            emit({"type": "step_started", "step": sd.pid, "kind": sd.kind})
+            ctx = StepContext(step=sd, tmpl=templates[sd.pid], templates=templates, state=state)
+            ihash = None
+            try:
+                if checkpoints is not None:
+                    ihash = input_hash(sd.pid, templates[sd.pid], params, {k: state.get(k) for k in sd.inputs})
+                    saved = await checkpoints.load(run_id, sd.pid, ihash) if resume else None
+                    if saved is not None:
+                        state.update({k: v for k, v in (saved.get("outputs") or {}).items() if k in sd.outputs})
+                        step_log[sd.pid] = f"resumed:{saved.get('note') or 'ok'}"
+                        return
+
+                out = await sd.run(ctx) or {}
+                extra = set(out) - set(sd.outputs)
+                if extra:
+                    raise RuntimeError(f"step {sd.pid} returned undeclared outputs: {sorted(extra)}")
+                state.update(out)
+                step_log[sd.pid] = ctx.note or "ok"
+                if checkpoints is not None:
+                    await checkpoints.save(run_id, sd.pid, ihash, out, ctx.note)
+            except Exception as e:
+                logger.exception("[step %s] failed: %s", sd.pid, e)
+                step_log[sd.pid] = f"error:{e}"
+            finally:
+                done[sd.pid].set()
+                note = step_log.get(sd.pid, "")
+                emit({
+                    "type": "step_finished",
+                    "step": sd.pid,
+                    "outcome": "error" if note.startswith("error:") else ("resumed" if note.startswith("resumed:") else "ok"),
+                    "note": note,
+                    "elapsed_sec": round(time.monotonic() - t0, 3),
+                })
+                if on_step_done is not None:
+                    try:
+                        on_step_done(sd.pid)
+                    except Exception as e:
+                        logger.warning(f"[pipeline] step done callback failed: {e}")
+
+        await asyncio.gather(*(run_one(s) for s in plan.steps))
+        return state
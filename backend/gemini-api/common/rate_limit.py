@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Any
+
+
+# ──────────────────────────────────────────────────────────────
+# 토큰 버킷: capacity 만큼 쌓이고 초당 refill_per_sec 씩 채워짐
+# ──────────────────────────────────────────────────────────────
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_sec: float):
+        self.capacity = float(capacity)
+        self.refill_per_sec = float(refill_per_sec)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_sec)
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def wait_time(self, amount: float) -> float:
+        """amount 를 꺼낼 수 있을 때까지 남은 초 (capacity 초과 요청은 capacity 로 간주)"""
+        self._refill()
+        need = min(amount, self.capacity) - self._tokens
+        if need <= 0:
+            return 0.0
+        return need / self.refill_per_sec
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self._tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """사후 보정: +면 반환, -면 추가 차감(음수 잔고 허용 → 다음 요청이 그만큼 기다림)"""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + delta)
+
+
+@dataclass
+class Reservation:
+    tokens: int
+    waited_sec: float
+
+
+# ──────────────────────────────────────────────────────────────
+# 모델별 RPM/TPM 제한기 (분당 예산 → 초당 refill)
+# ──────────────────────────────────────────────────────────────
+class ModelRateLimiter:
+    def __init__(self, name: str, *, rpm: int, tpm: int):
+        self.name = name
+        self.rpm = int(rpm)
+        self.tpm = int(tpm)
+        self._req = TokenBucket(rpm, rpm / 60.0) if rpm > 0 else None
+        self._tok = TokenBucket(tpm, tpm / 60.0) if tpm > 0 else None
+        # 대기 순서를 FIFO 로 유지(큰 요청이 작은 요청들에 계속 밀리지 않게)
+        self._lock = asyncio.Lock()
+        self.requests = 0
+        self.waited_total_sec = 0.0
+
+    async def acquire(self, est_tokens: int) -> Reservation:
+        t0 = time.monotonic()
+        async with self._lock:
+            while True:
+                wait = 0.0
+                if self._req is not None:
+                    wait = max(wait, self._req.wait_time(1))
+                if self._tok is not None:
+                    wait = max(wait, self._tok.wait_time(est_tokens))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self._req is not None:
+                self._req.take(1)
+            if self._tok is not None:
+                self._tok.take(est_tokens)
+        waited = time.monotonic() - t0
+        self.requests += 1
+        self.waited_total_sec += waited
+        return Reservation(tokens=est_tokens, waited_sec=waited)
+
+    def reconcile(self, reservation: Reservation, actual_tokens: Optional[int]) -> None:
+        """응답의 실제 토큰 수로 예약분을 보정"""
+        if self._tok is None or actual_tokens is None:
+            return
+        self._tok.adjust(reservation.tokens - actual_tokens)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "requests_available": round(self._req.available, 1) if self._req else None,
+            "tokens_available": int(self._tok.available) if self._tok else None,
+            "requests": self.requests,
+            "waited_total_sec": round(self.waited_total_sec, 2),
+        }
+
+
+class RateLimiterRegistry:
+    """
+    모델명 → ModelRateLimiter.
+    overrides: {"gemini-2.5-flash": {"rpm": 1000, "tpm": 1000000}, ...}  (0 이면 해당 축 무제한)
+    """
+
+    def __init__(self, *, default_rpm: int, default_tpm: int, overrides: Optional[Dict[str, Dict[str, int]]] = None):
+        self.default_rpm = default_rpm
+        self.default_tpm = default_tpm
+        self.overrides = overrides or {}
+        self._limiters: Dict[str, ModelRateLimiter] = {}
+
+    def get(self, model: str) -> ModelRateLimiter:
+        lim = self._limiters.get(model)
+        if lim is None:
+            conf = self.overrides.get(model) or {}
+            lim = ModelRateLimiter(
+                model,
+                rpm=int(conf.get("rpm", self.default_rpm)),
+                tpm=int(conf.get("tpm", self.default_tpm)),
+            )
+            self._limiters[model] = lim
+        return lim
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {k: v.snapshot() for k, v in self._limiters.items()}
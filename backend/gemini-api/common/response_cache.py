@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from redis.asyncio import Redis
+except Exception:
+    Redis = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+def _canonical(obj: Any) -> Any:
+    """SDK(pydantic) 객체/리스트/dict → JSON 직렬화 가능한 정규형"""
+    if obj is None:
+        return None
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json", exclude_none=True)
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(x) for x in obj]
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v) for k, v in obj.items()}
+    return obj
+
+
+def make_cache_key(model: str, contents: Any, config: Any = None) -> str:
+    """model + to_ga_contents 결과 + generation config 의 정규 JSON 해시"""
+    payload = json.dumps(
+        {"model": model, "contents": _canonical(contents), "config": _canonical(config)},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ──────────────────────────────────────────────────────────────
+# 응답 캐시: 프로세스 내 LRU(+TTL, 개수/바이트 상한) → (옵션) Redis
+# 값은 직렬화된 응답 JSON 문자열
+# ──────────────────────────────────────────────────────────────
+class ResponseCache:
+    def __init__(
+        self,
+        *,
+        ttl_sec: int,
+        max_entries: int,
+        max_bytes: int,
+        redis_url: Optional[str] = None,
+        namespace: str = "genai:resp:",
+    ):
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.namespace = namespace
+        self._mem: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._bytes = 0
+        self._redis_url = redis_url if (redis_url and Redis) else None
+        self._redis = None
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _client(self):
+        if self._redis is None and self._redis_url:
+            self._redis = Redis.from_url(self._redis_url)
+        return self._redis
+
+    # --- 메모리 계층 ---
+    def _mem_get(self, key: str) -> Optional[str]:
+        item = self._mem.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            self._mem_pop(key)
+            return None
+        self._mem.move_to_end(key)
+        return value
+
+    def _mem_pop(self, key: str) -> None:
+        item = self._mem.pop(key, None)
+        if item is not None:
+            self._bytes -= len(item[1])
+
+    def _mem_put(self, key: str, value: str, ttl_sec: int) -> None:
+        if len(value) > self.max_bytes:
+            return
+        self._mem_pop(key)
+        self._mem[key] = (time.monotonic() + ttl_sec, value)
+        self._bytes += len(value)
+        while self._mem and (len(self._mem) > self.max_entries or self._bytes > self.max_bytes):
+            old_key, _ = next(iter(self._mem.items()))
+            self._mem_pop(old_key)
+            self.evictions += 1
+
+    # --- 공개 API ---
+    async def get(self, key: str) -> Optional[str]:
+        value = self._mem_get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        client = self._client()
+        if client is not None:
+            try:
+                raw = await client.get(self.namespace + key)
+            except Exception as e:
+                logger.warning(f"[genai:cache] redis get failed: {e}")
+                raw = None
+            if raw:
+                value = raw.decode("utf-8") if isinstance(raw, bytes) else str(raw)
+                self._mem_put(key, value, self.ttl_sec)
+                self.hits += 1
+                self.redis_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str, ttl_sec: Optional[int] = None) -> None:
+        ttl = ttl_sec or self.ttl_sec
+        self._mem_put(key, value, ttl)
+        client = self._client()
+        if client is not None:
+            try:
+                await client.setex(self.namespace + key, ttl, value)
+            except Exception as e:
+                logger.warning(f"[genai:cache] redis set failed: {e}")
+
+    def clear(self) -> None:
+        self._mem.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._mem),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "redis": bool(self._redis_url),
+        }
@@ -1,7 +1,110 @@
 from __future__ import annotations
+import asyncio
 import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
 from settings import settings
 
 def jittered_backoff(attempt: int, *, max_backoff: int | None = None) -> float:
     cap = max_backoff if max_backoff is not None else settings.STEP_MAX_BACKOFF
     return min(2 ** attempt, cap) + random.uniform(0.1, 0.9)
+
+
+# ──────────────────────────────────────────────────────────────
+# 실행 단위(파이프라인 1회) 재시도 예산
+#   - max_attempts: 모든 계층(LLM/HTTP)의 실제 외부 호출 횟수 총합 상한
+#   - deadline: 절대 마감 시각(time.monotonic 기준). 백오프 sleep/호출 타임아웃도 여기에 맞춰 줄어듦
+# contextvar 로 전달되므로 llm.py → ContentGenerateService → http.py 어디서든 같은 예산을 공유합니다.
+# (asyncio 태스크는 생성 시 컨텍스트를 복사하지만 같은 RetryBudget 객체를 참조하므로 병렬 단계도 공유)
+# ──────────────────────────────────────────────────────────────
+class RetryBudgetExceeded(RuntimeError):
+    """시도 횟수/마감 시간 예산 소진 → 더 이상 재시도하지 않음"""
+
+
+@dataclass
+class RetryBudget:
+    max_attempts: int
+    deadline: Optional[float] = None
+    attempts: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def from_settings(cls) -> "RetryBudget":
+        deadline_sec = settings.RUN_DEADLINE_SEC
+        return cls(
+            max_attempts=settings.RUN_MAX_ATTEMPTS,
+            deadline=(time.monotonic() + deadline_sec) if deadline_sec > 0 else None,
+        )
+
+    def remaining_time(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def spend(self, label: str = "") -> None:
+        """외부 호출 1회 차감. 소진/마감이면 RetryBudgetExceeded"""
+        remaining = self.remaining_time()
+        if remaining is not None and remaining <= 0:
+            raise RetryBudgetExceeded(f"run deadline exceeded ({label})")
+        if self.attempts >= self.max_attempts:
+            raise RetryBudgetExceeded(f"run attempt budget exhausted: {self.attempts}/{self.max_attempts} ({label})")
+        self.attempts += 1
+
+    def timeout(self, default: float) -> float:
+        """호출 타임아웃을 남은 시간 이하로"""
+        remaining = self.remaining_time()
+        if remaining is None:
+            return default
+        return max(0.1, min(default, remaining))
+
+    def snapshot(self) -> dict:
+        remaining = self.remaining_time()
+        return {
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "elapsed_sec": round(time.monotonic() - self.started_at, 2),
+            "remaining_sec": round(remaining, 2) if remaining is not None else None,
+        }
+
+
+_current_budget: ContextVar[Optional[RetryBudget]] = ContextVar("retry_budget", default=None)
+
+
+def current_budget() -> Optional[RetryBudget]:
+    return _current_budget.get()
+
+
+@contextmanager
+def retry_budget(budget: Optional[RetryBudget] = None) -> Iterator[RetryBudget]:
+    """with retry_budget(): ... → 블록 안의 모든 재시도 계층이 같은 예산을 사용 (기본값은 settings)"""
+    b = budget or RetryBudget.from_settings()
+    token = _current_budget.set(b)
+    try:
+        yield b
+    finally:
+        _current_budget.reset(token)
+
+
+def spend_attempt(label: str = "") -> None:
+    b = _current_budget.get()
+    if b is not None:
+        b.spend(label)
+
+
+def budget_timeout(default: float) -> float:
+    b = _current_budget.get()
+    return b.timeout(default) if b is not None else default
+
+
+async def budget_sleep(delay: float) -> None:
+    """백오프 sleep. 깨어나면 이미 마감을 넘길 상황이면 자지 않고 바로 예산 초과"""
+    b = _current_budget.get()
+    if b is not None:
+        remaining = b.remaining_time()
+        if remaining is not None and remaining <= delay:
+            raise RetryBudgetExceeded(f"run deadline would be exceeded by backoff ({delay:.1f}s)")
+    await asyncio.sleep(delay)
@@ -1,8 +1,10 @@
 # common/retry_gen.py
 from __future__ import annotations
-import asyncio
 from typing import Union, List, Optional, Dict, Any
 from models.content_request import ContentRequest, ContentMessage  # 경로 맞게 수정
+from settings import settings
+from common.text import to_text
+from common.retry import jittered_backoff, RetryBudgetExceeded, budget_sleep
 
 def _normalize_to_sdk_contents(
     prompt: Union[str, ContentRequest, List[ContentMessage], List[Dict[str, Any]]]
@@ -73,7 +75,9 @@ async def generate_text_with_retry(
             if not text:
                 raise RuntimeError("empty text")
             return text
+        except RetryBudgetExceeded:
+            raise
         except Exception as e:
             last_err = e
-            await asyncio.sleep(jittered_backoff(attempt))
+            await budget_sleep(jittered_backoff(attempt))
     raise last_err or RuntimeError("generate_text_with_retry failed")
@@ -1,8 +1,16 @@
+import asyncio
 import logging
 import log_config
 
 from fastapi import FastAPI
 from routers import content_generate_router, prompt_router, parameter_router, pipeline_router, scheduler_router, post_router
+from services.content_generate_service import ContentGenerateService
+from common.image_optimize import shutdown_pool
+from common.checkpoint import checkpoint_store
+from operators.job_store import job_store
+from common.event_bus import event_bus
+from services.prompt_repository import prompt_repository
+from settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +24,42 @@ app.include_router(pipeline_router.router, prefix="/pipelines", tags=["Pipeline
 app.include_router(scheduler_router.router, prefix="/schedulers", tags=["Scheduler API"])
 app.include_router(post_router.router, prefix="/post", tags=["Content API"])
 
+_background_tasks = set()
+
+@app.on_event("startup")
+async def _start_prompt_cache_listener():
+    # 다른 레플리카의 프롬프트/파이프라인 수정 → 이 프로세스 캐시 무효화 (redis_url 이 없으면 바로 끝남)
+    task = asyncio.create_task(prompt_repository.listen())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+@app.on_event("startup")
+async def _start_job_event_relay():
+    # 다른 레플리카/워커의 작업 이벤트 → 이 프로세스의 /post/events 구독자 (redis_url 이 없으면 바로 끝남)
+    task = asyncio.create_task(event_bus.listen())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+@app.on_event("startup")
+async def _start_embedded_worker():
+    # 단일 컨테이너 개발용: 별도 geminiworker 없이 API 프로세스에서 content_jobs 처리
+    if not settings.CONTENT_WORKER_EMBEDDED:
+        return
+    from services.workers.content_worker import ContentWorker
+    task = asyncio.create_task(ContentWorker(listen_prompts=False).run_forever())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+@app.on_event("shutdown")
+async def _close_genai_client():
+    await ContentGenerateService.aclose()
+    shutdown_pool()
+    await checkpoint_store.aclose()
+    await job_store.aclose()
+    await event_bus.aclose()
+    for task in list(_background_tasks):
+        task.cancel()
+
 @app.get("/")
 def health_check():
     return {"status": "ok"}
\ No newline at end of file
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from pydantic import BaseModel, Field
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, List, Literal
 
 class RunInitContentReq(BaseModel):
     topic: str = Field(..., min_length=1)
@@ -9,8 +9,23 @@ class RunInitContentReq(BaseModel):
     target_chars: Optional[int] = Field(
         None, ge=100, le=20000, description="desired post length (approx chars)"
     )
+    run_id: Optional[str] = Field(None, max_length=64, description="checkpoint key (run-async defaults to job id)")
+    resume: bool = Field(False, description="skip steps already checkpointed under run_id")
 
 class RunInitContentResp(BaseModel):
     status: str
     result: Optional[Dict[str, Any]] = None
     detail: Optional[str] = None
+
+
+class RunBatchReq(BaseModel):
+    topics: List[str] = Field(..., min_length=1)
+    kind: Literal["init", "post"] = "init"
+    photo_count: int = Field(1, ge=0, le=10)
+    visual_component_count: int = Field(3, ge=0, le=10)
+    llm_model: Optional[str] = Field(None, description="override text LLM model")
+    pipeline_id: Optional[int] = Field(None, description="default: init=1, post=2")
+    target_chars: Optional[int] = Field(None, ge=100, le=20000)
+    max_parallel: Optional[int] = Field(None, ge=1, le=50, description="concurrent articles")
+    llm_concurrency: Optional[int] = Field(None, ge=1, le=200, description="concurrent LLM calls across the batch")
+    publish_per_min: Optional[int] = Field(None, ge=1, le=600, description="WordPress posts per minute")
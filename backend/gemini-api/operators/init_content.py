@@ -3,24 +3,43 @@ from __future__ import annotations
 import asyncio
 import logging
 import json
-from typing import Any, Optional, List, Dict
+import uuid
+from typing import Any, Callable, Optional, List, Dict
 
 from sqlalchemy.orm import Session
 
 import log_config  # noqa: F401
 from settings import settings
+from common.retry import RetryBudget, retry_budget
+from common.rate_limit import ModelRateLimiter
+from common.metering import run_meter
+from common.checkpoint import checkpoint_store
+from common.pipeline import PipelineEngine, StepContext, StepDef, StepEventCallback
 from services.db_service import get_db
-from services.create_article_service import CreateArticleService
-from services.content_generate_service import ContentGenerateService
+from services.prompt_repository import prompt_repository
+from services.content_generate_service import ContentGenerateService, route_model
+from services.batch_backends import BatchBackend
+from services.batch_generate_service import BatchGenerateService
 from models.content_request import ContentRequest
 from utils.html_parser import HtmlParser
 from utils.validators import safe_parse_and_validate
 
-from common.llm import generate_text_with_retry, generate_images_with_retry
+from common.llm import (
+    generate_text_with_retry,
+    generate_images_with_retry,
+    generate_text_stream_with_retry,
+    html_stream_guard,
+)
 from common.text import strip_code_fence_to_json
 from common.http import robust_post_form, robust_upload_images
+from common.image_optimize import optimize_images
 
 logger = logging.getLogger(__name__)
+
+# (단계 id, 누적 부분 출력) → None | awaitable
+ProgressCallback = Callable[[str, str], Any]
+# 단계가 끝날 때마다 현재까지의 계측 스냅샷(common.metering.RunMeter.snapshot)
+MetricsCallback = Callable[[Dict[str, Any]], Any]
 DEFAULT_TARGET_CHARS = 2000  # 없을 때 사용할 기본 글자 수
 
 
@@ -45,9 +64,159 @@ def _parse_prompt_ids(raw: str | List[int]) -> List[str]:
     return [p.strip() for p in s.split(",") if p.strip()]
 
 
-def _pick_model(req: ContentRequest, override: Optional[str]) -> Optional[str]:
-    """요청으로 들어온 llm_model이 우선, 없으면 ContentRequest.model"""
-    return override or getattr(req, "model", None)
+def _step_progress(on_progress: Optional[ProgressCallback], pid: str):
+    """on_progress(step, text) → 스트림 on_chunk(text) 어댑터"""
+    if on_progress is None:
+        return None
+    return lambda text: on_progress(pid, text)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 단계 정의: pipelines.prompt_array 의 프롬프트 id → StepDef
+#   1 → 2 → {3(이미지), 4(태그)} → 5 → 8   (3 과 4 는 fact_checked_text 만 필요해서 동시에 실행)
+#   9/10 프롬프트는 비활성화(미등록 → unknown_step_skipped)
+# ──────────────────────────────────────────────────────────────────────────────
+async def _step_draft(ctx: StepContext) -> Dict[str, Any]:
+    # 1) 초안 생성
+    req = ContentRequest(content=ctx.tmpl.format(topic=ctx.get("topic"), target_chars=ctx.get("target_chars")))
+    model = route_model(ctx.model(req.model))
+    generated_content = await generate_text_with_retry(
+        ctx.get("service"), model, req.content, step=ctx.pid
+    )
+    ctx.note = f"generated_content_len={len(generated_content)}"
+    return {"generated_content": generated_content}
+
+
+async def _step_fact_check(ctx: StepContext) -> Dict[str, Any]:
+    # 2) 사실 검증
+    generated_content = ctx.require("generated_content")
+    req = ContentRequest(content=ctx.tmpl.format(generated_content=generated_content))
+    model = route_model(ctx.model(req.model))
+    fact_checked_text = await generate_text_with_retry(
+        ctx.get("service"), model, req.content, step=ctx.pid
+    )
+    ctx.note = f"fact_checked_text_len={len(fact_checked_text)}"
+    return {"fact_checked_text": fact_checked_text}
+
+
+async def _step_images(ctx: StepContext) -> Dict[str, Any]:
+    # 3) 이미지 생성 → 업로드
+    fact_checked_text = ctx.require("fact_checked_text")
+    req = ContentRequest(content=ctx.tmpl.format(n=ctx.get("photo_count"), fact_checked_text=fact_checked_text))
+    saved_image_paths = await generate_images_with_retry(
+        ctx.get("service"), ctx.step.model or getattr(req, "image_model", None), req.content
+    )
+    upload_url = f"{settings.wordpress_base}/posts/upload-image/"
+    upload_paths, img_stats = await optimize_images(saved_image_paths)
+    uploaded_results = await robust_upload_images(upload_paths, upload_url)
+    ctx.note = (
+        f"uploaded_images={len(uploaded_results)}, "
+        f"image_bytes={img_stats['bytes_before']}->{img_stats['bytes_after']}"
+    )
+    return {"uploaded_results": uploaded_results}
+
+
+async def _step_taxonomy(ctx: StepContext) -> Dict[str, Any]:
+    # 4) 태그/카테고리 추출(JSON)
+    fact_checked_text = ctx.require("fact_checked_text")
+    req = ContentRequest(content=ctx.tmpl.format(fact_checked_text=fact_checked_text))
+    model = route_model(ctx.model(req.model))
+    raw_json_text = await generate_text_with_retry(
+        ctx.get("service"), model, req.content, step=ctx.pid
+    )
+    clean = strip_code_fence_to_json(raw_json_text)
+    try:
+        data = json.loads(clean)
+    except Exception as e:
+        logger.warning("[4] JSON parse failed; fallback empty: %s", e)
+        data = {}
+    tags = data.get("tags", []) or []
+    categories = data.get("categories", []) or []
+    ctx.note = f"tags={len(tags)}, categories={len(categories)}"
+    return {"tags": tags, "categories": categories}
+
+
+async def _step_html(ctx: StepContext) -> Dict[str, Any]:
+    # 5) HTML 구성 (3 단계가 실패했으면 이미지 없이)
+    fact_checked_text = ctx.require("fact_checked_text")
+    uploaded_results = ctx.get("uploaded_results") or []
+
+    image_urls = [
+        r.get("image_url")
+        for r in uploaded_results
+        if isinstance(r, dict) and r.get("image_url")
+    ]
+    image_ids = [
+        r.get("image_id")
+        for r in uploaded_results
+        if isinstance(r, dict) and r.get("image_id")
+    ]
+    first_image_id = image_ids[0] if image_ids else None
+
+    # ✅ 리스트를 안전하게 문자열로 넘김 (프롬프트가 문자열 포맷을 기대하는 경우 대비)
+    req = ContentRequest(
+        content=ctx.tmpl.format(
+            fact_checked_text=fact_checked_text,
+            image_urls=json.dumps(image_urls),
+        )
+    )
+    model = route_model(ctx.model(req.model))
+    html_result_text = await generate_text_stream_with_retry(
+        ctx.get("service"), model, req.content,
+        on_chunk=_step_progress(ctx.get("on_progress"), ctx.pid),
+        guard=html_stream_guard,
+    )
+    ctx.note = f"html_result_text_len={len(html_result_text)}"
+    return {"html_result_text": html_result_text, "first_image_id": first_image_id}
+
+
+async def _step_publish(ctx: StepContext) -> Dict[str, Any]:
+    # 8) HTML 확장 → 파싱 → 포스팅
+    html_result_text = ctx.require("html_result_text")
+
+    req = ContentRequest(content=ctx.tmpl.format(input_html_content=html_result_text))
+    model = route_model(ctx.model(req.model))
+    extended_html_result_text = await generate_text_stream_with_retry(
+        ctx.get("service"), model, req.content,
+        on_chunk=_step_progress(ctx.get("on_progress"), ctx.pid),
+        guard=html_stream_guard,
+    )
+    ctx.note = f"extended_html_len={len(extended_html_result_text)}"
+
+    parser = HtmlParser()
+    parsed = safe_parse_and_validate(extended_html_result_text, parser)
+    if not parsed:
+        raise RuntimeError("Parsed result invalid. Skip posting.")
+    title, content = parsed
+
+    post_data = {
+        "title": title,
+        "content": content,
+        "categories": ctx.get("categories") or [],
+        "tags": ctx.get("tags") or [],
+        "image_id": ctx.get("first_image_id"),
+    }
+    create_url = f"{settings.wordpress_base}/posts/create-post/"
+    await ctx.publish_gate()
+    post_resp = await robust_post_form(create_url, post_data)
+    ctx.note = "post_done"
+    return {"extended_html_result_text": extended_html_result_text, "post_resp": post_resp}
+
+
+INIT_STEPS: List[StepDef] = [
+    StepDef("1", "text", _step_draft, outputs=("generated_content",), description="초안 생성"),
+    StepDef("2", "text", _step_fact_check, inputs=("generated_content",), outputs=("fact_checked_text",),
+            description="사실 검증"),
+    StepDef("3", "image", _step_images, inputs=("fact_checked_text",), outputs=("uploaded_results",),
+            description="이미지 생성/업로드"),
+    StepDef("4", "text", _step_taxonomy, inputs=("fact_checked_text",), outputs=("tags", "categories"),
+            description="태그/카테고리 추출"),
+    StepDef("5", "text", _step_html, inputs=("fact_checked_text", "uploaded_results"),
+            outputs=("html_result_text", "first_image_id"), description="HTML 구성"),
+    StepDef("8", "publish", _step_publish, inputs=("html_result_text", "tags", "categories", "first_image_id"),
+            outputs=("extended_html_result_text", "post_resp"), description="HTML 확장 + 포스팅"),
+]
+INIT_PIPELINE = PipelineEngine(INIT_STEPS)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -61,227 +230,58 @@ async def run_init_content_with_db(
     llm_model: Optional[str] = None,
     pipeline_id: int = 1,
     target_chars: Optional[int] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    content_generate_service: Optional[Any] = None,
+    budget: Optional[RetryBudget] = None,
+    on_metrics: Optional[MetricsCallback] = None,
+    run_id: Optional[str] = None,
+    resume: bool = False,
+    publish_limiter: Optional[ModelRateLimiter] = None,
+    on_step_event: Optional[StepEventCallback] = None,
 ) -> Dict[str, Any]:
-    create_article_service = CreateArticleService()
-    content_generate_service = ContentGenerateService()
-
-    pipeline = create_article_service.fetch_pipeline(db, pipeline_id)
-    prompt_ids = _parse_prompt_ids(pipeline.prompt_array)
-
-    generated_content: Optional[str] = None
-    fact_checked_text: Optional[str] = None
-    html_result_text: Optional[str] = None
-    extended_html_result_text: Optional[str] = None  # ✅ 선언 시 초기화 (NameError 방지)
-    modifying_json_text: Optional[str] = None
-    first_image_id: Optional[int] = None
-    uploaded_results: List[dict] = []
-    tags: List[str] = []
-    categories: List[str] = []
-    post_resp: Optional[Dict[str, Any]] = None
+    """
+    content_generate_service: 생성 서비스 주입(기본 ContentGenerateService, 배치 모드면 BatchGenerateService)
+    budget: 실행 재시도 예산(기본은 settings 값. 배치 모드는 마감 없이)
+    on_metrics: 단계 종료마다 단계별 토큰/시간/대기/재시도 집계를 전달
+    run_id/resume: 단계 출력은 run_id 로 체크포인트됨. 실패한 실행을 같은 run_id, 같은 파라미터로
+                   resume=True 재실행하면 완료된 단계는 건너뛰고 첫 미완료 단계부터 실행
+    publish_limiter: 여러 실행이 공유하는 WordPress 포스팅 속도 제한(rpm 버킷)
+    on_step_event: 단계 시작/종료(상태, 소요 시간) 이벤트
+    """
+    run_id = run_id or uuid.uuid4().hex
+    content_generate_service = content_generate_service or ContentGenerateService()
+
+    # 파이프라인 1회 + 프롬프트 IN 1회(캐시 hit 면 0회), async 세션이라 이벤트 루프를 막지 않음
+    pipeline = await prompt_repository.get_pipeline(pipeline_id)
+    plan = INIT_PIPELINE.plan(_parse_prompt_ids(pipeline.prompt_array))
+    templates = await prompt_repository.get_prompts(s.pid for s in plan.steps)
+
+    state: Dict[str, Any] = {
+        "topic": topic,
+        "photo_count": photo_count,
+        "target_chars": target_chars or DEFAULT_TARGET_CHARS,
+        "llm_model": llm_model,
+        "service": content_generate_service,
+        "on_progress": on_progress,
+        "publish_limiter": publish_limiter,
+    }
     step_log: Dict[str, str] = {}
 
-    tc = target_chars or DEFAULT_TARGET_CHARS
-
-    for pid in prompt_ids:
-        prompt_obj = create_article_service.fetch_prompt(db, int(pid))
-        tmpl = prompt_obj.prompt
-
-        try:
-            if pid == "1":
-                # 1) 초안 생성
-                req = ContentRequest(content=tmpl.format(topic=topic, target_chars=tc))
-                model = _pick_model(req, llm_model)
-                if not model:
-                    raise RuntimeError("No LLM model specified for step 1")
-                generated_content = await generate_text_with_retry(
-                    content_generate_service, model, req.content
-                )
-                step_log[pid] = f"generated_content_len={len(generated_content)}"
-
-            elif pid == "2":
-                # 2) 사실 검증
-                if not generated_content:
-                    raise RuntimeError("generated_content is empty")
-                req = ContentRequest(content=tmpl.format(generated_content=generated_content))
-                model = _pick_model(req, llm_model)
-                if not model:
-                    raise RuntimeError("No LLM model specified for step 2")
-                fact_checked_text = await generate_text_with_retry(
-                    content_generate_service, model, req.content
-                )
-                step_log[pid] = f"fact_checked_text_len={len(fact_checked_text)}"
-
-            elif pid == "3":
-                # 3) 이미지 생성 → 업로드
-                if not fact_checked_text:
-                    raise RuntimeError("fact_checked_text is empty")
-                req = ContentRequest(content=tmpl.format(n=photo_count, fact_checked_text=fact_checked_text))
-                saved_image_paths = await generate_images_with_retry(
-                    content_generate_service, getattr(req, "image_model", None), req.content
-                )
-                upload_url = f"{settings.wordpress_base}/posts/upload-image/"
-                uploaded_results = await robust_upload_images(saved_image_paths, upload_url)
-                step_log[pid] = f"uploaded_images={len(uploaded_results)}"
-
-            elif pid == "4":
-                # 4) 태그/카테고리 추출(JSON)
-                if not fact_checked_text:
-                    raise RuntimeError("fact_checked_text is empty")
-                req = ContentRequest(content=tmpl.format(fact_checked_text=fact_checked_text))
-                model = _pick_model(req, llm_model)
-                if not model:
-                    raise RuntimeError("No LLM model specified for step 4")
-                raw_json_text = await generate_text_with_retry(
-                    content_generate_service, model, req.content
-                )
-                clean = strip_code_fence_to_json(raw_json_text)
-                try:
-                    data = json.loads(clean)
-                except Exception as e:
-                    logger.warning("[4] JSON parse failed; fallback empty: %s", e)
-                    data = {}
-                tags = data.get("tags", []) or []
-                categories = data.get("categories", []) or []
-                step_log[pid] = f"tags={len(tags)}, categories={len(categories)}"
-
-            elif pid == "5":
-                # 5) HTML 구성
-                if not fact_checked_text:
-                    raise RuntimeError("fact_checked_text is empty")
-
-                image_urls = [
-                    r.get("image_url")
-                    for r in uploaded_results
-                    if isinstance(r, dict) and r.get("image_url")
-                ]
-                image_ids = [
-                    r.get("image_id")
-                    for r in uploaded_results
-                    if isinstance(r, dict) and r.get("image_id")
-                ]
-                first_image_id = image_ids[0] if image_ids else None
-
-                # ✅ 리스트를 안전하게 문자열로 넘김 (프롬프트가 문자열 포맷을 기대하는 경우 대비)
-                req = ContentRequest(
-                    content=tmpl.format(
-                        fact_checked_text=fact_checked_text,
-                        image_urls=json.dumps(image_urls),
-                    )
-                )
-                model = _pick_model(req, llm_model)
-                if not model:
-                    raise RuntimeError("No LLM model specified for step 5")
-                html_result_text = await generate_text_with_retry(
-                    content_generate_service, model, req.content
-                )
-                step_log[pid] = f"html_result_text_len={len(html_result_text)}"
-
-            elif pid == "8":
-                # 8) HTML 확장
-                if not html_result_text:
-                    raise RuntimeError("html_result_text is empty")
-
-                req = ContentRequest(content=tmpl.format(input_html_content=html_result_text))
-                model = _pick_model(req, llm_model)
-                if not model:
-                    raise RuntimeError("No LLM model specified for step 8")
-                extended_html_result_text = await generate_text_with_retry(
-                    content_generate_service, model, req.content
-                )
-                step_log[pid] = f"extended_html_len={len(extended_html_result_text)}"
-
-                parser = HtmlParser()
-                parsed = safe_parse_and_validate(extended_html_result_text, parser)
-                if not parsed:
-                    raise RuntimeError("Parsed result invalid. Skip posting.")
-                title, content = parsed
-
-                post_data = {
-                    "title": title,
-                    "content": content,
-                    "categories": categories,
-                    "tags": tags,
-                    "image_id": first_image_id,
-                }
-                create_url = f"{settings.wordpress_base}/posts/create-post/"
-                post_resp = await robust_post_form(create_url, post_data)
-                step_log[pid] = "post_done"
-
-            # # 9 프롬프트 비활성화
-            # elif pid == "9":
-            #     # 9) 최종 파싱 및 포스팅
-            #     # ✅ 8단계 결과가 없으면 5단계 HTML로 폴백
-            #     modifying_html = extended_html_result_text or html_result_text
-            #     if not modifying_html:
-            #         raise RuntimeError("No HTML to post (need step 5 or 8 before 9).")
-            #
-            #     req = ContentRequest(content=tmpl.format(input_html_content=modifying_html))
-            #     model = _pick_model(req, llm_model)
-            #     if not model:
-            #         raise RuntimeError("No LLM model specified for step 9")
-            #
-            #     # (선택) 메타 생성 결과 길이만 로깅 (실제로 사용하지 않는다면 제거 가능)
-            #     modifying_json_text = await generate_text_with_retry(
-            #         content_generate_service, model, req.content
-            #     )
-            #     step_log[pid] = f"meta_json_len={len(modifying_json_text)}"
-
-                # parser = HtmlParser()
-                # parsed = safe_parse_and_validate(modifying_json_text, parser)
-                # if not parsed:
-                #     raise RuntimeError("Parsed result invalid. Skip posting.")
-                # title, content = parsed
-                #
-                # post_data = {
-                #     "title": title,
-                #     "content": content,
-                #     "categories": categories,
-                #     "tags": tags,
-                #     "image_id": first_image_id,
-                # }
-                # create_url = f"{settings.wordpress_base}/posts/create-post/"
-                # post_resp = await robust_post_form(create_url, post_data)
-                # step_log[pid] = "post_done"
-
-            # # 10 번 프롬프트 비활성화
-            # elif pid == "10":
-            #     if not fact_checked_text:
-            #         raise RuntimeError("fact_checked_text is empty")
-            #     req = ContentRequest(content=tmpl.format(input_html_content=modifying_json_text))
-            #     model = _pick_model(req, llm_model)
-            #     if not model:
-            #         raise RuntimeError("No LLM model specified for step 9")
-            #
-            #     fianl_result = await generate_text_with_retry(
-            #         content_generate_service, model, req.content
-            #     )
-            #     step_log[pid] = f"meta_json_len={len(fianl_result)}"
-            #
-            #     parser = HtmlParser()
-            #     parsed = safe_parse_and_validate(fianl_result, parser)
-            #     if not parsed:
-            #         raise RuntimeError("Parsed result invalid. Skip posting.")
-            #     title, content = parsed
-            #
-            #     post_data = {
-            #         "title": title,
-            #         "content": content,
-            #         "categories": categories,
-            #         "tags": tags,
-            #         "image_id": first_image_id,
-            #     }
-            #     create_url = f"{settings.wordpress_base}/posts/create-post/"
-            #     post_resp = await robust_post_form(create_url, post_data)
-            #     step_log[pid] = "post_done"
-
-            else:
-                step_log[pid] = "unknown_step_skipped"
-
-        except Exception as e:
-            logger.exception("[step %s] failed: %s", pid, e)
-            step_log[pid] = f"error:{e}"
-            # 필요시 raise로 전체 중단하도록 변경 가능
+    # 실행 전체(모든 단계/계층)의 외부 호출 횟수·마감 시간 상한 + 단계별 계측
+    with retry_budget(budget) as budget, run_meter() as meter:
+        await INIT_PIPELINE.run(
+            plan,
+            templates=templates,
+            state=state,
+            step_log=step_log,
+            on_step_done=(lambda _pid: on_metrics(meter.snapshot())) if on_metrics is not None else None,
+            on_step_event=on_step_event,
+            checkpoints=checkpoint_store if settings.CHECKPOINT_ENABLED else None,
+            run_id=run_id,
+            resume=resume,
+        )
 
+    post_resp = state.get("post_resp")
     safe_post_summary = None
     if isinstance(post_resp, dict):
         safe_post_summary = {
@@ -289,18 +289,69 @@ async def run_init_content_with_db(
         }
 
     return {
+        "run_id": run_id,
         "pipeline_id": pipeline_id,
         "topic": topic,
         "photo_count": photo_count,
         "llm_model": llm_model,
         "steps": step_log,
-        "tags": tags,
-        "categories": categories,
-        "uploaded_images": len(uploaded_results),
+        "retry_budget": budget.snapshot(),
+        "metrics": meter.snapshot(),
+        "tags": state.get("tags") or [],
+        "categories": state.get("categories") or [],
+        "uploaded_images": len(state.get("uploaded_results") or []),
         "post": safe_post_summary,
     }
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# 배치 모드: 여러 토픽을 동시에 돌려 같은 단계의 프롬프트를 배치 잡 하나로 묶음
+# (스케줄 잡처럼 지연시간 요구가 없는 경우용)
+# ──────────────────────────────────────────────────────────────────────────────
+async def run_init_content_batch(
+    db: Session,
+    *,
+    topics: List[str],
+    photo_count: int = 1,
+    llm_model: Optional[str] = None,
+    pipeline_id: int = 1,
+    target_chars: Optional[int] = None,
+    backend: Optional[BatchBackend] = None,
+) -> Dict[str, Any]:
+    service = BatchGenerateService(backend)
+    runs = [
+        run_init_content_with_db(
+            db,
+            topic=t,
+            photo_count=photo_count,
+            llm_model=llm_model,
+            pipeline_id=pipeline_id,
+            target_chars=target_chars,
+            content_generate_service=service,
+            # 배치 잡은 수 시간 걸릴 수 있으므로 마감 없이 시도 횟수만 제한
+            budget=RetryBudget(max_attempts=settings.RUN_MAX_ATTEMPTS),
+        )
+        for t in topics
+    ]
+    outcomes = await asyncio.gather(*runs, return_exceptions=True)
+    await service.drain()
+
+    results: List[Dict[str, Any]] = []
+    for t, r in zip(topics, outcomes):
+        if isinstance(r, BaseException):
+            logger.warning("[batch] topic failed: %s (%s)", t, r)
+            results.append({"topic": t, "status": "error", "error": str(r)})
+        else:
+            results.append({"status": "ok", **r})
+    return {
+        "topics": len(topics),
+        "ok": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] == "error"),
+        "batch": service.stats(),
+        "results": results,
+    }
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # CLI 용 래퍼(옵션): 동일 로직 재사용
 # ──────────────────────────────────────────────────────────────────────────────
@@ -329,6 +380,8 @@ if __name__ == "__main__":
     parser.add_argument("--llm-model", type=str, default=None)
     parser.add_argument("--pipeline-id", type=int, default=1)
     parser.add_argument("--target-chars", type=int, default=None)
+    parser.add_argument("--run-id", type=str, default=None)
+    parser.add_argument("--resume", action="store_true")
     args = parser.parse_args()
 
     asyncio.run(
@@ -339,5 +392,7 @@ if __name__ == "__main__":
             llm_model=args.llm_model,
             pipeline_id=args.pipeline_id,
             target_chars=args.target_chars,
+            run_id=args.run_id,
+            resume=args.resume,
         )
     )
@@ -1,63 +1,415 @@
 from __future__ import annotations
-import json, time, uuid, asyncio
-from typing import Dict, Optional, Any, Literal
-from dataclasses import dataclass, field
+import json, os, time, uuid, asyncio, logging
+from collections import OrderedDict
+from typing import Dict, Optional, Any, Literal, Set
+from dataclasses import dataclass, field, replace
+
+from common.event_bus import EventBus, Subscription, event_bus
+from settings import settings
 
 try:
-    import redis  # 선택
+    from redis.asyncio import ConnectionPool, Redis  # 선택
 except ImportError:
-    redis = None
+    ConnectionPool = Redis = None  # type: ignore
+
+logger = logging.getLogger(__name__)
 
 Status = Literal["queued", "running", "done", "error"]
 
+JOB_TTL_SEC = 3600
+
 @dataclass
 class JobState:
     status: Status = "queued"
     steps: Dict[str, str] = field(default_factory=dict)
+    partial: Dict[str, str] = field(default_factory=dict)  # 스트리밍 중인 단계의 부분 출력
+    metrics: Optional[Dict[str, Any]] = None  # 단계별 토큰/시간/대기/재시도 집계
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
     started_at: float = field(default_factory=time.time)
     finished_at: Optional[float] = None
+    result_ref: Optional[str] = None  # 결과 본문이 따로 있는 곳(메모리: 디스크로 내린 파일 경로, Redis: 결과 키)
+
+    @property
+    def has_result(self) -> bool:
+        return self.result is not None or self.result_ref is not None
+
+@dataclass
+class _MemEntry:
+    state: JobState
+    expires_at: float
+    result_bytes: int = 0
+
+# Redis 해시 필드: 스칼라/JSON 필드는 이름 그대로, 단계별 값은 step:{pid} / partial:{pid}
+#   → 단계 하나 갱신이 그 필드 HSET 하나라서 GET+SETEX 없이 원자적이고, 동시 갱신끼리 덮어쓰지 않음
+_DICT_PREFIX = {"steps": "step:", "partial": "partial:"}
+
+def _encode(changes: Dict[str, Any]) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    for k, v in changes.items():
+        if k in _DICT_PREFIX and isinstance(v, dict):
+            for sk, sv in v.items():
+                out[f"{_DICT_PREFIX[k]}{sk}"] = json.dumps(sv, ensure_ascii=False)
+        else:
+            out[k] = json.dumps(v, ensure_ascii=False, default=str)
+    return out
+
+# 조건부 갱신: 작업 해시가 없으면(만료/삭제) 아무것도 쓰지 않음 → 늦은 갱신이 죽은 작업을 되살리지 않음
+#   KEYS: 작업 해시, 결과 키 / ARGV: ttl, 채널, 이벤트, 결과 처리(keep|set|del), 결과 본문, 필드/값...
+_UPDATE_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+local ttl = tonumber(ARGV[1])
+if ARGV[4] == 'set' then
+  redis.call('SET', KEYS[2], ARGV[5], 'EX', ttl)
+elseif ARGV[4] == 'del' then
+  redis.call('DEL', KEYS[2])
+end
+if #ARGV > 5 then redis.call('HSET', KEYS[1], unpack(ARGV, 6)) end
+redis.call('EXPIRE', KEYS[1], ttl)
+redis.call('EXPIRE', KEYS[2], ttl)
+redis.call('PUBLISH', ARGV[2], ARGV[3])
+return 1
+"""
 
+def _decode(raw: Dict[Any, Any]) -> JobState:
+    st = JobState(started_at=0.0)
+    for k, v in raw.items():
+        k = k.decode("utf-8") if isinstance(k, bytes) else k
+        v = json.loads(v)
+        if k.startswith("step:"):
+            st.steps[k[5:]] = v
+        elif k.startswith("partial:"):
+            st.partial[k[8:]] = v
+        elif hasattr(st, k):
+            setattr(st, k, v)
+    return st
+
+def _event(jid: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+    """변경 알림: 결과 본문은 빼고(has_result) 나머지 변경 필드 그대로"""
+    ev: Dict[str, Any] = {"type": "update", "job_id": jid, "ts": time.time()}
+    for k, v in changes.items():
+        if k == "result":
+            ev["has_result"] = v is not None
+        else:
+            ev[k] = v
+    return ev
+
+# ──────────────────────────────────────────────────────────────
+# 작업 상태 저장소
+#   - Redis(redis.asyncio, 프로세스 공유 커넥션 풀): job:{id} 해시 + TTL, 갱신은 HSET+EXPIRE+PUBLISH 한 번
+#     (스크립트로 해시가 있을 때만). 결과 본문은 job:{id}:result 문자열 키에 따로 → 상태 조회는 해시만 읽음
+#   - 변경마다 job-events:{id} 채널에 변경 필드를 발행(이벤트 버스: 로컬 구독자 + Redis 로 다른 프로세스)
+#     → 상태 화면은 subscribe() 로 받고 폴링 불필요. 상태가 아닌 진행 이벤트(단계 시작 등)는 emit()
+#   - Redis 가 없으면 프로세스 메모리. 메모리는 상한이 있음:
+#       TTL: 쓰기마다 ttl_sec 연장(setex/expire 와 같은 의미), 읽기는 연장하지 않음
+#       개수: max_jobs 를 넘으면 만료가 가장 가까운(= 가장 오래 안 쓰인) 작업부터 제거
+#       결과 바이트: spill_min_bytes 이상 결과는 spill_dir 에 파일로 내리고 경로만 보관,
+#                    전체가 max_result_bytes 를 넘으면 오래된 결과부터 내림(spill_dir 이 없으면 버림)
+#                    메모리 상태는 재시작하면 사라지므로 생성 시 spill_dir 의 *.json 을 비움
+#                    (→ spill_dir 은 프로세스마다 따로 지정)
+#   - 동기 콜백(on_metrics 등)에서는 update_nowait
+# ──────────────────────────────────────────────────────────────
 class JobStore:
-    def __init__(self, redis_url: Optional[str] = None):
-        self._mem: Dict[str, JobState] = {}
-        self._r = redis.Redis.from_url(redis_url) if (redis_url and redis) else None
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        *,
+        ttl_sec: int = JOB_TTL_SEC,
+        max_jobs: int = 1000,
+        max_result_bytes: int = 32 * 1024 * 1024,
+        spill_dir: Optional[str] = None,
+        spill_min_bytes: int = 256 * 1024,
+        bus: Optional[EventBus] = None,
+    ):
+        self.ttl_sec = ttl_sec
+        self.bus = bus or event_bus
+        self.max_jobs = max(1, max_jobs)
+        self.max_result_bytes = max_result_bytes
+        self.spill_dir = spill_dir or None
+        self.spill_min_bytes = spill_min_bytes
+        self._clear_spill_dir()
+        self._mem: "OrderedDict[str, _MemEntry]" = OrderedDict()  # 쓰기 순 = 만료 순
+        self._result_bytes = 0
+        self.evicted = 0
+        self.spilled = 0
+        self.dropped_results = 0
+        self._pending: Set[asyncio.Future] = set()
+        self._pool = ConnectionPool.from_url(redis_url) if (redis_url and Redis) else None
+        self._r = Redis(connection_pool=self._pool) if self._pool else None
+        self._update_script = self._r.register_script(_UPDATE_LUA) if self._r else None
+
+    @staticmethod
+    def _key(jid: str) -> str:
+        return f"job:{jid}"
+
+    @staticmethod
+    def _result_key(jid: str) -> str:
+        return f"job:{jid}:result"
 
-    def new_job(self) -> str:
+    def _redis_fields(self, jid: str, changes: Dict[str, Any]):
+        """→ (해시 필드, 결과 처리 keep|set|del, 결과 본문). 결과 본문은 해시 대신 결과 키로"""
+        if "result" not in changes:
+            return _encode(changes), "keep", ""
+        rest = {k: v for k, v in changes.items() if k != "result"}
+        result = changes["result"]
+        if result is None:
+            return _encode({**rest, "result_ref": None}), "del", ""
+        raw = json.dumps(result, ensure_ascii=False, default=str)
+        return _encode({**rest, "result_ref": self._result_key(jid)}), "set", raw
+
+    @staticmethod
+    def channel(jid: str) -> str:
+        return f"job-events:{jid}"
+
+    async def new_job(self) -> str:
         jid = uuid.uuid4().hex
-        self.set(jid, JobState())
+        await self.set(jid, JobState())
         return jid
 
-    def set(self, jid: str, st: JobState) -> None:
+    async def set(self, jid: str, st: JobState) -> None:
+        changes = {
+            "status": st.status, "steps": st.steps, "partial": st.partial, "metrics": st.metrics, "result": st.result,
+            "error": st.error, "started_at": st.started_at, "finished_at": st.finished_at,
+        }
+        ev = _event(jid, changes)
         if self._r:
-            self._r.setex(f"job:{jid}", 3600, json.dumps({
-                "status": st.status, "steps": st.steps, "result": st.result,
-                "error": st.error, "started_at": st.started_at, "finished_at": st.finished_at,
-            }))
+            key, rkey = self._key(jid), self._result_key(jid)
+            fields, mode, raw = self._redis_fields(jid, changes)
+            async with self._r.pipeline(transaction=True) as p:
+                p.delete(key, rkey)
+                p.hset(key, mapping=fields)
+                p.expire(key, self.ttl_sec)
+                if mode == "set":
+                    p.set(rkey, raw, ex=self.ttl_sec)
+                p.publish(self.channel(jid), self.bus.encode(ev))
+                await p.execute()
+            self.bus.emit_local(self.channel(jid), ev)
         else:
-            self._mem[jid] = st
+            old = self._mem.pop(jid, None)
+            if old is not None:
+                self._release(old)
+            self._mem[jid] = _MemEntry(state=st, expires_at=time.monotonic() + self.ttl_sec)
+            self._account_result(jid)
+            self._prune()
+            self.bus.emit_local(self.channel(jid), ev)
 
-    def get(self, jid: str) -> Optional[JobState]:
+    async def get(self, jid: str, *, with_result: bool = True) -> Optional[JobState]:
+        """with_result=False 면 따로 둔 결과 본문(Redis 결과 키/디스크)을 읽지 않음(상태 조회용, has_result 는 그대로)"""
         if self._r:
-            raw = self._r.get(f"job:{jid}")
+            raw = await self._r.hgetall(self._key(jid))
             if not raw: return None
-            d = json.loads(raw)
-            st = JobState(
-                status=d["status"], steps=d["steps"], result=d.get("result"),
-                error=d.get("error"), started_at=d["started_at"], finished_at=d.get("finished_at"),
-            )
+            st = _decode(raw)
+            if with_result and st.result_ref:
+                body = await self._r.get(st.result_ref)
+                st.result = json.loads(body) if body is not None else None
             return st
-        return self._mem.get(jid)
+        self._prune()
+        e = self._mem.get(jid)
+        if e is None:
+            return None
+        st = e.state
+        if with_result and st.result_ref:
+            try:
+                with open(st.result_ref, "r", encoding="utf-8") as f:
+                    return replace(st, result=json.load(f))
+            except Exception as ex:
+                logger.warning(f"[job-store] spilled result unreadable ({st.result_ref}): {ex}")
+        return st
 
-    def update(self, jid: str, **kwargs) -> None:
-        st = self.get(jid);
-        if not st: return
+    async def update(self, jid: str, *, event: Optional[Dict[str, Any]] = None, **kwargs) -> None:
+        """event: 변경 알림에 덧붙일 필드(예: {"type": "step_finished", "step": "3", "elapsed_sec": 1.2})"""
+        if not kwargs: return
+        ev = {**_event(jid, kwargs), **(event or {})}
+        if self._r:
+            fields, mode, raw = self._redis_fields(jid, kwargs)
+            args = [self.ttl_sec, self.channel(jid), self.bus.encode(ev), mode, raw]
+            for k, v in fields.items():
+                args += [k, v]
+            applied = await self._update_script(keys=[self._key(jid), self._result_key(jid)], args=args)
+            if applied:
+                self.bus.emit_local(self.channel(jid), ev)
+            return
+        self._mem_update(jid, kwargs, ev)
+
+    def _mem_update(self, jid: str, kwargs: Dict[str, Any], ev: Dict[str, Any]) -> None:
+        self._prune()
+        e = self._mem.get(jid)
+        if not e: return
+        st = e.state
         for k, v in kwargs.items():
-            if k == "steps" and isinstance(v, dict):
-                st.steps.update(v)
+            if k in _DICT_PREFIX and isinstance(v, dict):
+                getattr(st, k).update(v)
             else:
                 setattr(st, k, v)
-        self.set(jid, st)
+        e.expires_at = time.monotonic() + self.ttl_sec
+        self._mem.move_to_end(jid)
+        if "result" in kwargs:
+            self._drop_spill(st)
+            self._result_bytes -= e.result_bytes
+            e.result_bytes = 0
+            self._account_result(jid)
+        self.bus.emit_local(self.channel(jid), ev)
+
+    # --- 메모리 상한 ---
+    def _prune(self) -> None:
+        now = time.monotonic()
+        while self._mem:
+            jid, e = next(iter(self._mem.items()))
+            if e.expires_at > now and len(self._mem) <= self.max_jobs:
+                break
+            self._mem.popitem(last=False)
+            self._release(e)
+            self.evicted += 1
+
+    def _release(self, e: _MemEntry) -> None:
+        self._result_bytes -= e.result_bytes
+        e.result_bytes = 0
+        self._drop_spill(e.state)
+
+    @staticmethod
+    def _drop_spill(st: JobState) -> None:
+        if st.result_ref:
+            try:
+                os.remove(st.result_ref)
+            except OSError:
+                pass
+            st.result_ref = None
+
+    def _clear_spill_dir(self) -> None:
+        """이전 프로세스가 남긴 결과 파일 정리 (가리키는 작업이 이미 없음)"""
+        if not self.spill_dir or not os.path.isdir(self.spill_dir):
+            return
+        removed = 0
+        for name in os.listdir(self.spill_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                os.remove(os.path.join(self.spill_dir, name))
+                removed += 1
+            except OSError:
+                pass
+        if removed:
+            logger.info(f"[job-store] removed {removed} stale spilled result(s) from {self.spill_dir}")
+
+    def _spill(self, jid: str, e: _MemEntry, raw: Optional[str] = None) -> bool:
+        if not self.spill_dir or e.state.result is None:
+            return False
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, f"{jid}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(raw if raw is not None else json.dumps(e.state.result, ensure_ascii=False, default=str))
+        except Exception as ex:
+            logger.warning(f"[job-store] result spill failed for {jid}: {ex}")
+            return False
+        e.state.result = None
+        e.state.result_ref = path
+        self._result_bytes -= e.result_bytes
+        e.result_bytes = 0
+        self.spilled += 1
+        return True
+
+    def _account_result(self, jid: str) -> None:
+        """새 결과 크기 반영 → 큰 결과는 바로 디스크로, 전체 상한을 넘으면 오래된 결과부터 내리거나 버림"""
+        e = self._mem[jid]
+        if e.state.result is None:
+            return
+        raw = json.dumps(e.state.result, ensure_ascii=False, default=str)
+        e.result_bytes = len(raw.encode("utf-8"))
+        self._result_bytes += e.result_bytes
+        if e.result_bytes >= self.spill_min_bytes:
+            self._spill(jid, e, raw)
+        for old_jid, old in list(self._mem.items()):
+            if self._result_bytes <= self.max_result_bytes:
+                break
+            if old.result_bytes == 0:
+                continue
+            if not self._spill(old_jid, old):
+                old.state.result = None
+                self._result_bytes -= old.result_bytes
+                old.result_bytes = 0
+                old.state.error = old.state.error or "result evicted from memory"
+                self.dropped_results += 1
+
+    def mem_stats(self) -> Dict[str, Any]:
+        return {
+            "jobs": len(self._mem),
+            "result_bytes": self._result_bytes,
+            "evicted": self.evicted,
+            "spilled": self.spilled,
+            "dropped_results": self.dropped_results,
+        }
+
+    def update_nowait(self, jid: str, *, event: Optional[Dict[str, Any]] = None, **kwargs) -> None:
+        """동기 콜백용: 메모리면 바로 반영, Redis 면 태스크로 기록(필드 단위라 순서가 바뀌어도 다른 필드를 덮지 않음)"""
+        if not self._r:
+            if kwargs:
+                self._mem_update(jid, kwargs, {**_event(jid, kwargs), **(event or {})})
+            return
+        self._spawn(self.update(jid, event=event, **kwargs))
+
+    async def emit(self, jid: str, event: Dict[str, Any]) -> None:
+        """상태에 남기지 않는 진행 이벤트(단계 시작 등)만 발행"""
+        await self.bus.publish(self.channel(jid), {"job_id": jid, "ts": time.time(), **event})
+
+    def emit_nowait(self, jid: str, event: Dict[str, Any]) -> None:
+        ev = {"job_id": jid, "ts": time.time(), **event}
+        if not self.bus.distributed:
+            self.bus.emit_local(self.channel(jid), ev)
+            return
+        self._spawn(self.bus.publish(self.channel(jid), ev))
+
+    def _spawn(self, coro) -> None:
+        fut = asyncio.ensure_future(coro)
+        self._pending.add(fut)
+        fut.add_done_callback(self._done_nowait)
+
+    def _done_nowait(self, fut: asyncio.Future) -> None:
+        self._pending.discard(fut)
+        if not fut.cancelled() and fut.exception() is not None:
+            logger.warning(f"[job-store] update failed: {fut.exception()}")
+
+    def subscribe(self, jid: str) -> Subscription:
+        """작업 변경/진행 이벤트 구독 (다 쓰면 close)"""
+        return self.bus.subscribe(self.channel(jid))
+
+    def progress_writer(self, jid: str, *, min_interval: float = 0.5, max_chars: int = 4000):
+        """
+        on_progress(step, text) 콜백 생성: 단계별 부분 출력(끝 max_chars 글자)을
+        min_interval 초 간격으로만 기록(스트림 청크마다 저장소를 두드리지 않도록)
+        """
+        last: Dict[str, float] = {}
+
+        async def _write(step: str, text: str) -> None:
+            now = time.monotonic()
+            if now - last.get(step, 0.0) < min_interval:
+                return
+            last[step] = now
+            await self.update(jid, partial={step: text[-max_chars:]}, event={"type": "partial", "step": step})
+
+        return _write
+
+    def step_event_writer(self, jid: str):
+        """on_step_event(event) 콜백 생성: 시작은 이벤트만, 종료는 steps 갱신과 함께 발행"""
+        def _write(ev: Dict[str, Any]) -> None:
+            if ev.get("type") == "step_finished":
+                self.update_nowait(jid, steps={ev["step"]: ev.get("note", "")}, event=ev)
+            else:
+                self.emit_nowait(jid, ev)
+
+        return _write
+
+    async def aclose(self) -> None:
+        if self._pool is not None:
+            try:
+                await self._pool.aclose()
+            except Exception:
+                pass
 
-job_store = JobStore(redis_url=None)  # settings.redis_url 사용 가능
+job_store = JobStore(
+    redis_url=settings.redis_url,  # content_jobs 워커(별도 프로세스)의 진행을 API 가 읽으려면 Redis 필요
+    max_jobs=settings.JOB_STORE_MAX_JOBS,
+    max_result_bytes=settings.JOB_STORE_MAX_RESULT_BYTES,
+    spill_dir=settings.JOB_STORE_SPILL_DIR,
+    spill_min_bytes=settings.JOB_STORE_SPILL_MIN_BYTES,
+)
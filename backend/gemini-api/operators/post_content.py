@@ -3,25 +3,42 @@ from __future__ import annotations
 import asyncio
 import logging
 import json
-from typing import Any, Optional, List, Dict
+import uuid
+from typing import Any, Callable, Optional, List, Dict
 
 from sqlalchemy.orm import Session
 
 import log_config
 from common.http import robust_post_form
 from services.db_service import get_db
-from services.create_article_service import CreateArticleService
-from services.content_generate_service import ContentGenerateService
+from services.prompt_repository import prompt_repository
+from services.content_generate_service import ContentGenerateService, route_model
 from models.content_request import ContentRequest, ContentMessage
 from settings import settings
+from common.retry import RetryBudget, retry_budget
+from common.rate_limit import ModelRateLimiter
+from common.metering import run_meter
+from common.checkpoint import checkpoint_store
+from common.pipeline import PipelineEngine, StepContext, StepDef, StepEventCallback
 from utils.extract_html import extract_html_from_finalized_content
+from utils.context_builder import ContextBuilder
 from utils.visual_merge import process_visual_components_from_str
 
-from common.llm import generate_text_with_retry, generate_images_with_retry
+from common.llm import (
+    generate_text_with_retry,
+    generate_images_with_retry,
+    generate_text_stream_with_retry,
+    html_stream_guard,
+)
 
 
 logger = logging.getLogger(__name__)
 
+# (단계 id, 누적 부분 출력) → None | awaitable
+ProgressCallback = Callable[[str, str], Any]
+# 단계가 끝날 때마다 현재까지의 계측 스냅샷(common.metering.RunMeter.snapshot)
+MetricsCallback = Callable[[Dict[str, Any]], Any]
+
 DEFAULT_TARGET_CHARS = 2000  # 없을 때 사용할 기본 글자 수
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -45,9 +62,11 @@ def _parse_prompt_ids(raw: str | List[int]) -> List[str]:
     return [p.strip() for p in s.split(",") if p.strip()]
 
 
-def _pick_model(req: ContentRequest, override: Optional[str]) -> Optional[str]:
-    """요청으로 들어온 llm_model이 우선, 없으면 ContentRequest.model"""
-    return override or getattr(req, "model", None)
+def _step_progress(on_progress: Optional[ProgressCallback], pid: str):
+    """on_progress(step, text) → 스트림 on_chunk(text) 어댑터"""
+    if on_progress is None:
+        return None
+    return lambda text: on_progress(pid, text)
 
 
 def parse_gemini_json_response(response_text: str):
@@ -93,6 +112,226 @@ def parse_gemini_json_response(response_text: str):
         return None
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# 단계 정의: pipelines.prompt_array 의 프롬프트 id → StepDef
+#   11 → 12 → 13 → 14 → 15 → 16 → 17 → 18 (각 단계가 직전 단계 출력을 히스토리로 사용하는 체인)
+# ──────────────────────────────────────────────────────────────────────────────
+async def _chain_text(ctx: StepContext, prev_pid: str, prev_output: str, formatted_prompt: str) -> str:
+    """[이전 단계 템플릿, 이전 단계 출력, 이번 지시문] 히스토리로 텍스트 생성 (12~17 공통)"""
+    contents = [
+        ContentMessage(role="user", parts=[ctx.templates.get(prev_pid)]),
+        ContentMessage(role="model", parts=[prev_output]),
+        ContentMessage(role="user", parts=[formatted_prompt]),
+    ]
+
+    built = await ctx.get("context_builder").build(contents, step=ctx.pid, protect_prefix=1)
+
+    req = ContentRequest(content=built.messages)
+    model = route_model(ctx.model(req.model))
+    # 첫 user 턴(이전 단계의 원본 템플릿)은 토픽과 무관 → 컨텍스트 캐시로 보냄 (12~18 공통)
+    return await generate_text_with_retry(
+        ctx.get("service"), model, req.content, step=ctx.pid, cache_prefix=1
+    )
+
+
+async def _step_topic_analysis(ctx: StepContext) -> Dict[str, Any]:
+    # 1) 토픽 이해 및 독자 분석
+    # Prompt1 Content Parameter 생성
+    formatted_step_1_prompt = ctx.tmpl.format(topic=ctx.get("topic"))
+    print(f"formatted step_1_prompt: {formatted_step_1_prompt}")
+    logger.info(f"step_1_prompt: {formatted_step_1_prompt}")
+    contents_step1 = [
+        ContentMessage(role="user", parts=[formatted_step_1_prompt])
+    ]
+    print(f"contents_step1: {contents_step1}")
+    req = ContentRequest(content=contents_step1)
+    model = route_model(ctx.model(req.model))
+    generated_content = await generate_text_with_retry(
+        ctx.get("service"), model, req, step=ctx.pid
+    )
+    ctx.note = f"generated_content_len={len(generated_content)}"
+
+    out: Dict[str, Any] = {"generated_content": generated_content}
+    parsed_json_data = parse_gemini_json_response(generated_content)
+    if parsed_json_data:
+        # 파싱된 데이터를 변수에 담기
+        topic_analysis = parsed_json_data.get("topic_analysis")
+
+        if topic_analysis:
+            target_audience_info = topic_analysis.get("target_audience")
+            key_questions_list = topic_analysis.get("key_questions")
+            out["categories"] = topic_analysis.get("categories", [])
+            out["tags"] = topic_analysis.get("tags", [])
+            out["title"] = topic_analysis.get("title")
+
+            if target_audience_info:
+                out["audience_type"] = target_audience_info.get("type")
+                audience_description = target_audience_info.get("description")
+                tone = target_audience_info.get("tone_and_depth", {}).get("tone")
+                depth = target_audience_info.get("tone_and_depth", {}).get("depth")
+
+                print(f"가정된 독자층 유형: {out['audience_type']}")
+                print(f"독자층 설명: {audience_description}")
+                print(f"포스팅 톤: {tone}, 깊이: {depth}")
+
+            if key_questions_list:
+                print("\n독자의 핵심 질문:")
+                for i, q in enumerate(key_questions_list):
+                    print(f"{i + 1}. {q}")
+
+            if out["categories"]:
+                print(f"categories: {out['categories']}")
+            if out["tags"]:
+                print(f"tags: {out['tags']}")
+
+        else:
+            print("parsed_json_data에 'topic_analysis' 키가 없습니다.")
+    return out
+
+
+async def _step_point_message(ctx: StepContext) -> Dict[str, Any]:
+    # 2) 핵심 주장 / 메시지 뽑기
+    generated_content = ctx.require("generated_content")
+    formatted_step_2_prompt = ctx.tmpl.format(previous_step_output=generated_content)
+    point_message = await _chain_text(ctx, "11", generated_content, formatted_step_2_prompt)
+    ctx.note = f"point_message_len={len(point_message)}"
+    logger.info(f"point_message: {point_message}")
+    return {"point_message": point_message}
+
+
+async def _step_story_telling(ctx: StepContext) -> Dict[str, Any]:
+    # 3) 스토리텔링 구조 설계
+    point_message = ctx.require("point_message")
+    formatted_step_3_prompt = ctx.tmpl.format(previous_step_output=point_message)
+    story_telling = await _chain_text(ctx, "12", point_message, formatted_step_3_prompt)
+    ctx.note = f"story_telling_len={len(story_telling)}"
+    logger.info(f"story_telling: {story_telling}")
+    return {"story_telling": story_telling}
+
+
+async def _step_fact_draft(ctx: StepContext) -> Dict[str, Any]:
+    # 4) 팩트 기반 초안 작성 (with Fact-check Requests)
+    story_telling = ctx.require("story_telling")
+    formatted_step_4_prompt = ctx.tmpl.format(tc=ctx.get("target_chars"), previous_step_output=story_telling)
+    logger.info(f"formatted_step_4_prompt: {formatted_step_4_prompt}")
+    fact_checked_text = await _chain_text(ctx, "13", story_telling, formatted_step_4_prompt)
+    ctx.note = f"fact_checked_text_len={len(fact_checked_text)}"
+    logger.info(f"fact_checked_text: {fact_checked_text}")
+    return {"fact_checked_text": fact_checked_text}
+
+
+async def _step_references(ctx: StepContext) -> Dict[str, Any]:
+    # 5) 팩트체크 & 출처 자동 삽입
+    fact_checked_text = ctx.require("fact_checked_text")
+    formatted_step_5_prompt = ctx.tmpl.format(previous_step_output=fact_checked_text)
+    logger.info(f"formatted_step_5_prompt: {formatted_step_5_prompt}")
+    fact_checked_text_with_ref = await _chain_text(ctx, "14", fact_checked_text, formatted_step_5_prompt)
+    ctx.note = f"fact_checked_text_with_ref_len={len(fact_checked_text_with_ref)}"
+    logger.info(f"fact_checked_text_with_ref: {fact_checked_text_with_ref}")
+    return {"fact_checked_text_with_ref": fact_checked_text_with_ref}
+
+
+async def _step_tune(ctx: StepContext) -> Dict[str, Any]:
+    # 6) 가독성 & 톤 조정 (독자 맞춤)
+    fact_checked_text_with_ref = ctx.require("fact_checked_text_with_ref")
+    formatted_step_6_prompt = ctx.tmpl.format(
+        audience_type=ctx.get("audience_type"), previous_step_output=fact_checked_text_with_ref
+    )
+    logger.info(f"formatted_step_6_prompt: {formatted_step_6_prompt}")
+    tuned_text = await _chain_text(ctx, "15", fact_checked_text_with_ref, formatted_step_6_prompt)
+    ctx.note = f"tuned_text_len={len(tuned_text)}"
+    logger.info(f"tuned_text: {tuned_text}")
+    return {"tuned_text": tuned_text}
+
+
+async def _step_visuals(ctx: StepContext) -> Dict[str, Any]:
+    # 7) 시각화 요소 설계 (텍스트+이미지)
+    tuned_text = ctx.require("tuned_text")
+    formatted_step_7_prompt = ctx.tmpl.format(n=ctx.get("visual_component_count"), previous_step_output=tuned_text)
+    logger.info(f"formatted_step_7_prompt: {formatted_step_7_prompt}")
+    visual_components = await _chain_text(ctx, "16", tuned_text, formatted_step_7_prompt)
+    logger.info(f"visual_components: {visual_components}")
+
+    upload_url = f"{settings.wordpress_base}/posts/upload-image/"
+
+    visual_aids_result, first_id = await process_visual_components_from_str(
+        raw_json=visual_components,
+        content_generate_service=ctx.get("service"),
+        upload_url=upload_url,
+        use_first_image_only=False
+    )
+    ctx.note = f"visual_aids_result_len={len(visual_aids_result)}"
+    logger.info(f"visual_aids_result: {visual_aids_result} / first_id: {first_id}")
+    return {"visual_aids_result": visual_aids_result, "first_id": first_id}
+
+
+async def _step_design_publish(ctx: StepContext) -> Dict[str, Any]:
+    # 8) HTML 변환 + 디자인 가이드 → 포스팅
+    visual_aids_result = ctx.require("visual_aids_result")
+    tuned_text = ctx.get("tuned_text")
+    formatted_step_8_prompt = ctx.tmpl.format(previous_step_output_6=tuned_text, previous_step_output_7=visual_aids_result)
+    logger.info(f"formatted_step_8_prompt: {formatted_step_8_prompt}")
+    contents_step8 = [
+        ContentMessage(role="user", parts=[ctx.templates.get("16")]),
+        ContentMessage(role="model", parts=[tuned_text]),
+        ContentMessage(role="user", parts=[ctx.templates.get("17")]),
+        ContentMessage(role="model", parts=[json.dumps(visual_aids_result, ensure_ascii=False)]),
+        ContentMessage(role="user", parts=[formatted_step_8_prompt]),
+    ]
+
+    built = await ctx.get("context_builder").build(contents_step8, step=ctx.pid, protect_prefix=1)
+
+    req = ContentRequest(content=built.messages)
+    model = route_model(ctx.model(req.model))
+    designed_text = await generate_text_stream_with_retry(
+        ctx.get("service"), model, req.content,
+        on_chunk=_step_progress(ctx.get("on_progress"), ctx.pid),
+        guard=html_stream_guard,
+        cache_prefix=1,
+    )
+    logger.info(f"designed_text: {designed_text}")
+
+    # upload_content = extract_html_from_finalized_content(designed_text)
+    # if upload_content is None:
+    #     raise ValueError("HTML 코드 블록을 찾지 못했습니다.")
+
+    post_data = {
+        "title": ctx.get("title"),
+        "content": designed_text,
+        "categories": ctx.get("categories") or [],
+        "tags": ctx.get("tags") or [],
+        "image_id": ctx.get("first_id"),
+    }
+    create_url = f"{settings.wordpress_base}/posts/create-post/"
+    await ctx.publish_gate()
+    post_resp = await robust_post_form(create_url, post_data)
+    ctx.note = "post_done"
+    return {"designed_text": designed_text, "post_resp": post_resp}
+
+
+POST_STEPS: List[StepDef] = [
+    StepDef("11", "text", _step_topic_analysis,
+            outputs=("generated_content", "audience_type", "categories", "tags", "title"),
+            description="토픽 이해 및 독자 분석"),
+    StepDef("12", "text", _step_point_message, inputs=("generated_content",), outputs=("point_message",),
+            description="핵심 주장 / 메시지"),
+    StepDef("13", "text", _step_story_telling, inputs=("point_message",), outputs=("story_telling",),
+            description="스토리텔링 구조 설계"),
+    StepDef("14", "text", _step_fact_draft, inputs=("story_telling",), outputs=("fact_checked_text",),
+            description="팩트 기반 초안"),
+    StepDef("15", "text", _step_references, inputs=("fact_checked_text",), outputs=("fact_checked_text_with_ref",),
+            description="팩트체크 & 출처 삽입"),
+    StepDef("16", "text", _step_tune, inputs=("fact_checked_text_with_ref", "audience_type"),
+            outputs=("tuned_text",), description="가독성 & 톤 조정"),
+    StepDef("17", "image", _step_visuals, inputs=("tuned_text",), outputs=("visual_aids_result", "first_id"),
+            description="시각화 요소 설계 + 이미지 생성/업로드"),
+    StepDef("18", "publish", _step_design_publish,
+            inputs=("tuned_text", "visual_aids_result", "first_id", "title", "categories", "tags"),
+            outputs=("designed_text", "post_resp"), description="HTML 변환 + 포스팅"),
+]
+POST_PIPELINE = PipelineEngine(POST_STEPS)
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # 단일 진입점: FastAPI/CLI 공용
 # ──────────────────────────────────────────────────────────────────────────────
@@ -104,311 +343,60 @@ async def run_post_content_with_db(
     llm_model: Optional[str] = None,
     pipeline_id: int = 2,
     target_chars: Optional[int] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    content_generate_service: Optional[Any] = None,
+    budget: Optional[RetryBudget] = None,
+    on_metrics: Optional[MetricsCallback] = None,
+    run_id: Optional[str] = None,
+    resume: bool = False,
+    publish_limiter: Optional[ModelRateLimiter] = None,
+    on_step_event: Optional[StepEventCallback] = None,
 ) -> Dict[str, Any]:
-    create_article_service = CreateArticleService()
-    content_generate_service = ContentGenerateService()
-
-    pipeline = create_article_service.fetch_pipeline(db, pipeline_id)
-    prompt_ids = _parse_prompt_ids(pipeline.prompt_array)
-
-    step_1_prompt: Optional[str] = None
-    step_2_prompt: Optional[str] = None
-    step_3_prompt: Optional[str] = None
-    step_4_prompt: Optional[str] = None
-    step_5_prompt: Optional[str] = None
-    step_6_prompt: Optional[str] = None
-    step_7_prompt: Optional[str] = None
-    step_8_prompt: Optional[str] = None
-    step_9_prompt: Optional[str] = None
-    step_10_prompt: Optional[str] = None
-
-    audience_type: Optional[str] = None
-
-    generated_content: Optional[str] = None
-    point_message: Optional[str] = None
-    story_telling: Optional[str] = None
-    fact_checked_text: Optional[str] = None
-    fact_checked_text_with_ref: Optional[str] = None
-    tuned_text: Optional[str] = None
-    visual_aids_result: Optional[str] = None
-    designed_text: Optional[str] = None
-    optimized_text: Optional[str] = None
-
-    categories: List[str] = []
-    tags: List[str] = []
-
-    title: Optional[str] = None
-
-    first_id: Optional[int] = None
+    """
+    content_generate_service: 생성 서비스 주입(기본 ContentGenerateService, 배치 모드면 BatchGenerateService)
+    budget: 실행 재시도 예산(기본은 settings 값. 배치 모드는 마감 없이)
+    on_metrics: 단계 종료마다 단계별 토큰/시간/대기/재시도 집계를 전달
+    run_id/resume: 단계 출력은 run_id 로 체크포인트됨. 실패한 실행을 같은 run_id, 같은 파라미터로
+                   resume=True 재실행하면 완료된 단계는 건너뛰고 첫 미완료 단계부터 실행
+    publish_limiter: 여러 실행이 공유하는 WordPress 포스팅 속도 제한(rpm 버킷)
+    on_step_event: 단계 시작/종료(상태, 소요 시간) 이벤트
+    """
+    run_id = run_id or uuid.uuid4().hex
+    content_generate_service = content_generate_service or ContentGenerateService()
 
-    uploaded_results: List[dict] = []
+    # 파이프라인 1회 + 프롬프트 IN 1회(캐시 hit 면 0회), async 세션이라 이벤트 루프를 막지 않음
+    pipeline = await prompt_repository.get_pipeline(pipeline_id)
+    plan = POST_PIPELINE.plan(_parse_prompt_ids(pipeline.prompt_array))
+    templates = await prompt_repository.get_prompts(s.pid for s in plan.steps)
 
-    post_resp: Optional[Dict[str, Any]] = None
+    state: Dict[str, Any] = {
+        "topic": topic,
+        "visual_component_count": visual_component_count,
+        "target_chars": target_chars or DEFAULT_TARGET_CHARS,
+        "llm_model": llm_model,
+        "service": content_generate_service,
+        "on_progress": on_progress,
+        "publish_limiter": publish_limiter,
+        # 단계별 히스토리: 중복 제거 + 토큰 예산 초과 시 오래된 턴 요약/절단 (템플릿 턴은 컨텍스트 캐시용으로 보존)
+        "context_builder": ContextBuilder(content_generate_service),
+    }
     step_log: Dict[str, str] = {}
 
-    tc = target_chars or DEFAULT_TARGET_CHARS
-
-    for pid in prompt_ids:
-        prompt_obj = create_article_service.fetch_prompt(db, int(pid))
-        tmpl = prompt_obj.prompt
-
-        try:
-            if pid == "11":
-                step_1_prompt = tmpl
-                # 1) 토픽 이해 및 독자 분석
-                # Prompt1 Content Parameter 생성
-                formatted_step_1_prompt = step_1_prompt.format(topic=topic)
-                print(f"formatted step_1_prompt: {formatted_step_1_prompt}")
-                logger.info(f"step_1_prompt: {formatted_step_1_prompt}")
-                contents_step1 = [
-                    ContentMessage(role="user", parts=[formatted_step_1_prompt])
-                ]
-                print(f"contents_step1: {contents_step1}")
-                req = ContentRequest(content=contents_step1)
-                model = _pick_model(req, llm_model)
-                if not model:
-                    raise RuntimeError("No LLM model specified for step 1")
-                generated_content = await generate_text_with_retry(
-                    content_generate_service, model, req
-                )
-
-                parsed_json_data = parse_gemini_json_response(generated_content)
-                if parsed_json_data:
-                    # 파싱된 데이터를 변수에 담기
-                    topic_analysis = parsed_json_data.get("topic_analysis")
-
-                    if topic_analysis:
-                        target_audience_info = topic_analysis.get("target_audience")
-                        key_questions_list = topic_analysis.get("key_questions")
-                        categories = topic_analysis.get("categories", [])
-                        tags = topic_analysis.get("tags", [])
-                        title = topic_analysis.get("title")
-
-                        if target_audience_info:
-                            audience_type = target_audience_info.get("type")
-                            audience_description = target_audience_info.get("description")
-                            tone = target_audience_info.get("tone_and_depth", {}).get("tone")
-                            depth = target_audience_info.get("tone_and_depth", {}).get("depth")
-
-                            print(f"가정된 독자층 유형: {audience_type}")
-                            print(f"독자층 설명: {audience_description}")
-                            print(f"포스팅 톤: {tone}, 깊이: {depth}")
-
-                        if key_questions_list:
-                            print("\n독자의 핵심 질문:")
-                            for i, q in enumerate(key_questions_list):
-                                print(f"{i + 1}. {q}")
-
-                        if categories:
-                            print(f"categories: {categories}")
-                        if tags:
-                            print(f"tags: {tags}")
-
-                    else:
-                        print("parsed_json_data에 'topic_analysis' 키가 없습니다.")
-
-            elif pid == "12":
-                step_2_prompt = tmpl
-                # 2) 핵심 주장 / 메시지 뽑기
-                if not generated_content:
-                    raise RuntimeError("generated_content is empty")
-                # Prompt2 Content Parameter 생성
-                formatted_step_2_prompt = step_2_prompt.format(previous_step_output=generated_content)
-                contents_step2 = [
-                    ContentMessage(role="user", parts=[step_1_prompt]),
-                    ContentMessage(role="model", parts=[generated_content]),
-                    ContentMessage(role="user", parts=[formatted_step_2_prompt]),
-                ]
-
-                req = ContentRequest(content=contents_step2)
-                model = _pick_model(req, llm_model)
-                if not model:
-                    raise RuntimeError("No LLM model specified for step 2")
-                point_message = await generate_text_with_retry(
-                    content_generate_service, model, req.content
-                )
-                step_log[pid] = f"point_message_len={len(point_message)}"
-                logger.info(f"point_message: {point_message}")
-
-            elif pid == "13":
-                step_3_prompt = tmpl
-                # 3) 스토리텔링 구조 설계
-                if not point_message:
-                    raise RuntimeError("point_message is empty")
-                # Prompt3 Content Parameter 생성
-                formatted_step_3_prompt = step_3_prompt.format(previous_step_output=point_message)
-                contents_step3 = [
-                    ContentMessage(role="user", parts=[step_2_prompt]),
-                    ContentMessage(role="model", parts=[point_message]),
-                    ContentMessage(role="user", parts=[formatted_step_3_prompt]),
-                ]
-
-                req = ContentRequest(content=contents_step3)
-                model = _pick_model(req, llm_model)
-                if not model:
-                    raise RuntimeError("No LLM model specified for step 3")
-                story_telling = await generate_text_with_retry(
-                    content_generate_service, model, req.content
-                )
-                step_log[pid] = f"story_telling_len={len(story_telling)}"
-                logger.info(f"story_telling: {story_telling}")
-
-            elif pid == "14":
-                step_4_prompt = tmpl
-                # 4) 팩트 기반 초안 작성 (with Fact-check Requests)
-                if not story_telling:
-                    raise RuntimeError("story_telling is empty")
-                # Prompt4 Content Parameter 생성
-                formatted_step_4_prompt = step_4_prompt.format(tc=tc, previous_step_output=story_telling)
-                logger.info(f"formatted_step_4_prompt: {formatted_step_4_prompt}")
-                contents_step4 = [
-                    ContentMessage(role="user", parts=[step_3_prompt]),
-                    ContentMessage(role="model", parts=[story_telling]),
-                    ContentMessage(role="user", parts=[formatted_step_4_prompt]),
-                ]
-
-                req = ContentRequest(content=contents_step4)
-                model = _pick_model(req, llm_model)
-                if not model:
-                    raise RuntimeError("No LLM model specified for step 4")
-                fact_checked_text = await generate_text_with_retry(
-                    content_generate_service, model, req.content
-                )
-                step_log[pid] = f"fact_checked_text_len={len(fact_checked_text)}"
-                logger.info(f"fact_checked_text: {fact_checked_text}")
-
-            elif pid == "15":
-                step_5_prompt = tmpl
-                # 5) 팩트체크 & 출처 자동 삽입
-                if not fact_checked_text:
-                    raise RuntimeError("fact_checked_text is empty")
-                # Prompt5 Content Parameter 생성
-                formatted_step_5_prompt = step_5_prompt.format(previous_step_output=fact_checked_text)
-                logger.info(f"formatted_step_5_prompt: {formatted_step_5_prompt}")
-                contents_step5 = [
-                    ContentMessage(role="user", parts=[step_4_prompt]),
-                    ContentMessage(role="model", parts=[fact_checked_text]),
-                    ContentMessage(role="user", parts=[formatted_step_5_prompt]),
-                ]
-
-                req = ContentRequest(content=contents_step5)
-                model = _pick_model(req, llm_model)
-                if not model:
-                    raise RuntimeError("No LLM model specified for step 5")
-                fact_checked_text_with_ref = await generate_text_with_retry(
-                    content_generate_service, model, req.content
-                )
-                step_log[pid] = f"fact_checked_text_with_ref_len={len(fact_checked_text_with_ref)}"
-                logger.info(f"fact_checked_text_with_ref: {fact_checked_text_with_ref}")
-
-            elif pid == "16":
-                step_6_prompt = tmpl
-                # 6) 가독성 & 톤 조정 (독자 맞춤)
-                if not fact_checked_text_with_ref:
-                    raise RuntimeError("fact_checked_text_with_ref is empty")
-                # Prompt6 Content Parameter 생성
-                formatted_step_6_prompt = step_6_prompt.format(audience_type=audience_type, previous_step_output=fact_checked_text_with_ref)
-                logger.info(f"formatted_step_6_prompt: {formatted_step_6_prompt}")
-                contents_step6 = [
-                    ContentMessage(role="user", parts=[step_5_prompt]),
-                    ContentMessage(role="model", parts=[fact_checked_text_with_ref]),
-                    ContentMessage(role="user", parts=[formatted_step_6_prompt]),
-                ]
-
-                req = ContentRequest(content=contents_step6)
-                model = _pick_model(req, llm_model)
-                if not model:
-                    raise RuntimeError("No LLM model specified for step 6")
-                tuned_text = await generate_text_with_retry(
-                    content_generate_service, model, req.content
-                )
-                step_log[pid] = f"tuned_text_len={len(tuned_text)}"
-                logger.info(f"tuned_text: {tuned_text}")
-
-            elif pid == "17":
-                step_7_prompt = tmpl
-                # 7) 시각화 요소 설계 (텍스트+이미지)
-                if not tuned_text:
-                    raise RuntimeError("tuned_text is empty")
-                # Prompt7 Content Parameter 생성
-                formatted_step_7_prompt = step_7_prompt.format(n=visual_component_count, previous_step_output=tuned_text)
-                logger.info(f"formatted_step_6_prompt: {formatted_step_7_prompt}")
-                contents_step7 = [
-                    ContentMessage(role="user", parts=[step_6_prompt]),
-                    ContentMessage(role="model", parts=[tuned_text]),
-                    ContentMessage(role="user", parts=[formatted_step_7_prompt]),
-                ]
-
-                req = ContentRequest(content=contents_step7)
-                model = _pick_model(req, llm_model)
-                if not model:
-                    raise RuntimeError("No LLM model specified for step 7")
-                visual_components = await generate_text_with_retry(
-                    content_generate_service, model, req.content
-                )
-                step_log[pid] = f"visual_components_len={len(visual_components)}"
-                logger.info(f"visual_components: {visual_components}")
-
-                upload_url = f"{settings.wordpress_base}/posts/upload-image/"
-
-                visual_aids_result, first_id = await process_visual_components_from_str(
-                    raw_json=visual_components,
-                    content_generate_service=content_generate_service,
-                    upload_url=upload_url,
-                    use_first_image_only=False
-                )
-                step_log[pid] = f"visual_aids_result_len={len(visual_aids_result)}"
-                logger.info(f"visual_aids_result: {visual_aids_result} / first_id: {first_id}")
-
-            elif pid == "18":
-                step_8_prompt = tmpl
-                # 8) HTML 변환 + 디자인 가이드
-                if not visual_aids_result:
-                    raise RuntimeError("visual_aids_result is empty")
-                # Prompt8 Content Parameter 생성
-                formatted_step_8_prompt = step_8_prompt.format(previous_step_output_6=tuned_text, previous_step_output_7=visual_aids_result)
-                logger.info(f"formatted_step_8_prompt: {formatted_step_8_prompt}")
-                contents_step8 = [
-                    ContentMessage(role="user", parts=[step_6_prompt]),
-                    ContentMessage(role="model", parts=[tuned_text]),
-                    ContentMessage(role="user", parts=[step_7_prompt]),
-                    ContentMessage(role="model", parts=[json.dumps(visual_aids_result, ensure_ascii=False)]),
-                    ContentMessage(role="user", parts=[formatted_step_8_prompt]),
-                ]
-
-                req = ContentRequest(content=contents_step8)
-                model = _pick_model(req, llm_model)
-                if not model:
-                    raise RuntimeError("No LLM model specified for step 8")
-                designed_text = await generate_text_with_retry(
-                    content_generate_service, model, req.content
-                )
-                step_log[pid] = f"designed_text_len={len(designed_text)}"
-                logger.info(f"designed_text: {designed_text}")
-
-                # upload_content = extract_html_from_finalized_content(designed_text)
-                # if upload_content is None:
-                #     raise ValueError("HTML 코드 블록을 찾지 못했습니다.")
-
-                post_data = {
-                    "title": title,
-                    "content": designed_text,
-                    "categories": categories,
-                    "tags": tags,
-                    "image_id": first_id,
-                }
-                create_url = f"{settings.wordpress_base}/posts/create-post/"
-                post_resp = await robust_post_form(create_url, post_data)
-                step_log[pid] = "post_done"
-
-            else:
-                step_log[pid] = "unknown_step_skipped"
-
-        except Exception as e:
-            logger.exception("[step %s] failed: %s", pid, e)
-            step_log[pid] = f"error:{e}"
-            # 필요시 raise로 전체 중단하도록 변경 가능
+    # 실행 전체(모든 단계/계층)의 외부 호출 횟수·마감 시간 상한 + 단계별 계측
+    with retry_budget(budget) as budget, run_meter() as meter:
+        await POST_PIPELINE.run(
+            plan,
+            templates=templates,
+            state=state,
+            step_log=step_log,
+            on_step_done=(lambda _pid: on_metrics(meter.snapshot())) if on_metrics is not None else None,
+            on_step_event=on_step_event,
+            checkpoints=checkpoint_store if settings.CHECKPOINT_ENABLED else None,
+            run_id=run_id,
+            resume=resume,
+        )
 
+    post_resp = state.get("post_resp")
     safe_post_summary = None
     if isinstance(post_resp, dict):
         safe_post_summary = {
@@ -416,14 +404,17 @@ async def run_post_content_with_db(
         }
 
     return {
+        "run_id": run_id,
         "pipeline_id": pipeline_id,
         "topic": topic,
         "visual_component_count": visual_component_count,
         "llm_model": llm_model,
         "steps": step_log,
-        "tags": tags,
-        "categories": categories,
-        "uploaded_images": len(uploaded_results),
+        "retry_budget": budget.snapshot(),
+        "metrics": meter.snapshot(),
+        "tags": state.get("tags") or [],
+        "categories": state.get("categories") or [],
+        "uploaded_images": 0,
         "post": safe_post_summary,
     }
 
@@ -456,6 +447,8 @@ if __name__ == "__main__":
     parser.add_argument("--llm-model", type=str, default=None)
     parser.add_argument("--pipeline-id", type=int, default=2)
     parser.add_argument("--target-chars", type=int, default=None)
+    parser.add_argument("--run-id", type=str, default=None)
+    parser.add_argument("--resume", action="store_true")
     args = parser.parse_args()
 
     asyncio.run(
@@ -466,5 +459,7 @@ if __name__ == "__main__":
             llm_model=args.llm_model,
             pipeline_id=args.pipeline_id,
             target_chars=args.target_chars,
+            run_id=args.run_id,
+            resume=args.resume,
         )
     )
\ No newline at end of file
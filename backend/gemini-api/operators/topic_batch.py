@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from common.rate_limit import ModelRateLimiter
+from operators.init_content import run_init_content_with_db
+from operators.post_content import run_post_content_with_db
+from services.bounded_generate_service import BoundedGenerateService
+from services.content_generate_service import ContentGenerateService
+from services.db_service import get_db
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 배치 진행 이벤트 (dict) → None | awaitable
+EventCallback = Callable[[Dict[str, Any]], Any]
+
+# kind → (실행 함수, 기본 pipeline_id, 받는 옵션)
+RUNNERS = {
+    "init": (run_init_content_with_db, 1, ("photo_count", "llm_model", "pipeline_id", "target_chars")),
+    "post": (run_post_content_with_db, 2, ("visual_component_count", "llm_model", "pipeline_id", "target_chars")),
+}
+
+# _emit_nowait 가 띄운 콜백 태스크 참조 유지 (참조가 없으면 끝나기 전에 GC 될 수 있음)
+_pending_emits: Set[asyncio.Future] = set()
+
+
+async def _emit(on_event: Optional[EventCallback], event: Dict[str, Any]) -> None:
+    if on_event is None:
+        return
+    try:
+        res = on_event(event)
+        if inspect.isawaitable(res):
+            await res
+    except Exception as e:
+        logger.warning(f"[topic-batch] event callback failed: {e}")
+
+
+def _emit_nowait(on_event: Optional[EventCallback], event: Dict[str, Any]) -> None:
+    """동기 콜백 경로(on_metrics)용: 비동기 콜백이면 태스크로 넘겨 단계 진행을 막지 않음"""
+    if on_event is None:
+        return
+    try:
+        res = on_event(event)
+        if inspect.isawaitable(res):
+            fut = asyncio.ensure_future(res)
+            _pending_emits.add(fut)
+            fut.add_done_callback(_pending_emits.discard)
+    except Exception as e:
+        logger.warning(f"[topic-batch] event callback failed: {e}")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 여러 토픽을 한 인스턴스에서 공유 예산으로 실행
+#   - 동시 기사 수: max_parallel (세마포어)
+#   - LLM 동시 호출: llm_concurrency (모든 토픽이 같은 BoundedGenerateService 공유)
+#   - WordPress 포스팅 속도: publish_per_min (모든 토픽이 같은 rpm 버킷 공유)
+#   - 토픽별 진행(시작/단계 시작·종료/단계 계측/스트림 글자 수/종료)을 on_event 로, 마지막에 집계 반환
+# ──────────────────────────────────────────────────────────────────────────────
+async def run_topics_batch(
+    *,
+    topics: List[str],
+    kind: str = "init",
+    options: Optional[Dict[str, Any]] = None,
+    max_parallel: Optional[int] = None,
+    llm_concurrency: Optional[int] = None,
+    publish_per_min: Optional[int] = None,
+    on_event: Optional[EventCallback] = None,
+    progress_interval_sec: float = 1.0,
+) -> Dict[str, Any]:
+    """
+    kind: init | post
+    options: 실행 함수에 그대로 넘길 파이프라인 옵션(photo_count, visual_component_count, llm_model,
+             pipeline_id, target_chars)
+    """
+    if kind not in RUNNERS:
+        raise ValueError(f"unknown kind: {kind}")
+    runner, default_pipeline, accepted = RUNNERS[kind]
+    opts = {k: v for k, v in (options or {}).items() if v is not None and k in accepted}
+    opts.setdefault("pipeline_id", default_pipeline)
+
+    parallel = asyncio.Semaphore(max(1, max_parallel or settings.BATCH_RUN_MAX_PARALLEL))
+    service = BoundedGenerateService(ContentGenerateService(), llm_concurrency or settings.BATCH_RUN_LLM_CONCURRENCY)
+    publish_limiter = ModelRateLimiter(
+        "wordpress-publish", rpm=publish_per_min or settings.BATCH_RUN_PUBLISH_PER_MIN, tpm=0
+    )
+    started = time.monotonic()
+
+    async def run_one(idx: int, topic: str) -> Dict[str, Any]:
+        async with parallel:
+            t0 = time.monotonic()
+            await _emit(on_event, {"type": "topic_started", "index": idx, "topic": topic})
+            last_progress: Dict[str, float] = {}
+
+            async def on_progress(step: str, text: str) -> None:
+                now = time.monotonic()
+                if now - last_progress.get(step, 0.0) < progress_interval_sec:
+                    return
+                last_progress[step] = now
+                await _emit(on_event, {"type": "progress", "index": idx, "step": step, "chars": len(text)})
+
+            def on_metrics(m: Dict[str, Any]) -> None:
+                _emit_nowait(on_event, {"type": "metrics", "index": idx, "metrics": m})
+
+            def on_step_event(ev: Dict[str, Any]) -> None:
+                _emit_nowait(on_event, {**ev, "index": idx})
+
+            db_gen = get_db()
+            db = next(db_gen)
+            try:
+                result = await runner(
+                    db,
+                    topic=topic,
+                    on_progress=on_progress,
+                    on_metrics=on_metrics,
+                    on_step_event=on_step_event,
+                    content_generate_service=service,
+                    publish_limiter=publish_limiter,
+                    **opts,
+                )
+                out = {"index": idx, "topic": topic, "status": "ok", "elapsed_sec": round(time.monotonic() - t0, 2), "result": result}
+            except Exception as e:
+                logger.exception("[topic-batch] topic %s failed", idx)
+                out = {"index": idx, "topic": topic, "status": "error", "elapsed_sec": round(time.monotonic() - t0, 2), "error": str(e)}
+            finally:
+                try:
+                    next(db_gen)
+                except StopIteration:
+                    pass
+            await _emit(on_event, {
+                "type": "topic_done", "index": idx, "topic": topic, "status": out["status"],
+                "elapsed_sec": out["elapsed_sec"], "steps": (out.get("result") or {}).get("steps"),
+                "post": (out.get("result") or {}).get("post"), "error": out.get("error"),
+            })
+            return out
+
+    results = await asyncio.gather(*(run_one(i, t) for i, t in enumerate(topics)))
+
+    def _posted(r: Dict[str, Any]) -> bool:
+        return r["status"] == "ok" and bool((r.get("result") or {}).get("post"))
+
+    summary = {
+        "kind": kind,
+        "topics": len(topics),
+        "ok": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] == "error"),
+        "posted": sum(1 for r in results if _posted(r)),
+        "elapsed_sec": round(time.monotonic() - started, 2),
+        "llm": service.stats(),
+        "publish": publish_limiter.snapshot(),
+        "results": results,
+    }
+    await _emit(on_event, {"type": "batch_done", **{k: v for k, v in summary.items() if k != "results"}})
+    return summary
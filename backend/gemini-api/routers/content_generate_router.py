@@ -1,5 +1,7 @@
 from fastapi import APIRouter
-from services.content_generate_service import ContentGenerateService
+from services.content_generate_service import ContentGenerateService, limiter_stats, rate_limit_stats, cache_stats, breaker_stats, hedge_stats, context_cache_stats
+from common.image_optimize import image_optimize_stats
+from services.image_library_service import image_library
 from models.content_request import ContentRequest
 from models.content_response import ContentResponse
 
@@ -22,4 +24,19 @@ async def generate_image(request: ContentRequest):
     result = await gen_service.generate_image(image_model=request.image_model, contents=request.content) 
     return ContentResponse(
         body="Image generated."
-    )
\ No newline at end of file
+    )
+
+@router.get("/limits")
+async def get_limits():
+    # 모델별 AIMD 동시성 window / 대기열 상태 + RPM/TPM 버킷 + 서킷 브레이커 + 헤지 통계
+    return {"concurrency": limiter_stats(), "rate": rate_limit_stats(), "breakers": breaker_stats(), "hedging": hedge_stats()}
+
+@router.get("/cache")
+async def get_cache_stats():
+    # 텍스트 응답 캐시 hit/miss 카운터 + 프롬프트 접두부 컨텍스트 캐시
+    return {**cache_stats(), "context": context_cache_stats()}
+
+@router.get("/images")
+async def get_image_stats():
+    # 업로드 전 이미지 최적화 누적 통계(처리 수, 원본/최적화 바이트) + 이미지 라이브러리 재사용 통계
+    return {**image_optimize_stats(), "library": image_library.snapshot()}
@@ -1,18 +1,28 @@
 from __future__ import annotations
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, Optional
+from datetime import timezone
 import asyncio
+import json
 import time
 import traceback
 
+from db import get_async_session_factory
 from services.db_service import get_db
-from models.RunInitContent import RunInitContentReq, RunInitContentResp
+from models.RunInitContent import RunInitContentReq, RunInitContentResp, RunBatchReq
 from operators.init_content import run_init_content_with_db
-from operators.job_store import job_store
+from operators.job_store import JobState, job_store
+from operators.topic_batch import run_topics_batch
+from services.workers.content_job_repos import get_content_job
+from services.workers.content_worker import enqueue_content_job
+from settings import settings
 
 router = APIRouter()
 
+_batch_tasks = set()  # 실행 중인 /run-batch 워커 참조 유지 (GC 방지)
+
 @router.post("/run", response_model=RunInitContentResp)
 async def run_sync(payload: RunInitContentReq, db: Session = Depends(get_db)):
     try:
@@ -22,74 +32,199 @@ async def run_sync(payload: RunInitContentReq, db: Session = Depends(get_db)):
             photo_count=payload.photo_count,
             llm_model=payload.llm_model,
             target_chars=payload.target_chars,
+            run_id=payload.run_id,
+            resume=payload.resume,
         )
         return RunInitContentResp(status="ok", result=result)
     except Exception as e:
         return RunInitContentResp(status="error", detail=str(e))
 
 # 권장: 비동기 실행 + 폴링
+#   content_jobs 테이블에 적재만 하고 반환 → 워커(services.workers.content_worker)가 집어 실행
+#   (API 재시작에도 작업이 남고, 워커를 늘려 처리량 확장. 진행/결과는 /status, /result 로)
 @router.post("/run-async")
 async def run_async(payload: RunInitContentReq) -> Dict[str, Any]:
-    jid = job_store.new_job()
+    jid = await enqueue_content_job({
+        "kind": "init",
+        "topic": payload.topic,
+        "photo_count": payload.photo_count,
+        "llm_model": payload.llm_model,
+        "target_chars": payload.target_chars,
+        "run_id": payload.run_id,
+        "resume": payload.resume,
+    })
+    return {"status": "accepted", "job_id": str(jid)}
 
-    async def _worker():
-        job_store.update(jid, status="running")
+# 여러 토픽 일괄 실행: 공유 예산(동시 기사/LLM 동시 호출/포스팅 속도)으로 돌리며 진행을 NDJSON 으로 스트리밍
+#   첫 줄 {"type":"accepted","job_id"} → 토픽별 이벤트 → 마지막 줄 {"type":"result", ...집계}
+#   클라이언트가 끊겨도 배치는 계속 실행되고 /result/{job_id} 로 집계를 받을 수 있음
+@router.post("/run-batch")
+async def run_batch(payload: RunBatchReq):
+    topics = [t.strip() for t in payload.topics if t and t.strip()]
+    if not topics:
+        raise HTTPException(422, "topics is empty")
+    if len(topics) > settings.BATCH_RUN_MAX_TOPICS:
+        raise HTTPException(422, f"too many topics (max {settings.BATCH_RUN_MAX_TOPICS})")
 
-        # ★ 요청과 분리된 새 DB 세션을 백그라운드 태스크에서 직접 열어 사용
-        db_gen = get_db()
-        db2: Session = next(db_gen)
+    jid = await job_store.new_job()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def _worker():
+        await job_store.update(jid, status="running")
         try:
-            result = await run_init_content_with_db(
-                db2,
-                topic=payload.topic,
-                photo_count=payload.photo_count,
-                llm_model=payload.llm_model,
-                target_chars=payload.target_chars,
-            )
-            steps = result.get("steps", {}) if isinstance(result, dict) else {}
-            job_store.update(
-                jid,
-                status="done",
-                result=result,
-                steps=steps,
-                finished_at=time.time(),    # ★ time 사용
+            summary = await run_topics_batch(
+                topics=topics,
+                kind=payload.kind,
+                options={
+                    "photo_count": payload.photo_count,
+                    "visual_component_count": payload.visual_component_count,
+                    "llm_model": payload.llm_model,
+                    "pipeline_id": payload.pipeline_id,
+                    "target_chars": payload.target_chars,
+                },
+                max_parallel=payload.max_parallel,
+                llm_concurrency=payload.llm_concurrency,
+                publish_per_min=payload.publish_per_min,
+                on_event=queue.put_nowait,
             )
+            await job_store.update(jid, status="done", result=summary, finished_at=time.time())
+            queue.put_nowait({"type": "result", **summary})
         except Exception as e:
             traceback.print_exc()
-            job_store.update(
-                jid,
-                status="error",
-                error=f"{e}",
-                finished_at=time.time(),    # ★ time 사용
-            )
+            await job_store.update(jid, status="error", error=f"{e}", finished_at=time.time())
+            queue.put_nowait({"type": "error", "error": f"{e}"})
         finally:
-            try:
-                next(db_gen)  # close session
-            except StopIteration:
-                pass
+            queue.put_nowait(None)
 
-    asyncio.create_task(_worker())
-    return {"status": "accepted", "job_id": jid}
+    task = asyncio.create_task(_worker())
+    _batch_tasks.add(task)
+    task.add_done_callback(_batch_tasks.discard)
 
-@router.get("/status/{job_id}")
-async def status(job_id: str) -> Dict[str, Any]:
-    st = job_store.get(job_id)
-    if not st:
-        raise HTTPException(404, "job not found")
+    async def _stream():
+        yield json.dumps({"type": "accepted", "job_id": jid, "topics": len(topics)}, ensure_ascii=False) + "\n"
+        while True:
+            event = await queue.get()
+            if event is None:
+                break
+            yield json.dumps(event, ensure_ascii=False, default=str) + "\n"
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+async def _job_from_queue(job_id: str) -> Optional[JobState]:
+    """job_store 에 없으면(아직 대기 중, 다른 프로세스 워커 + Redis 없음, TTL 만료) content_jobs 행으로 상태 구성"""
+    if not job_id.isdigit():
+        return None
+    AsyncSessionLocal = get_async_session_factory()
+    async with AsyncSessionLocal() as session:
+        row = await get_content_job(session, int(job_id))
+    if row is None:
+        return None
+    res = row.result if isinstance(row.result, dict) else None
+    return JobState(
+        status="error" if row.status == "failed" else row.status,
+        steps=(res or {}).get("steps") or {},
+        metrics=(res or {}).get("metrics"),
+        result=res if row.status == "done" else None,
+        error=row.last_error,
+        started_at=row.started_at.replace(tzinfo=timezone.utc).timestamp() if row.started_at else 0.0,
+        finished_at=row.finished_at.replace(tzinfo=timezone.utc).timestamp() if row.finished_at else None,
+    )
+
+def _status_body(st: JobState) -> Dict[str, Any]:
     return {
         "status": st.status,
         "steps": st.steps,
+        "partial": st.partial,
+        "metrics": st.metrics,
         "error": st.error,
         "started_at": st.started_at,
         "finished_at": st.finished_at,
-        "has_result": st.result is not None,
+        "has_result": st.has_result,
     }
 
+@router.get("/status/{job_id}")
+async def status(job_id: str) -> Dict[str, Any]:
+    st = await job_store.get(job_id, with_result=False) or await _job_from_queue(job_id)
+    if not st:
+        raise HTTPException(404, "job not found")
+    return _status_body(st)
+
 @router.get("/result/{job_id}")
 async def result(job_id: str) -> Dict[str, Any]:
-    st = job_store.get(job_id)
+    st = await job_store.get(job_id) or await _job_from_queue(job_id)
     if not st:
         raise HTTPException(404, "job not found")
     if st.status != "done" or st.result is None:
         return {"status": st.status, "detail": "not ready"}
     return {"status": "ok", "result": st.result}
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 진행 스트림: 폴링 대신 작업 이벤트를 밀어줌
+#   snapshot(현재 상태) → update/partial/step_started/step_finished ... → result | failed 후 종료
+#   (EventSource 는 "error" 를 연결 오류 이벤트로 쓰므로 실패 종료는 failed)
+#   이벤트는 job_store 의 이벤트 버스(프로세스 내 + Redis 중계)에서 받음.
+#   keepalive 주기마다 상태를 다시 읽어, 이벤트가 오지 않는 배치(Redis 없이 별도 워커 등)에서도 끝을 놓치지 않음
+# ──────────────────────────────────────────────────────────────────────────────
+_TERMINAL = ("done", "error")
+
+async def _job_event_stream(job_id: str) -> AsyncIterator[Dict[str, Any]]:
+    sub = job_store.subscribe(job_id)  # 스냅샷보다 먼저 구독 → 그 사이 이벤트도 받음
+    try:
+        st = await job_store.get(job_id, with_result=False) or await _job_from_queue(job_id)
+        if st is None:
+            yield {"type": "failed", "job_id": job_id, "error": "job not found"}
+            return
+        yield {"type": "snapshot", "job_id": job_id, **_status_body(st)}
+
+        status_now = st.status
+        while status_now not in _TERMINAL:
+            try:
+                ev = await sub.get(timeout=settings.JOB_EVENTS_KEEPALIVE_SEC)
+            except asyncio.TimeoutError:
+                yield {"type": "ping"}
+                st = await job_store.get(job_id, with_result=False) or await _job_from_queue(job_id)
+                if st is not None and st.status != status_now:
+                    status_now = st.status
+                    yield {"type": "snapshot", "job_id": job_id, **_status_body(st)}
+                continue
+            yield ev
+            status_now = ev.get("status") or status_now
+
+        final = await job_store.get(job_id) or await _job_from_queue(job_id)
+        if final is not None and final.status == "done":
+            yield {"type": "result", "job_id": job_id, "result": final.result}
+        else:
+            yield {"type": "failed", "job_id": job_id, "error": final.error if final else "job not found"}
+    finally:
+        sub.close()
+
+@router.get("/events/{job_id}")
+async def events(job_id: str):
+    """Server-Sent Events (EventSource). event 이름 = 이벤트 type"""
+    async def _sse():
+        yield "retry: 3000\n\n"
+        async for ev in _job_event_stream(job_id):
+            if ev["type"] == "ping":
+                yield ": ping\n\n"
+                continue
+            yield f"event: {ev['type']}\ndata: {json.dumps(ev, ensure_ascii=False, default=str)}\n\n"
+
+    return StreamingResponse(
+        _sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # nginx 버퍼링 끔
+    )
+
+@router.websocket("/ws/{job_id}")
+async def events_ws(websocket: WebSocket, job_id: str):
+    """WebSocket: 같은 이벤트를 JSON 메시지로 (ping 포함), 끝나면 서버가 닫음"""
+    await websocket.accept()
+    stream = _job_event_stream(job_id)
+    try:
+        async for ev in stream:
+            await websocket.send_json(ev)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await stream.aclose()
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from google.genai import types as gatypes
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ──────────────────────────────────────────────────────────────
+# 배치 입출력 단위
+# ──────────────────────────────────────────────────────────────
+@dataclass
+class BatchItem:
+    key: str
+    contents: List[gatypes.Content]
+    config: Optional[gatypes.GenerateContentConfig] = None
+
+
+@dataclass
+class BatchOutcome:
+    response: Optional[gatypes.GenerateContentResponse] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchHandle:
+    job_id: str
+    model: str
+    keys: List[str] = field(default_factory=list)
+
+
+class BatchJobFailed(RuntimeError):
+    """배치 잡 전체가 실패/취소/만료됨"""
+
+
+class BatchBackend:
+    """
+    배치 백엔드 인터페이스
+      submit(model, items) → BatchHandle
+      poll(handle)         → 완료 전이면 None, 완료면 {key: BatchOutcome}
+    """
+
+    name = "base"
+
+    async def submit(self, model: str, items: List[BatchItem]) -> BatchHandle:
+        raise NotImplementedError
+
+    async def poll(self, handle: BatchHandle) -> Optional[Dict[str, BatchOutcome]]:
+        raise NotImplementedError
+
+
+def _text_response(text: str) -> gatypes.GenerateContentResponse:
+    return gatypes.GenerateContentResponse(
+        candidates=[gatypes.Candidate(
+            content=gatypes.Content(role="model", parts=[gatypes.Part(text=text)]),
+            finish_reason=gatypes.FinishReason.STOP,
+        )],
+    )
+
+
+# ──────────────────────────────────────────────────────────────
+# Gemini Batch API (inlined requests, 모델당 잡 1개)
+# ──────────────────────────────────────────────────────────────
+_PENDING_STATES = {
+    "JOB_STATE_UNSPECIFIED", "JOB_STATE_QUEUED", "JOB_STATE_PENDING",
+    "JOB_STATE_RUNNING", "JOB_STATE_UPDATING", "JOB_STATE_PAUSED", "JOB_STATE_CANCELLING",
+}
+_DONE_STATES = {"JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED"}
+
+
+class GeminiBatchBackend(BatchBackend):
+    name = "gemini"
+
+    def __init__(self, client: Any = None):
+        if client is None:
+            from services.content_generate_service import ContentGenerateService
+            client = ContentGenerateService.client
+        self.client = client
+
+    async def submit(self, model: str, items: List[BatchItem]) -> BatchHandle:
+        job = await self.client.aio.batches.create(
+            model=model,
+            src=[gatypes.InlinedRequest(contents=i.contents, config=i.config) for i in items],
+            config=gatypes.CreateBatchJobConfig(display_name=f"genai-batch-{uuid.uuid4().hex[:12]}"),
+        )
+        logger.info(f"[batch:gemini] submitted {job.name} ({model}, {len(items)} requests)")
+        return BatchHandle(job_id=job.name, model=model, keys=[i.key for i in items])
+
+    async def poll(self, handle: BatchHandle) -> Optional[Dict[str, BatchOutcome]]:
+        job = await self.client.aio.batches.get(name=handle.job_id)
+        state = str(getattr(job.state, "value", job.state))
+        if state in _PENDING_STATES:
+            return None
+        if state not in _DONE_STATES:
+            raise BatchJobFailed(f"batch {handle.job_id} ended with {state}: {job.error}")
+
+        responses = list(getattr(job.dest, "inlined_responses", None) or [])
+        out: Dict[str, BatchOutcome] = {}
+        # inlined 응답은 요청 순서를 그대로 따름
+        for key, r in zip(handle.keys, responses):
+            if r.error is not None:
+                out[key] = BatchOutcome(error=str(r.error))
+            else:
+                out[key] = BatchOutcome(response=r.response)
+        return out
+
+
+# ──────────────────────────────────────────────────────────────
+# 로컬 파일 대체 백엔드 (오프라인 테스트용)
+#   <root>/<job_id>/input.jsonl  : {"key": ..., "request": {"contents": [...], "config": {...}}}
+#   <root>/<job_id>/output.jsonl : {"key": ..., "response": {...}} | {"key": ..., "error": "..."}
+# Gemini 배치 JSONL 파일과 같은 형식. output.jsonl 이 생기면 완료로 봅니다.
+# responder 가 있으면 제출 직후 백그라운드에서 요청을 차례로 처리해 output.jsonl 을 씀
+# (없으면 외부 프로세스/테스트가 output.jsonl 을 채울 때까지 대기)
+# ──────────────────────────────────────────────────────────────
+Responder = Callable[[str, List[gatypes.Content], Optional[gatypes.GenerateContentConfig]], Awaitable[Any]]
+
+
+class LocalFileBatchBackend(BatchBackend):
+    name = "local"
+
+    def __init__(self, root_dir: str | Path, *, responder: Optional[Responder] = None):
+        self.root = Path(root_dir)
+        self.responder = responder
+        self._tasks: set = set()
+
+    def _job_dir(self, job_id: str) -> Path:
+        return self.root / job_id
+
+    async def submit(self, model: str, items: List[BatchItem]) -> BatchHandle:
+        job_id = f"local-{uuid.uuid4().hex}"
+        lines = [
+            json.dumps({
+                "key": i.key,
+                "model": model,
+                "request": gatypes.InlinedRequest(contents=i.contents, config=i.config)
+                .model_dump(mode="json", exclude_none=True),
+            }, ensure_ascii=False)
+            for i in items
+        ]
+
+        def _write():
+            d = self._job_dir(job_id)
+            d.mkdir(parents=True, exist_ok=True)
+            (d / "input.jsonl").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+        await asyncio.to_thread(_write)
+        handle = BatchHandle(job_id=job_id, model=model, keys=[i.key for i in items])
+        if self.responder is not None:
+            task = asyncio.create_task(self._process(handle, items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        logger.info(f"[batch:local] submitted {job_id} ({model}, {len(items)} requests)")
+        return handle
+
+    async def _process(self, handle: BatchHandle, items: List[BatchItem]) -> None:
+        rows: List[str] = []
+        for i in items:
+            try:
+                res = await self.responder(handle.model, i.contents, i.config)
+                resp = _text_response(res) if isinstance(res, str) else res
+                rows.append(json.dumps({
+                    "key": i.key,
+                    "response": json.loads(resp.model_dump_json(exclude_none=True, exclude={"sdk_http_response"})),
+                }, ensure_ascii=False))
+            except Exception as e:
+                rows.append(json.dumps({"key": i.key, "error": str(e)}, ensure_ascii=False))
+
+        def _write():
+            d = self._job_dir(handle.job_id)
+            tmp = d / "output.jsonl.tmp"
+            tmp.write_text("\n".join(rows) + "\n", encoding="utf-8")
+            os.replace(tmp, d / "output.jsonl")  # 원자적 교체: poll 이 반쯤 쓴 파일을 읽지 않도록
+
+        await asyncio.to_thread(_write)
+
+    async def poll(self, handle: BatchHandle) -> Optional[Dict[str, BatchOutcome]]:
+        path = self._job_dir(handle.job_id) / "output.jsonl"
+
+        def _read() -> Optional[str]:
+            return path.read_text(encoding="utf-8") if path.exists() else None
+
+        raw = await asyncio.to_thread(_read)
+        if raw is None:
+            return None
+        out: Dict[str, BatchOutcome] = {}
+        for line in raw.splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if row.get("error"):
+                out[row["key"]] = BatchOutcome(error=str(row["error"]))
+            else:
+                out[row["key"]] = BatchOutcome(
+                    response=gatypes.GenerateContentResponse.model_validate(row.get("response") or {})
+                )
+        return out
+
+
+def default_batch_backend() -> BatchBackend:
+    """settings.BATCH_BACKEND: gemini | local (local 은 요청을 대화형 경로로 하나씩 처리하는 대체 구현)"""
+    kind = (settings.BATCH_BACKEND or "gemini").strip().lower()
+    if kind == "local":
+        from services.content_generate_service import ContentGenerateService
+        svc = ContentGenerateService()
+
+        async def _interactive(model, contents, config):
+            return await svc.generate_content(model, contents, use_cache=False)
+
+        return LocalFileBatchBackend(settings.BATCH_LOCAL_DIR, responder=_interactive)
+    return GeminiBatchBackend()
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+
+from common.metering import meter_call, meter_cache_hit
+from common.retry import spend_attempt
+from services.batch_backends import BatchBackend, BatchItem, default_batch_backend
+from services.content_generate_service import ContentGenerateService, cache_lookup, cache_store
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+_Entry = Tuple[BatchItem, asyncio.Future]
+
+
+# ──────────────────────────────────────────────────────────────
+# 배치 실행 모드용 서비스
+#   ContentGenerateService 와 같은 인터페이스(generate_content / generate_content_stream / generate_image)
+#   - 텍스트 요청은 모델별로 모아 배치 잡 하나로 제출하고, 결과를 각 호출자의 future 로 돌려줌
+#   - 여러 토픽의 파이프라인을 동시에 돌리면 같은 단계의 프롬프트들이 한 잡으로 묶임
+#   - 이미지 생성은 배치 대상이 아니므로 대화형 서비스로 위임
+# ──────────────────────────────────────────────────────────────
+class BatchGenerateService:
+    def __init__(
+        self,
+        backend: Optional[BatchBackend] = None,
+        *,
+        interactive: Optional[ContentGenerateService] = None,
+        max_batch_size: Optional[int] = None,
+        flush_sec: Optional[float] = None,
+        poll_sec: Optional[float] = None,
+        timeout_sec: Optional[float] = None,
+    ):
+        self.backend = backend or default_batch_backend()
+        self.interactive = interactive or ContentGenerateService()
+        self.max_batch_size = max_batch_size or settings.BATCH_MAX_SIZE
+        self.flush_sec = flush_sec if flush_sec is not None else settings.BATCH_FLUSH_SEC
+        self.poll_sec = poll_sec if poll_sec is not None else settings.BATCH_POLL_SEC
+        self.timeout_sec = timeout_sec if timeout_sec is not None else settings.BATCH_TIMEOUT_SEC
+
+        self._pending: Dict[str, List[_Entry]] = {}
+        self._timers: Dict[str, asyncio.Task] = {}
+        self._jobs: set = set()
+        self.jobs_submitted = 0
+        self.items_submitted = 0
+        self.items_failed = 0
+        self.cache_hits = 0
+
+    # --- 수집/제출 ---
+    @staticmethod
+    def _spawn(coro) -> asyncio.Task:
+        # 배치 태스크는 특정 호출자의 RetryBudget 등 contextvar 를 물려받지 않도록 빈 컨텍스트에서 생성
+        return contextvars.Context().run(asyncio.create_task, coro)
+
+    def _enqueue(self, model: str, item: BatchItem) -> asyncio.Future:
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        queue = self._pending.setdefault(model, [])
+        queue.append((item, fut))
+        if len(queue) >= self.max_batch_size:
+            self._flush(model)
+        elif model not in self._timers:
+            self._timers[model] = self._spawn(self._flush_later(model))
+        return fut
+
+    async def _flush_later(self, model: str) -> None:
+        await asyncio.sleep(self.flush_sec)
+        self._timers.pop(model, None)
+        self._flush(model)
+
+    def _flush(self, model: str) -> None:
+        timer = self._timers.pop(model, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        entries = [e for e in self._pending.pop(model, []) if not e[1].done()]
+        if not entries:
+            return
+        task = self._spawn(self._run_batch(model, entries))
+        self._jobs.add(task)
+        task.add_done_callback(self._jobs.discard)
+
+    async def _run_batch(self, model: str, entries: List[_Entry]) -> None:
+        items = [item for item, _ in entries]
+        self.jobs_submitted += 1
+        self.items_submitted += len(items)
+        try:
+            handle = await self.backend.submit(model, items)
+            deadline = time.monotonic() + self.timeout_sec
+            while True:
+                outcomes = await self.backend.poll(handle)
+                if outcomes is not None:
+                    break
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"batch {handle.job_id} not finished in {self.timeout_sec:.0f}s")
+                await asyncio.sleep(self.poll_sec)
+        except BaseException as e:
+            err = e if isinstance(e, Exception) else RuntimeError(f"batch aborted: {e!r}")
+            for _, fut in entries:
+                if not fut.done():
+                    fut.set_exception(err)
+            self.items_failed += len(entries)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            logger.warning(f"[batch] {model} batch failed: {e}")
+            return
+
+        for item, fut in entries:
+            if fut.done():
+                continue
+            outcome = outcomes.get(item.key)
+            if outcome is None or outcome.error or outcome.response is None:
+                self.items_failed += 1
+                reason = outcome.error if outcome is not None else "missing from batch output"
+                fut.set_exception(RuntimeError(f"batch item {item.key} failed: {reason}"))
+            else:
+                fut.set_result(outcome.response)
+
+    async def drain(self) -> None:
+        """대기 중인 요청을 즉시 제출하고 진행 중인 배치가 끝날 때까지 대기"""
+        for model in list(self._pending):
+            self._flush(model)
+        if self._jobs:
+            await asyncio.gather(*list(self._jobs), return_exceptions=True)
+
+    # --- ContentGenerateService 호환 API ---
+    async def generate_content(
+        self,
+        model_or_req: Any,
+        contents: Optional[Any] = None,
+        *,
+        use_cache: bool = True,
+        refresh_cache: bool = False,
+        **_: Any,
+    ):
+        """hedge/step/cache_prefix 등 대화형 전용 옵션은 무시. refresh_cache=True 면 캐시 조회 없이 저장만"""
+        model, ga_contents = ContentGenerateService._resolve_text_args(model_or_req, contents)
+        if use_cache and not refresh_cache:
+            cached = await cache_lookup(model, ga_contents)
+            if cached is not None:
+                self.cache_hits += 1
+                meter_cache_hit()
+                return cached
+
+        spend_attempt(f"genai:batch:{model}")
+        started = time.monotonic()
+        try:
+            response = await self._enqueue(model, BatchItem(key=uuid.uuid4().hex, contents=ga_contents))
+        except BaseException:
+            meter_call(model, wall_sec=time.monotonic() - started, ok=False)
+            raise
+        # 배치는 제출~완료 전체가 대기 시간이므로 wall_sec 에 그대로 기록
+        meter_call(model, response=response, wall_sec=time.monotonic() - started)
+        if use_cache:
+            await cache_store(model, ga_contents, response)
+        return response
+
+    async def generate_content_stream(
+        self,
+        model_or_req: Any,
+        contents: Optional[Any] = None,
+        *,
+        use_cache: bool = True,
+        refresh_cache: bool = False,
+        **_: Any,
+    ) -> AsyncIterator[Any]:
+        """배치는 부분 출력이 없으므로 완성된 응답을 청크 1개로 돌려줌"""
+        yield await self.generate_content(model_or_req, contents, use_cache=use_cache, refresh_cache=refresh_cache)
+
+    async def generate_image(self, image_model_or_req: Any, contents: Optional[str] = None):
+        return await self.interactive.generate_image(image_model_or_req, contents)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend.name,
+            "jobs_submitted": self.jobs_submitted,
+            "items_submitted": self.items_submitted,
+            "items_failed": self.items_failed,
+            "cache_hits": self.cache_hits,
+            "pending": sum(len(v) for v in self._pending.values()),
+        }
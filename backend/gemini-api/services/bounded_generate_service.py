@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator, Dict
+
+
+# ──────────────────────────────────────────────────────────────
+# 생성 서비스 래퍼: 여러 실행이 공유하는 LLM 동시 호출 상한
+#   - 모델별 AIMD 리미터(서비스 계층)는 프로세스 전체 보호용, 이건 특정 묶음(배치 실행)의 몫을 제한
+#   - 스트림은 소비가 끝날 때까지 슬롯을 잡음
+#   - 그 밖의 속성은 내부 서비스로 위임
+# ──────────────────────────────────────────────────────────────
+class BoundedGenerateService:
+    def __init__(self, inner: Any, max_concurrency: int):
+        self.inner = inner
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._sem = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+    async def _enter(self) -> None:
+        await self._sem.acquire()
+        self.in_flight += 1
+        self.calls += 1
+        self.peak = max(self.peak, self.in_flight)
+
+    def _exit(self) -> None:
+        self.in_flight -= 1
+        self._sem.release()
+
+    async def generate_content(self, *args: Any, **kwargs: Any) -> Any:
+        await self._enter()
+        try:
+            return await self.inner.generate_content(*args, **kwargs)
+        finally:
+            self._exit()
+
+    async def generate_content_stream(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        await self._enter()
+        try:
+            stream = self.inner.generate_content_stream(*args, **kwargs)
+            try:
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                await stream.aclose()
+        finally:
+            self._exit()
+
+    async def generate_image(self, *args: Any, **kwargs: Any) -> Any:
+        await self._enter()
+        try:
+            return await self.inner.generate_image(*args, **kwargs)
+        finally:
+            self._exit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "peak": self.peak,
+            "calls": self.calls,
+        }
@@ -6,11 +6,13 @@ import os
 import uuid
 import base64
 import asyncio
+import json
 import random
+import time
 import logging
 from io import BytesIO
 from pathlib import Path
-from typing import Optional, Any, List
+from typing import Optional, Any, List, AsyncIterator, Tuple
 
 import log_config  # logger 설정 모듈
 from google import genai
@@ -20,6 +22,16 @@ from PIL import Image
 
 # 내부 유틸 (SDK 타입 변환기)
 from utils.genai_payload import to_ga_contents
+from common.concurrency import LimiterRegistry
+from common.rate_limit import RateLimiterRegistry
+from common.response_cache import ResponseCache, make_cache_key
+from common.retry import RetryBudgetExceeded, spend_attempt, budget_timeout, budget_sleep
+from common.circuit_breaker import BreakerRegistry, CircuitBreaker, CircuitOpenError
+from common.hedging import Hedger
+from common.context_cache import ContextCacheManager
+from common.metering import meter_call, meter_cache_hit
+from common.llm import chunk_finish_reason
+from settings import settings
 
 try:
     from models.content_request import ContentRequest
@@ -31,12 +43,110 @@ logger = logging.getLogger(__name__)
 # ──────────────────────────────────────────────────────────────
 # 설정
 # ──────────────────────────────────────────────────────────────
-GENAI_MAX_CONCURRENCY = int(os.getenv("GENAI_MAX_CONCURRENCY", "3"))
+GENAI_MAX_CONCURRENCY = int(os.getenv("GENAI_MAX_CONCURRENCY", "3"))      # AIMD 초기 window
+GENAI_MIN_CONCURRENCY = int(os.getenv("GENAI_MIN_CONCURRENCY", "1"))
+GENAI_CONCURRENCY_CEILING = int(os.getenv("GENAI_CONCURRENCY_CEILING", "32"))
 GENAI_MAX_ATTEMPTS = int(os.getenv("GENAI_MAX_ATTEMPTS", "6"))
 GENAI_MAX_BACKOFF = float(os.getenv("GENAI_MAX_BACKOFF", "20.0"))
 IMG_OUT_DIR = os.getenv("IMG_OUT_DIR", "/app/images")
-
-_genai_sem = asyncio.Semaphore(GENAI_MAX_CONCURRENCY)
+# 생성 이미지는 헤더만 검증하고 원본 바이트를 그대로 저장. 1 이면 예전처럼 PIL 로 디코드 후 재인코딩
+GENAI_IMAGE_REENCODE = os.getenv("GENAI_IMAGE_REENCODE", "0").strip().lower() not in ("0", "false", "no")
+
+# async 경로: SDK aio 클라이언트 사용 여부(0이면 기존 to_thread 폴백)
+GENAI_USE_ASYNC = os.getenv("GENAI_USE_ASYNC", "1").strip().lower() not in ("0", "false", "no")
+GENAI_HTTP_MAX_CONNECTIONS = int(os.getenv("GENAI_HTTP_MAX_CONNECTIONS", "64"))
+GENAI_HTTP_MAX_KEEPALIVE = int(os.getenv("GENAI_HTTP_MAX_KEEPALIVE", "16"))
+GENAI_CALL_TIMEOUT_SEC = float(os.getenv("GENAI_CALL_TIMEOUT_SEC", "180.0"))
+
+# 클라이언트측 RPM/TPM 예산 (0 = 해당 축 무제한). 모델별 override 는 JSON:
+#   GENAI_RATE_LIMITS='{"gemini-2.5-flash": {"rpm": 1000, "tpm": 1000000}}'
+GENAI_DEFAULT_RPM = int(os.getenv("GENAI_DEFAULT_RPM", "300"))
+GENAI_DEFAULT_TPM = int(os.getenv("GENAI_DEFAULT_TPM", "1000000"))
+GENAI_RATE_LIMITS = os.getenv("GENAI_RATE_LIMITS", "")
+GENAI_CHARS_PER_TOKEN = float(os.getenv("GENAI_CHARS_PER_TOKEN", "3.0"))
+GENAI_EST_OUTPUT_TOKENS = int(os.getenv("GENAI_EST_OUTPUT_TOKENS", "2048"))
+
+# 텍스트 응답 캐시 (model + contents + config 해시). Redis 계층은 settings.redis_url 이 있을 때만
+GENAI_CACHE_ENABLED = os.getenv("GENAI_CACHE_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+GENAI_CACHE_TTL_SEC = int(os.getenv("GENAI_CACHE_TTL_SEC", "86400"))
+GENAI_CACHE_MAX_ENTRIES = int(os.getenv("GENAI_CACHE_MAX_ENTRIES", "512"))
+GENAI_CACHE_MAX_BYTES = int(os.getenv("GENAI_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+GENAI_CACHE_USE_REDIS = os.getenv("GENAI_CACHE_USE_REDIS", "1").strip().lower() not in ("0", "false", "no")
+
+# 모델별 서킷 브레이커 + 폴백 체인(JSON):
+#   GENAI_FALLBACK_MODELS='{"gemini-2.5-flash": ["gemini-2.5-flash-lite"]}'
+GENAI_BREAKER_FAILURES = int(os.getenv("GENAI_BREAKER_FAILURES", "5"))
+GENAI_BREAKER_ERROR_RATE = float(os.getenv("GENAI_BREAKER_ERROR_RATE", "0.5"))
+GENAI_BREAKER_WINDOW_SEC = float(os.getenv("GENAI_BREAKER_WINDOW_SEC", "60"))
+GENAI_BREAKER_MIN_CALLS = int(os.getenv("GENAI_BREAKER_MIN_CALLS", "10"))
+GENAI_BREAKER_OPEN_SEC = float(os.getenv("GENAI_BREAKER_OPEN_SEC", "30"))
+GENAI_FALLBACK_MODELS = os.getenv("GENAI_FALLBACK_MODELS", "")
+
+# 헤지 요청(opt-in): (모델, 단계)별 최근 지연의 p 분위를 넘기면 같은 요청을 한 번 더 보냄
+GENAI_HEDGE_ENABLED = os.getenv("GENAI_HEDGE_ENABLED", "0").strip().lower() not in ("0", "false", "no")
+GENAI_HEDGE_PERCENTILE = float(os.getenv("GENAI_HEDGE_PERCENTILE", "0.95"))
+GENAI_HEDGE_MIN_DELAY_SEC = float(os.getenv("GENAI_HEDGE_MIN_DELAY_SEC", "2.0"))
+GENAI_HEDGE_WINDOW = int(os.getenv("GENAI_HEDGE_WINDOW", "200"))
+GENAI_HEDGE_MIN_SAMPLES = int(os.getenv("GENAI_HEDGE_MIN_SAMPLES", "20"))
+
+# 프롬프트 접두부 컨텍스트 캐시(cached_content). 모델별 최소 토큰 미만이면 만들지 않음
+GENAI_CONTEXT_CACHE_ENABLED = os.getenv("GENAI_CONTEXT_CACHE_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+GENAI_CONTEXT_CACHE_TTL_SEC = int(os.getenv("GENAI_CONTEXT_CACHE_TTL_SEC", "3600"))
+GENAI_CONTEXT_CACHE_REFRESH_SEC = float(os.getenv("GENAI_CONTEXT_CACHE_REFRESH_SEC", "300"))
+GENAI_CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("GENAI_CONTEXT_CACHE_MIN_TOKENS", "1024"))
+
+# 모델별 적응형(AIMD) 동시성 제한: 성공 시 가산 증가, 429/RESOURCE_EXHAUSTED 시 반감
+_limiters = LimiterRegistry(
+    initial=GENAI_MAX_CONCURRENCY,
+    min_limit=GENAI_MIN_CONCURRENCY,
+    max_limit=GENAI_CONCURRENCY_CEILING,
+)
+
+
+def _load_json_env(name: str, raw: str) -> dict:
+    if not raw.strip():
+        return {}
+    try:
+        data = json.loads(raw)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        logger.warning(f"{name} is not valid JSON; ignored")
+        return {}
+
+
+# 모델별 RPM/TPM 토큰 버킷: 429 를 받기 전에 미리 속도 조절
+_rate_limiters = RateLimiterRegistry(
+    default_rpm=GENAI_DEFAULT_RPM,
+    default_tpm=GENAI_DEFAULT_TPM,
+    overrides=_load_json_env("GENAI_RATE_LIMITS", GENAI_RATE_LIMITS),
+)
+
+# 모델별 서킷 브레이커: 장애 모델은 즉시 실패시키고 폴백 체인으로 우회
+_breakers = BreakerRegistry(
+    fallbacks=_load_json_env("GENAI_FALLBACK_MODELS", GENAI_FALLBACK_MODELS),
+    failure_threshold=GENAI_BREAKER_FAILURES,
+    error_rate_threshold=GENAI_BREAKER_ERROR_RATE,
+    window_sec=GENAI_BREAKER_WINDOW_SEC,
+    min_calls=GENAI_BREAKER_MIN_CALLS,
+    open_sec=GENAI_BREAKER_OPEN_SEC,
+)
+
+_hedger = Hedger(
+    percentile=GENAI_HEDGE_PERCENTILE,
+    min_delay_sec=GENAI_HEDGE_MIN_DELAY_SEC,
+    window=GENAI_HEDGE_WINDOW,
+    min_samples=GENAI_HEDGE_MIN_SAMPLES,
+)
+
+_response_cache: Optional[ResponseCache] = (
+    ResponseCache(
+        ttl_sec=GENAI_CACHE_TTL_SEC,
+        max_entries=GENAI_CACHE_MAX_ENTRIES,
+        max_bytes=GENAI_CACHE_MAX_BYTES,
+        redis_url=settings.redis_url if GENAI_CACHE_USE_REDIS else None,
+    )
+    if GENAI_CACHE_ENABLED else None
+)
 
 ClientErr = getattr(genai_errors, "ClientError", Exception)
 ServerErr = getattr(genai_errors, "ServerError", Exception)
@@ -51,34 +161,147 @@ def _jittered_backoff(attempt: int, max_backoff: float = GENAI_MAX_BACKOFF) -> f
     return min(2 ** attempt, max_backoff) + random.uniform(0.1, 0.9)
 
 
+def _build_client() -> genai.Client:
+    """async 경로용 커넥션 풀 상한을 둔 Gemini 클라이언트"""
+    http_options = gatypes.HttpOptions(
+        async_client_args={
+            "limits": httpx.Limits(
+                max_connections=GENAI_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=GENAI_HTTP_MAX_KEEPALIVE,
+            ),
+        },
+    )
+    return genai.Client(http_options=http_options)
+
+
 def _ensure_dir(path: str | Path) -> Path:
     p = Path(path)
     p.mkdir(parents=True, exist_ok=True)
     return p
 
 
-def _decode_inline_data(data: Any) -> Optional[bytes]:
-    """Gemini inline_data.data → bytes로 안전 변환"""
+def _decode_inline_data(data: Any) -> Optional[memoryview]:
+    """Gemini inline_data.data → memoryview (bytes 면 복사 없이 참조, base64 문자열만 디코드)"""
     if data is None:
         return None
-    if isinstance(data, (bytes, bytearray)):
-        return bytes(data)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return memoryview(data)
     if isinstance(data, str):
         try:
-            return base64.b64decode(data)
+            return memoryview(base64.b64decode(data))
         except Exception:
             return None
     return None
 
 
-def _save_image_bytes(bin_: bytes, out_dir: Path, ext: str = "png") -> str:
-    img = Image.open(BytesIO(bin_))
+def _sniff_image_ext(buf: memoryview) -> Optional[str]:
+    """매직 바이트로 실제 포맷 판별 (디코드하지 않음)"""
+    head = bytes(buf[:12])
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _mime_to_ext(mime: Any) -> Optional[str]:
+    if not isinstance(mime, str):
+        return None
+    if "jpeg" in mime or "jpg" in mime:
+        return "jpg"
+    for ext in ("png", "webp", "gif"):
+        if ext in mime:
+            return ext
+    return None
+
+
+def _write_image_bytes(buf: memoryview, out_dir: Path, ext: str) -> str:
+    """원본 바이트를 그대로 파일로 (디코드/재인코딩 없음)"""
+    fpath = out_dir / f"{uuid.uuid4()}.{ext}"
+    with open(fpath, "wb") as f:
+        f.write(buf)
+    return str(fpath)
+
+
+def _reencode_image_bytes(buf: memoryview, out_dir: Path, ext: str) -> str:
+    img = Image.open(BytesIO(buf))
     img.load()  # lazy-load 방지
     fpath = out_dir / f"{uuid.uuid4()}.{ext}"
     img.save(fpath)
     return str(fpath)
 
 
+async def _persist_image(buf: memoryview, out_dir: Path, mime: Any) -> str:
+    """
+    헤더(매직 바이트)와 MIME 만 검증하고 이벤트 루프 밖(스레드)에서 저장.
+    선언된 MIME 과 실제 헤더가 다르면 헤더를 따름. 이미지가 아니면 ValueError
+    """
+    ext = _sniff_image_ext(buf)
+    if ext is None:
+        raise ValueError(f"inline_data is not a supported image (mime={mime}, {len(buf)} bytes)")
+    declared = _mime_to_ext(mime)
+    if declared and declared != ext:
+        logger.warning(f"[genai:image] mime {mime} does not match {ext} header; using header")
+    writer = _reencode_image_bytes if GENAI_IMAGE_REENCODE else _write_image_bytes
+    return await asyncio.to_thread(writer, buf, out_dir, ext)
+
+
+def _count_text_chars(obj: Any) -> int:
+    """str / Content / Part / dict / ContentMessage 어디든 텍스트 길이 합산"""
+    if obj is None:
+        return 0
+    if isinstance(obj, str):
+        return len(obj)
+    if isinstance(obj, (list, tuple)):
+        return sum(_count_text_chars(x) for x in obj)
+    if isinstance(obj, dict):
+        return _count_text_chars(obj.get("text")) + _count_text_chars(obj.get("parts"))
+    text = getattr(obj, "text", None)
+    if isinstance(text, str):
+        return len(text)
+    return _count_text_chars(getattr(obj, "parts", None))
+
+
+def _estimate_tokens(contents: Any) -> int:
+    """요청 토큰(문자수 기반 근사) + 예상 응답 토큰"""
+    prompt_tokens = int(_count_text_chars(contents) / max(GENAI_CHARS_PER_TOKEN, 0.1)) + 1
+    return prompt_tokens + GENAI_EST_OUTPUT_TOKENS
+
+
+def _usage_total_tokens(response: Any) -> Optional[int]:
+    usage = getattr(response, "usage_metadata", None)
+    total = getattr(usage, "total_token_count", None)
+    return total if isinstance(total, int) else None
+
+
+def _response_has_text(response: Any) -> bool:
+    """캐시 저장 조건: 후보 parts 중 비어있지 않은 text 가 하나라도 있을 것"""
+    try:
+        for p in (response.candidates[0].content.parts or []):
+            t = getattr(p, "text", None)
+            if isinstance(t, str) and t.strip():
+                return True
+    except Exception:
+        pass
+    return False
+
+
+def _chunk_candidate(chunk: Any) -> Any:
+    try:
+        return chunk.candidates[0]
+    except Exception:
+        return None
+
+
+def _chunk_parts(chunk: Any) -> List[Any]:
+    content = getattr(_chunk_candidate(chunk), "content", None)
+    return list(getattr(content, "parts", None) or [])
+
+
 def _assert_non_empty_contents(contents: List[gatypes.Content]) -> None:
     """빈 입력 방지용 검증"""
     if not contents:
@@ -120,20 +343,207 @@ def _is_retryable_error(e: Exception) -> bool:
     return False
 
 
+def _is_rate_limit_error(e: Exception) -> bool:
+    """재시도 가능 에러 중 쿼터 초과(429 / RESOURCE_EXHAUSTED)만 골라냄 → 동시성 축소 신호"""
+    if not _is_retryable_error(e):
+        return False
+    status = getattr(e, "status", None) or getattr(e, "http_status", None)
+    code = getattr(e, "code", None)
+    if status == 429 or code == 429:
+        return True
+    txt = repr(e).lower()
+    return any(k in txt for k in [
+        "429", "resource_exhausted", "resource exhausted", "rate limit", "too many requests",
+    ])
+
+
+def limiter_stats() -> dict:
+    """모델별 현재 window / in-flight / 대기열 길이"""
+    return _limiters.snapshot()
+
+
+def rate_limit_stats() -> dict:
+    """모델별 RPM/TPM 버킷 잔량과 누적 대기 시간"""
+    return _rate_limiters.snapshot()
+
+
+def breaker_stats() -> dict:
+    """모델별 서킷 상태(closed/open/half_open)와 최근 에러율"""
+    return _breakers.snapshot()
+
+
+def route_model(model: str) -> str:
+    """
+    요청 모델의 서킷이 열려 있으면 폴백 체인에서 호출 가능한 첫 모델을 돌려줌.
+    체인 전체가 열려 있으면 CircuitOpenError (대기하지 않고 즉시 실패)
+    """
+    return _breakers.route(model)
+
+
+def _record_outcome(breaker: CircuitBreaker, exc: Optional[BaseException]) -> None:
+    if exc is None:
+        breaker.record_success()
+    elif isinstance(exc, Exception) and _is_retryable_error(exc):
+        breaker.record_failure()
+    else:
+        breaker.record_neutral()
+
+
+def context_cache_stats() -> dict:
+    """프롬프트 접두부 컨텍스트 캐시 생성/재사용/연장 횟수와 누적 캐시 토큰"""
+    return _context_caches.snapshot() if _context_caches is not None else {"enabled": False}
+
+
+def _is_context_cache_error(e: Exception) -> bool:
+    """참조한 cached_content 가 서버에서 만료/삭제된 경우"""
+    txt = repr(e).lower()
+    return ("cachedcontent" in txt or "cached content" in txt or "cached_content" in txt) and not _is_retryable_error(e)
+
+
+def hedge_stats() -> dict:
+    """(모델:단계)별 헤지 발사율 / 헤지 승률 / 현재 헤지 발사 지연"""
+    return _hedger.snapshot()
+
+
+def _hedge_allowed(model: str) -> bool:
+    """동시성 제한기에 여유가 있을 때만 헤지 (대기열이 있으면 다른 요청의 슬롯을 뺏게 됨)"""
+    lim = _limiters.get(model)
+    return lim.queued == 0 and lim.in_flight < lim.limit
+
+
+def cache_stats() -> dict:
+    """응답 캐시 hit/miss/eviction 카운터"""
+    return _response_cache.stats() if _response_cache is not None else {"enabled": False}
+
+
+async def cache_lookup(model: str, contents: Any) -> Optional[gatypes.GenerateContentResponse]:
+    """(model, SDK contents) 로 캐시된 응답 조회 — 배치 서비스 등 다른 실행 경로와 캐시를 공유"""
+    if _response_cache is None:
+        return None
+    cache_key = make_cache_key(model, contents)
+    cached = await _response_cache.get(cache_key)
+    if cached is None:
+        return None
+    try:
+        return gatypes.GenerateContentResponse.model_validate_json(cached)
+    except Exception as e:
+        logger.warning(f"[genai:cache] cached response decode failed: {e}")
+        return None
+
+
+async def cache_store(model: str, contents: Any, response: Any) -> None:
+    """텍스트가 있는 응답만 저장"""
+    if _response_cache is None or not _response_has_text(response):
+        return
+    await _response_cache.set(
+        make_cache_key(model, contents),
+        response.model_dump_json(exclude_none=True, exclude={"sdk_http_response"}),
+    )
+
+
 # ──────────────────────────────────────────────────────────────
 # 메인 클래스
 # ──────────────────────────────────────────────────────────────
 class ContentGenerateService:
-    client = genai.Client()
+    client = _build_client()
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """앱 종료 시 async 커넥션 풀 정리 (SDK에 공개 API가 없어 방어적으로 접근)"""
+        api_client = getattr(cls.client, "_api_client", None)
+        async_http = getattr(api_client, "_async_httpx_client", None)
+        if async_http is not None:
+            try:
+                await async_http.aclose()
+            except Exception as e:
+                logger.warning(f"[genai] async client close failed: {e}")
 
-    # ============== TEXT ==============
-    async def generate_content(self, model_or_req: Any, contents: Optional[Any] = None):
+    @staticmethod
+    async def _split_cached_prefix(
+        model: str, contents: List[gatypes.Content], cache_prefix: int
+    ) -> Tuple[List[gatypes.Content], Optional[gatypes.GenerateContentConfig], Optional[str]]:
         """
-        지원 형태:
-          - generate_content(model, contents="...")                 ← 문자열
-          - generate_content(model, contents=[ContentMessage...])   ← 메시지 리스트
-          - generate_content(ContentRequest(...))                   ← ContentRequest 전체
+        앞 cache_prefix 개 메시지를 cached_content 로 대체.
+        → (나머지 contents, cached_content 를 가리키는 config, 캐시 이름) / 캐시를 못 쓰면 원본 그대로
+        """
+        if _context_caches is None or cache_prefix <= 0 or len(contents) <= cache_prefix:
+            return contents, None, None
+        name = await _context_caches.lookup(model, contents[:cache_prefix])
+        if not name:
+            return contents, None, None
+        return contents[cache_prefix:], gatypes.GenerateContentConfig(cached_content=name), name
+
+    async def _generate(self, model: str, contents: Any, config: Optional[gatypes.GenerateContentConfig] = None):
+        """
+        단일 SDK 호출.
+        - GENAI_USE_ASYNC: client.aio 로 호출 → 스레드 점유 없음, 취소 시 요청도 즉시 중단
+        - 그 외: 기존처럼 to_thread 폴백 (같은 타임아웃으로 대기를 끊지만, 스레드 안의 호출은 끝까지 진행됨)
+        """
+        if GENAI_USE_ASYNC:
+            return await asyncio.wait_for(
+                self.client.aio.models.generate_content(
+                    model=model,
+                    contents=contents,
+                    config=config,
+                ),
+                timeout=budget_timeout(GENAI_CALL_TIMEOUT_SEC),
+            )
+
+        def _call():
+            return self.client.models.generate_content(
+                model=model,
+                contents=contents,
+                config=config,
+            )
+
+        return await asyncio.wait_for(
+            asyncio.to_thread(_call),
+            timeout=budget_timeout(GENAI_CALL_TIMEOUT_SEC),
+        )
+
+    async def _limited_generate(self, model: str, contents: Any, config: Optional[gatypes.GenerateContentConfig] = None):
+        """
+        서킷 브레이커 확인 → RPM/TPM 버킷에서 용량 확보(대기 중엔 동시성 슬롯을 잡지 않음)
+        → 모델별 AIMD 제한기 슬롯 안에서 단일 호출
         """
+        spend_attempt(f"genai:{model}")
+        breaker = _breakers.get(model)
+        if not breaker.try_acquire():
+            raise CircuitOpenError(f"circuit open for {model}")
+        try:
+            response = await self._paced_generate(model, contents, config)
+        except BaseException as e:
+            _record_outcome(breaker, e)
+            raise
+        _record_outcome(breaker, None)
+        return response
+
+    async def _paced_generate(self, model: str, contents: Any, config: Optional[gatypes.GenerateContentConfig] = None):
+        rate = _rate_limiters.get(model)
+        reservation = await rate.acquire(_estimate_tokens(contents))
+        if reservation.waited_sec >= 1.0:
+            logger.info(f"[genai] rate limiter paced {model} for {reservation.waited_sec:.1f}s")
+        slot_wait_from = time.monotonic()
+        async with _limiters.get(model).slot() as slot:
+            started = time.monotonic()
+            queue_wait = reservation.waited_sec + (started - slot_wait_from)
+            try:
+                response = await self._generate(model, contents, config)
+            except BaseException as e:
+                if isinstance(e, Exception) and _is_rate_limit_error(e):
+                    slot.overloaded()
+                # 실패/취소된 호출은 응답 토큰을 쓰지 않았으므로 예상 응답분은 반환
+                rate.reconcile(reservation, reservation.tokens - GENAI_EST_OUTPUT_TOKENS)
+                meter_call(model, wall_sec=time.monotonic() - started, queue_wait_sec=queue_wait, ok=False)
+                raise
+            meter_call(model, response=response, wall_sec=time.monotonic() - started, queue_wait_sec=queue_wait)
+        rate.reconcile(reservation, _usage_total_tokens(response))
+        return response
+
+    # ============== TEXT ==============
+    @staticmethod
+    def _resolve_text_args(model_or_req: Any, contents: Optional[Any]) -> Tuple[str, List[gatypes.Content]]:
+        """(model, contents) | ContentRequest → (모델명, SDK Content 리스트)"""
         # --- 인자 정규화 ---
         if ContentRequest is not None and isinstance(model_or_req, ContentRequest):
             model = model_or_req.model
@@ -153,29 +563,90 @@ class ContentGenerateService:
         # --- SDK 타입으로 변환 ---
         ga_contents = to_ga_contents(raw_contents)
         _assert_non_empty_contents(ga_contents)
+        return model, ga_contents
+
+    async def generate_content(
+        self,
+        model_or_req: Any,
+        contents: Optional[Any] = None,
+        *,
+        use_cache: bool = True,
+        hedge: Optional[bool] = None,
+        step: Optional[str] = None,
+        cache_prefix: int = 0,
+    ):
+        """
+        지원 형태:
+          - generate_content(model, contents="...")                 ← 문자열
+          - generate_content(model, contents=[ContentMessage...])   ← 메시지 리스트
+          - generate_content(ContentRequest(...))                   ← ContentRequest 전체
 
+        use_cache=False 면 응답 캐시를 조회/저장하지 않고 항상 새로 생성합니다.
+        hedge: None 이면 GENAI_HEDGE_ENABLED 를 따름. step 은 지연 분포를 나누는 키(파이프라인 단계 id)
+        cache_prefix: 앞에서부터 이 개수만큼의 메시지(토픽과 무관한 프롬프트 템플릿)를 컨텍스트 캐시로 보냄
+        """
+        model, ga_contents = self._resolve_text_args(model_or_req, contents)
+
+        # --- 응답 캐시 ---
+        cache_key: Optional[str] = None
+        if use_cache and _response_cache is not None:
+            cache_key = make_cache_key(model, ga_contents)
+            cached = await _response_cache.get(cache_key)
+            if cached is not None:
+                try:
+                    logger.info(f"[genai:text] cache hit ({model}, key={cache_key[:12]})")
+                    response = gatypes.GenerateContentResponse.model_validate_json(cached)
+                    meter_cache_hit()
+                    return response
+                except Exception as e:
+                    logger.warning(f"[genai:text] cached response decode failed: {e}")
+
+        use_hedge = GENAI_HEDGE_ENABLED if hedge is None else hedge
         last_exc: Optional[Exception] = None
 
         for attempt in range(GENAI_MAX_ATTEMPTS):
+            ctx_name: Optional[str] = None
             try:
-                async with _genai_sem:
-                    def _call():
-                        return self.client.models.generate_content(
-                            model=model,
-                            contents=ga_contents,  # List[gatypes.Content]
-                        )
-
-                    response = await asyncio.to_thread(_call)
+                target = route_model(model)
+                if target != model:
+                    logger.warning(f"[genai:text] circuit open for {model} → fallback {target}")
+                # cached_content 는 모델별이므로 라우팅된 모델 기준으로 조회
+                call_contents, call_config, ctx_name = await self._split_cached_prefix(target, ga_contents, cache_prefix)
+                if use_hedge:
+                    # 두 요청 모두 예산/브레이커/RPM·TPM/동시성 제한을 그대로 거침. 패자는 취소
+                    response = await _hedger.run(
+                        f"{target}:{step}" if step else target,
+                        lambda: self._limited_generate(target, call_contents, call_config),
+                        allow_hedge=lambda: _hedge_allowed(target),
+                    )
+                else:
+                    response = await self._limited_generate(target, call_contents, call_config)  # List[gatypes.Content]
+                if ctx_name:
+                    _context_caches.record_usage(response)
+                # 폴백 모델 응답은 원래 모델 키로 캐시하지 않음
+                if cache_key is not None and target == model and _response_has_text(response):
+                    await _response_cache.set(
+                        cache_key,
+                        response.model_dump_json(exclude_none=True, exclude={"sdk_http_response"}),
+                    )
                 return response
 
+            except (RetryBudgetExceeded, CircuitOpenError):
+                raise
             except (ServerErr, APIErr, ClientErr, httpx.HTTPError, TimeoutError, socket.timeout) as e:
+                if ctx_name and _is_context_cache_error(e):
+                    # 서버에서 만료/삭제된 캐시 → 잊고 바로 다시 시도(다음 조회에서 재생성)
+                    last_exc = e
+                    _context_caches.invalidate(ctx_name)
+                    logger.warning(f"[genai:text] context cache {ctx_name} unusable: {e}")
+                    continue
                 if _is_retryable_error(e):
                     last_exc = e
                     delay = _jittered_backoff(attempt)
                     logger.warning(
                         f"[genai:text] transient error (attempt {attempt + 1}/{GENAI_MAX_ATTEMPTS}): {e} → sleep {delay:.1f}s"
                     )
-                    await asyncio.sleep(delay)
+                    await budget_sleep(delay)
                     continue
                 last_exc = e
                 logger.exception(f"[genai:text] non-retryable error: {e}")
@@ -187,6 +658,127 @@ class ContentGenerateService:
 
         raise last_exc or RuntimeError("generate_content failed after retries")
 
+    async def generate_content_stream(
+        self,
+        model_or_req: Any,
+        contents: Optional[Any] = None,
+        *,
+        use_cache: bool = True,
+        refresh_cache: bool = False,
+        cache_prefix: int = 0,
+    ) -> AsyncIterator[Any]:
+        """
+        generate_content 의 스트리밍 버전: 응답 청크(GenerateContentResponse)를 도착 즉시 yield.
+        - 캐시 hit 이면 전체 응답을 청크 1개로 돌려줌 (refresh_cache=True 면 조회는 건너뛰고 저장만)
+        - 재시도는 하지 않음(이미 내보낸 부분 출력이 있으므로 호출자가 판단)
+        - 소비자가 중간에 aclose()/취소하면 스트림과 동시성 슬롯을 즉시 반납
+        - GENAI_USE_ASYNC=0 이면 단일 호출 결과를 청크 1개로 반환
+        - cache_prefix: generate_content 와 동일(앞 메시지들을 컨텍스트 캐시로)
+        """
+        model, ga_contents = self._resolve_text_args(model_or_req, contents)
+
+        cache_key: Optional[str] = None
+        if use_cache and _response_cache is not None:
+            cache_key = make_cache_key(model, ga_contents)
+            cached = None if refresh_cache else await _response_cache.get(cache_key)
+            if cached is not None:
+                try:
+                    response = gatypes.GenerateContentResponse.model_validate_json(cached)
+                except Exception as e:
+                    logger.warning(f"[genai:stream] cached response decode failed: {e}")
+                else:
+                    meter_cache_hit()
+                    yield response
+                    return
+
+        target = route_model(model)
+        if target != model:
+            logger.warning(f"[genai:stream] circuit open for {model} → fallback {target}")
+
+        call_contents, call_config, ctx_name = await self._split_cached_prefix(target, ga_contents, cache_prefix)
+
+        if not GENAI_USE_ASYNC:
+            yield await self._limited_generate(target, call_contents, call_config)
+            return
+
+        spend_attempt(f"genai:stream:{target}")
+        breaker = _breakers.get(target)
+        if not breaker.try_acquire():
+            raise CircuitOpenError(f"circuit open for {target}")
+        rate = _rate_limiters.get(target)
+        texts: List[str] = []
+        last_chunk: Any = None
+        try:
+            reservation = await rate.acquire(_estimate_tokens(call_contents))
+            slot_wait_from = time.monotonic()
+            async with _limiters.get(target).slot() as slot:
+                started = time.monotonic()
+                completed = False
+                stream = None
+                try:
+                    stream = await asyncio.wait_for(
+                        self.client.aio.models.generate_content_stream(
+                            model=target, contents=call_contents, config=call_config,
+                        ),
+                        timeout=budget_timeout(GENAI_CALL_TIMEOUT_SEC),
+                    )
+                    while True:
+                        try:
+                            # 청크 사이 정체(stall)도 타임아웃으로 끊음
+                            chunk = await asyncio.wait_for(stream.__anext__(), timeout=budget_timeout(GENAI_CALL_TIMEOUT_SEC))
+                        except StopAsyncIteration:
+                            completed = True
+                            break
+                        last_chunk = chunk
+                        for p in _chunk_parts(chunk):
+                            t = getattr(p, "text", None)
+                            if isinstance(t, str):
+                                texts.append(t)
+                        yield chunk
+                except Exception as e:
+                    if _is_rate_limit_error(e):
+                        slot.overloaded()
+                    if ctx_name and _is_context_cache_error(e):
+                        _context_caches.invalidate(ctx_name)  # 호출자 재시도 시 재생성
+                    rate.reconcile(reservation, reservation.tokens - GENAI_EST_OUTPUT_TOKENS)
+                    raise
+                finally:
+                    if stream is not None and hasattr(stream, "aclose"):
+                        try:
+                            await stream.aclose()
+                        except Exception:
+                            pass
+                    # 소비자가 중간에 끊은 스트림(가드 중단 등)도 실패 호출로 계측
+                    meter_call(
+                        target,
+                        response=last_chunk,
+                        wall_sec=time.monotonic() - started,
+                        queue_wait_sec=reservation.waited_sec + (started - slot_wait_from),
+                        ok=completed,
+                    )
+        except BaseException as e:
+            _record_outcome(breaker, e)
+            raise
+        _record_outcome(breaker, None)
+        rate.reconcile(reservation, _usage_total_tokens(last_chunk))
+        if ctx_name:
+            _context_caches.record_usage(last_chunk)
+
+        full_text = "".join(texts)
+        finish = chunk_finish_reason(last_chunk)
+        if cache_key is not None and target == model and full_text.strip() and finish != "MAX_TOKENS":
+            merged = gatypes.GenerateContentResponse(
+                candidates=[gatypes.Candidate(
+                    content=gatypes.Content(role="model", parts=[gatypes.Part(text=full_text)]),
+                    finish_reason=getattr(_chunk_candidate(last_chunk), "finish_reason", None),
+                )],
+                usage_metadata=getattr(last_chunk, "usage_metadata", None),
+            )
+            await _response_cache.set(
+                cache_key,
+                merged.model_dump_json(exclude_none=True, exclude={"sdk_http_response"}),
+            )
+
     # ============== IMAGE ==============
     async def generate_image(self, image_model_or_req: Any, contents: Optional[str] = None):
         """
@@ -214,17 +806,16 @@ class ContentGenerateService:
 
         for attempt in range(GENAI_MAX_ATTEMPTS):
             try:
-                async with _genai_sem:
-                    def _call():
-                        return self.client.models.generate_content(
-                            model=image_model,
-                            contents=contents,
-                            config=gatypes.GenerateContentConfig(
-                                response_modalities=['TEXT', 'IMAGE']
-                            ),
-                        )
-
-                    response = await asyncio.to_thread(_call)
+                target = route_model(image_model)
+                if target != image_model:
+                    logger.warning(f"[genai:image] circuit open for {image_model} → fallback {target}")
+                response = await self._limited_generate(
+                    target,
+                    contents,
+                    gatypes.GenerateContentConfig(
+                        response_modalities=['TEXT', 'IMAGE']
+                    ),
+                )
 
                 saved_image_paths: list[str] = []
                 try:
@@ -232,6 +823,7 @@ class ContentGenerateService:
                 except Exception:
                     parts = []
 
+                pending_saves = []
                 for part in parts:
                     if getattr(part, "text", None):
                         logger.info(f"[genai:image] text part: {part.text[:200]}...")
@@ -239,34 +831,29 @@ class ContentGenerateService:
                     inline = getattr(part, "inline_data", None)
                     if inline is None:
                         continue
-                    bin_ = _decode_inline_data(getattr(inline, "data", None))
-                    if not bin_:
+                    buf = _decode_inline_data(getattr(inline, "data", None))
+                    if buf is None or not len(buf):
                         continue
-                    mime = getattr(inline, "mime_type", None)
-                    ext = "png"
-                    if isinstance(mime, str):
-                        if "jpeg" in mime or "jpg" in mime:
-                            ext = "jpg"
-                        elif "webp" in mime:
-                            ext = "webp"
-                        elif "gif" in mime:
-                            ext = "gif"
-                    try:
-                        path = _save_image_bytes(bin_, out_dir, ext)
-                        saved_image_paths.append(path)
-                    except Exception as e:
-                        logger.warning(f"[genai:image] save failed: {e}")
+                    pending_saves.append(_persist_image(buf, out_dir, getattr(inline, "mime_type", None)))
+
+                for res in await asyncio.gather(*pending_saves, return_exceptions=True):
+                    if isinstance(res, BaseException):
+                        logger.warning(f"[genai:image] save failed: {res}")
+                    else:
+                        saved_image_paths.append(res)
 
                 if not saved_image_paths:
                     delay = _jittered_backoff(attempt)
                     logger.warning(
                         f"[genai:image] no images in response (attempt {attempt+1}/{GENAI_MAX_ATTEMPTS}) → sleep {delay:.1f}s"
                     )
-                    await asyncio.sleep(delay)
+                    await budget_sleep(delay)
                     continue
 
                 return saved_image_paths
 
+            except (RetryBudgetExceeded, CircuitOpenError):
+                raise
             except (ServerErr, APIErr, ClientErr, httpx.HTTPError, TimeoutError, socket.timeout) as e:
                 if _is_retryable_error(e):
                     last_exc = e
@@ -274,7 +861,7 @@ class ContentGenerateService:
                     logger.warning(
                         f"[genai:image] transient error (attempt {attempt + 1}/{GENAI_MAX_ATTEMPTS}): {e} → sleep {delay:.1f}s"
                     )
-                    await asyncio.sleep(delay)
+                    await budget_sleep(delay)
                     continue
                 last_exc = e
                 logger.exception(f"[genai:image] non-retryable error: {e}")
@@ -285,3 +872,16 @@ class ContentGenerateService:
                 raise
 
         raise last_exc or RuntimeError("generate_image failed after retries")
+
+
+# 프롬프트 접두부 컨텍스트 캐시 (서비스와 같은 클라이언트 사용)
+_context_caches: Optional[ContextCacheManager] = (
+    ContextCacheManager(
+        ContentGenerateService.client,
+        ttl_sec=GENAI_CONTEXT_CACHE_TTL_SEC,
+        refresh_margin_sec=GENAI_CONTEXT_CACHE_REFRESH_SEC,
+        min_tokens=GENAI_CONTEXT_CACHE_MIN_TOKENS,
+        chars_per_token=GENAI_CHARS_PER_TOKEN,
+    )
+    if GENAI_CONTEXT_CACHE_ENABLED else None
+)
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+import unicodedata
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from PIL import Image
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from db import get_async_session_factory
+from models.image_library import ImageAsset
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ──────────────────────────────────────────────────────────────
+# 정규화/해시 헬퍼
+# ──────────────────────────────────────────────────────────────
+def normalize_prompt(text: str) -> str:
+    """NFKC + 소문자 + 문장부호 제거 + 공백 정리 (같은 의미의 사소한 표기 차이를 흡수)"""
+    s = unicodedata.normalize("NFKC", text or "").lower()
+    s = re.sub(r"[^\w\s]", " ", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def prompt_hash(norm: str) -> str:
+    return hashlib.sha256(norm.encode("utf-8")).hexdigest()
+
+
+def _bigrams(norm: str) -> FrozenSet[str]:
+    # 한국어는 조사 때문에 단어 단위 비교가 약해서 공백 제거 후 문자 bigram 사용
+    s = norm.replace(" ", "")
+    return frozenset(s[i:i + 2] for i in range(len(s) - 1)) or frozenset([s])
+
+
+def _words(norm: str) -> FrozenSet[str]:
+    return frozenset(norm.split())
+
+
+def _numbers(norm: str) -> FrozenSet[str]:
+    # 연도/수치가 다르면 다른 차트 ("2023년" vs "2024년" 은 bigram 으로는 0.89 나 됨)
+    return frozenset(re.findall(r"\d+", norm))
+
+
+def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def dhash_file(path: str, size: int = 8) -> str:
+    """64bit difference hash(hex). 재인코딩/리사이즈에는 거의 변하지 않음"""
+    with Image.open(path) as im:
+        g = im.convert("L").resize((size + 1, size), Image.Resampling.LANCZOS)
+        px = g.load()
+        bits = 0
+        for y in range(size):
+            for x in range(size):
+                bits = (bits << 1) | (1 if px[x, y] > px[x + 1, y] else 0)
+    return f"{bits:016x}"
+
+
+def hamming(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+@dataclass
+class _Indexed:
+    id: int
+    prompt_norm: str
+    prompt_hash: str
+    grams: FrozenSet[str]
+    words: FrozenSet[str]
+    numbers: FrozenSet[str]
+    phash: Optional[str]
+    media_id: int
+    image_url: str
+
+
+def _indexed(id: int, norm: str, h: str, phash: Optional[str], media_id: int, image_url: str) -> _Indexed:
+    return _Indexed(id, norm, h, _bigrams(norm), _words(norm), _numbers(norm), phash, media_id, image_url)
+
+
+@dataclass
+class LibraryHit:
+    media_id: int
+    image_url: str
+    match: str          # exact | fuzzy
+    score: float
+
+
+# ──────────────────────────────────────────────────────────────
+# 생성 이미지 라이브러리
+#   - lookup: 정규화 프롬프트 완전 일치 → (IMG_LIBRARY_FUZZY_ENABLED 일 때만) 유사 일치
+#     유사 일치는 숫자 토큰이 모두 같고, 단어 Jaccard 와 문자 bigram Jaccard 가 둘 다 임계값 이상인 것 중 최고점
+#     ("rising" vs "falling" 처럼 단어 하나만 바뀐 프롬프트는 bigram 으로는 비슷해도 다른 차트라 거름)
+#   - record: 업로드 결과(media_id/url)를 프롬프트와 dHash 로 색인.
+#     이미 거의 같은 이미지(해밍거리 ≤ IMG_LIBRARY_PHASH_MAX_DISTANCE)가 있으면 그 미디어를 가리키게 저장
+#   - 인덱스는 최근 IMG_LIBRARY_MAX_ENTRIES 행을 메모리에 두고 IMG_LIBRARY_REFRESH_SEC 마다 다시 읽음
+#     (다른 워커가 기록한 행 반영)
+# ──────────────────────────────────────────────────────────────
+class ImageLibrary:
+    def __init__(
+        self,
+        *,
+        fuzzy_enabled: Optional[bool] = None,
+        fuzzy_threshold: Optional[float] = None,
+        phash_max_distance: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        refresh_sec: Optional[float] = None,
+    ):
+        self.fuzzy_enabled = fuzzy_enabled if fuzzy_enabled is not None else settings.IMG_LIBRARY_FUZZY_ENABLED
+        self.fuzzy_threshold = fuzzy_threshold if fuzzy_threshold is not None else settings.IMG_LIBRARY_FUZZY_THRESHOLD
+        self.phash_max_distance = phash_max_distance if phash_max_distance is not None else settings.IMG_LIBRARY_PHASH_MAX_DISTANCE
+        self.max_entries = max_entries or settings.IMG_LIBRARY_MAX_ENTRIES
+        self.refresh_sec = refresh_sec if refresh_sec is not None else settings.IMG_LIBRARY_REFRESH_SEC
+        self._entries: List[_Indexed] = []
+        self._by_hash: Dict[str, _Indexed] = {}
+        self._loaded_at = 0.0
+        self._load_lock = asyncio.Lock()
+        self.stats = {"exact_hits": 0, "fuzzy_hits": 0, "misses": 0, "records": 0, "phash_dups": 0, "errors": 0}
+
+    def _add(self, e: _Indexed) -> None:
+        if e.prompt_hash in self._by_hash:
+            return
+        self._entries.append(e)
+        self._by_hash[e.prompt_hash] = e
+        if len(self._entries) > self.max_entries:
+            old = self._entries.pop(0)
+            self._by_hash.pop(old.prompt_hash, None)
+
+    async def _ensure_loaded(self) -> None:
+        if self._loaded_at and time.monotonic() - self._loaded_at < self.refresh_sec:
+            return
+        async with self._load_lock:
+            if self._loaded_at and time.monotonic() - self._loaded_at < self.refresh_sec:
+                return
+            AsyncSessionLocal = get_async_session_factory()
+            async with AsyncSessionLocal() as session:
+                rows = (await session.execute(
+                    select(ImageAsset).order_by(ImageAsset.id.desc()).limit(self.max_entries)
+                )).scalars().all()
+            self._entries, self._by_hash = [], {}
+            for r in reversed(rows):
+                self._add(_indexed(r.id, r.prompt_norm, r.prompt_hash, r.phash, r.media_id, r.image_url))
+            self._loaded_at = time.monotonic()
+            logger.info(f"[image-library] loaded {len(self._entries)} entries")
+
+    async def _touch(self, asset_id: int) -> None:
+        AsyncSessionLocal = get_async_session_factory()
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(ImageAsset)
+                .where(ImageAsset.id == asset_id)
+                .values(hits=ImageAsset.hits + 1, last_used_at=datetime.now())
+            )
+            await session.commit()
+
+    async def lookup(self, prompt: str) -> Optional[LibraryHit]:
+        norm = normalize_prompt(prompt)
+        if not norm or not settings.IMG_LIBRARY_ENABLED:
+            return None
+        try:
+            await self._ensure_loaded()
+            hit: Optional[_Indexed] = self._by_hash.get(prompt_hash(norm))
+            match, score = "exact", 1.0
+            if hit is None and self.fuzzy_enabled:
+                grams, words, numbers = _bigrams(norm), _words(norm), _numbers(norm)
+                best, best_score = None, 0.0
+                for e in self._entries:
+                    if e.numbers != numbers or _jaccard(words, e.words) < self.fuzzy_threshold:
+                        continue
+                    s = _jaccard(grams, e.grams)
+                    if s > best_score:
+                        best, best_score = e, s
+                if best is not None and best_score >= self.fuzzy_threshold:
+                    hit, match, score = best, "fuzzy", best_score
+            if hit is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats[f"{match}_hits"] += 1
+            await self._touch(hit.id)
+            logger.info(f"[image-library] {match} hit media_id={hit.media_id} score={score:.2f}")
+            return LibraryHit(hit.media_id, hit.image_url, match, round(score, 3))
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"[image-library] lookup failed, generating instead: {e}")
+            return None
+
+    async def record(self, prompt: str, image_path: Optional[str], media_id: Any, image_url: str) -> None:
+        norm = normalize_prompt(prompt)
+        if not norm or not settings.IMG_LIBRARY_ENABLED or media_id is None or not image_url:
+            return
+        try:
+            await self._ensure_loaded()
+            phash = await asyncio.to_thread(dhash_file, image_path) if image_path else None
+            if phash:
+                dup = next(
+                    (e for e in self._entries if e.phash and hamming(phash, e.phash) <= self.phash_max_distance),
+                    None,
+                )
+                if dup is not None:
+                    # 거의 같은 이미지가 이미 있으면 그 미디어로 별칭 등록 (라이브러리가 중복 미디어로 갈라지지 않게)
+                    self.stats["phash_dups"] += 1
+                    media_id, image_url = dup.media_id, dup.image_url
+
+            h = prompt_hash(norm)
+            AsyncSessionLocal = get_async_session_factory()
+            async with AsyncSessionLocal() as session:
+                row = ImageAsset(
+                    prompt=prompt, prompt_norm=norm, prompt_hash=h, phash=phash,
+                    media_id=int(media_id), image_url=image_url,
+                )
+                session.add(row)
+                try:
+                    await session.commit()
+                except IntegrityError:
+                    await session.rollback()   # 동시에 같은 프롬프트가 기록됨
+                    return
+                await session.refresh(row)
+            self._add(_indexed(row.id, norm, h, phash, row.media_id, row.image_url))
+            self.stats["records"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"[image-library] record failed: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), **self.stats}
+
+
+image_library = ImageLibrary()
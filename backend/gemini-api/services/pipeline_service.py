@@ -2,6 +2,7 @@
 from sqlalchemy.orm import Session
 from models.pipeline import Pipeline
 from schemas.pipeline_schema import PipelineCreate, PipelineUpdate
+from services.prompt_repository import prompt_repository
 
 class PipelineService:
 
@@ -22,6 +23,7 @@ class PipelineService:
         db.add(obj)
         db.commit()
         db.refresh(obj)
+        prompt_repository.invalidate("pipeline", obj.id)
         return obj
 
     # Pipeline 수정(부분 업데이트)
@@ -37,6 +39,7 @@ class PipelineService:
 
         db.commit()
         db.refresh(obj)
+        prompt_repository.invalidate("pipeline", pipeline_id)
         return obj
 
     # Pipeline 삭제
@@ -46,4 +49,5 @@ class PipelineService:
             return False
         db.delete(obj)
         db.commit()
+        prompt_repository.invalidate("pipeline", pipeline_id)
         return True
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from db import get_async_session_factory
+from models.pipeline import Pipeline
+from models.prompt import Prompt
+from settings import settings
+
+try:
+    import redis  # 선택
+    from redis.asyncio import Redis as AsyncRedis
+except ImportError:
+    redis = None
+    AsyncRedis = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PipelineDef:
+    id: int
+    prompt_array: str
+    description: str
+
+
+# ──────────────────────────────────────────────────────────────
+# 프롬프트/파이프라인 저장소 (프로세스 내 캐시)
+#   - 실행마다 파이프라인 1회 + 단계별 프롬프트 N회 동기 SELECT 하던 것을
+#     async 세션의 pipeline 1회 + prompts IN 1회로, 그 뒤로는 캐시에서
+#   - 무효화: PromptService/PipelineService 의 쓰기 경로가 invalidate 호출 → 버전 증가 + 해당 키 제거
+#     (조회 도중 무효화되면 버전이 달라져 그 결과는 캐시에 넣지 않음)
+#   - redis_url 이 있으면 무효화를 pub/sub 로 다른 레플리카에도 전파 (listen 태스크)
+#   - DB 를 직접 고친 경우는 PROMPT_CACHE_TTL_SEC 후 다시 읽음
+# ──────────────────────────────────────────────────────────────
+class PromptRepository:
+    def __init__(self, *, ttl_sec: float, redis_url: Optional[str] = None, channel: str = "prompt-cache:invalidate"):
+        self.ttl_sec = ttl_sec
+        self.channel = channel
+        self._redis_url = redis_url if (redis_url and redis) else None
+        self._pub = None
+        self._origin = uuid.uuid4().hex
+        self._prompts: Dict[int, Tuple[float, str]] = {}
+        self._pipelines: Dict[int, Tuple[float, PipelineDef]] = {}
+        self._version = 0
+        self._lock = threading.Lock()  # 쓰기 API 는 sync 라우트(스레드풀)에서 호출됨
+        self.hits = 0
+        self.misses = 0
+        self.queries = 0
+        self.invalidations = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _fresh(self, loaded_at: float) -> bool:
+        return time.monotonic() - loaded_at < self.ttl_sec
+
+    # --- 조회 ---
+    async def get_pipeline(self, pipeline_id: int) -> PipelineDef:
+        hit = self._pipelines.get(pipeline_id)
+        if hit is not None and self._fresh(hit[0]):
+            self.hits += 1
+            return hit[1]
+
+        self.misses += 1
+        v = self._version
+        AsyncSessionLocal = get_async_session_factory()
+        async with AsyncSessionLocal() as session:
+            row = (await session.execute(select(Pipeline).where(Pipeline.id == pipeline_id))).scalar_one_or_none()
+        self.queries += 1
+        if row is None:
+            raise ValueError(f"pipeline {pipeline_id} not found")
+        p = PipelineDef(id=row.id, prompt_array=row.prompt_array, description=row.description)
+        with self._lock:
+            if self._version == v:
+                self._pipelines[pipeline_id] = (time.monotonic(), p)
+        return p
+
+    async def get_prompts(self, prompt_ids: Iterable[Any]) -> Dict[str, str]:
+        """→ {str(id): 템플릿}. 캐시에 없는 id 만 IN 쿼리 1회로 읽음"""
+        ids = [int(x) for x in prompt_ids]
+        out: Dict[str, str] = {}
+        missing: List[int] = []
+        for i in ids:
+            hit = self._prompts.get(i)
+            if hit is not None and self._fresh(hit[0]):
+                out[str(i)] = hit[1]
+            else:
+                missing.append(i)
+        self.hits += len(ids) - len(missing)
+        if not missing:
+            return out
+
+        self.misses += len(missing)
+        v = self._version
+        AsyncSessionLocal = get_async_session_factory()
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(select(Prompt.id, Prompt.prompt).where(Prompt.id.in_(missing)))).all()
+        self.queries += 1
+        now = time.monotonic()
+        with self._lock:
+            for pid, text in rows:
+                out[str(pid)] = text
+                if self._version == v:
+                    self._prompts[pid] = (now, text)
+
+        not_found = [i for i in missing if str(i) not in out]
+        if not_found:
+            raise ValueError(f"prompts not found: {not_found}")
+        return out
+
+    # --- 무효화 ---
+    def invalidate(self, kind: str, obj_id: Optional[int] = None, *, publish: bool = True) -> None:
+        """kind: prompt | pipeline, obj_id 가 None 이면 해당 종류 전체"""
+        target = self._prompts if kind == "prompt" else self._pipelines
+        with self._lock:
+            self._version += 1
+            if obj_id is None:
+                target.clear()
+            else:
+                target.pop(int(obj_id), None)
+            self.invalidations += 1
+        if publish and self._redis_url:
+            try:
+                if self._pub is None:
+                    self._pub = redis.Redis.from_url(self._redis_url)
+                self._pub.publish(self.channel, json.dumps({"kind": kind, "id": obj_id, "origin": self._origin}))
+            except Exception as e:
+                logger.warning(f"[prompt-repo] invalidation publish failed: {e}")
+
+    async def listen(self) -> None:
+        """다른 레플리카의 무효화 수신 (앱 시작 시 태스크로 실행, redis_url 이 없으면 바로 종료)"""
+        if not self._redis_url or AsyncRedis is None:
+            return
+        while True:
+            client = AsyncRedis.from_url(self._redis_url)
+            try:
+                pubsub = client.pubsub()
+                await pubsub.subscribe(self.channel)
+                async for msg in pubsub.listen():
+                    if msg.get("type") != "message":
+                        continue
+                    try:
+                        d = json.loads(msg["data"])
+                    except Exception:
+                        continue
+                    if d.get("origin") != self._origin:
+                        self.invalidate(d.get("kind", "prompt"), d.get("id"), publish=False)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[prompt-repo] invalidation listener error, reconnecting: {e}")
+                await asyncio.sleep(5.0)
+            finally:
+                try:
+                    await client.aclose()
+                except Exception:
+                    pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "version": self._version,
+            "prompts": len(self._prompts),
+            "pipelines": len(self._pipelines),
+            "hits": self.hits,
+            "misses": self.misses,
+            "queries": self.queries,
+            "invalidations": self.invalidations,
+            "redis": bool(self._redis_url),
+        }
+
+
+prompt_repository = PromptRepository(
+    ttl_sec=settings.PROMPT_CACHE_TTL_SEC,
+    redis_url=settings.redis_url,
+    channel=settings.PROMPT_CACHE_CHANNEL,
+)
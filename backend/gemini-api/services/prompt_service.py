@@ -2,6 +2,7 @@ import logging
 from sqlalchemy.orm import Session
 from models.prompt import Prompt
 from schemas.prompt_schema import PromptCreate, PromptUpdate
+from services.prompt_repository import prompt_repository
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +25,7 @@ class PromptService:
         db.add(create_prompt)
         db.commit()
         db.refresh(create_prompt)
+        prompt_repository.invalidate("prompt", create_prompt.id)
         return create_prompt
 
     # PROMPT 업데이트
@@ -35,6 +37,7 @@ class PromptService:
         db_prompt.prompt = prompt.prompt
         db.commit()
         db.refresh(db_prompt)
+        prompt_repository.invalidate("prompt", prompt_id)
         return db_prompt
 
     # PROMPT 삭제
@@ -46,4 +49,5 @@ class PromptService:
             return None
         db.delete(db_prompt)
         db.commit()
+        prompt_repository.invalidate("prompt", prompt_id)
         return delete_prompt_id
\ No newline at end of file
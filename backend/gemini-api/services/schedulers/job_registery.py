@@ -1,9 +1,10 @@
 from typing import Awaitable, Callable, Dict
-from services.schedulers.jobs import example_batch, image_cleanup
+from services.schedulers.jobs import example_batch, image_cleanup, content_init_batch
 
 JobFunc = Callable[[dict], Awaitable[dict]]
 
 REGISTRY: Dict[str, JobFunc] = {
     "example.batch": example_batch,
     "image.cleanup": image_cleanup,
+    "content.init_batch": content_init_batch,
 }
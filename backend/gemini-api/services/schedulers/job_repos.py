@@ -1,5 +1,5 @@
-from typing import List, Dict, Optional
-from sqlalchemy import select
+from typing import Any, List, Dict, Optional
+from sqlalchemy import select, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone
 
@@ -16,20 +16,28 @@ async def get_job(session: AsyncSession, job_id: str) -> Optional[Job]:
     return res.scalar_one_or_none()
 
 
+def utcnow_naive() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)  # MySQL TIMESTAMP naive 저장
+
+
 async def create_job_run(session: AsyncSession, job_id: str, scheduled_time: Optional[datetime]) -> int:
-    now = datetime.now(timezone.utc).replace(tzinfo=None)  # MySQL TIMESTAMP naive 저장
-    run = JobRun(job_id=job_id, scheduled_time=scheduled_time, start_time=now, status="running")
-    session.add(run)
-    await session.flush()
-    return int(run.id)
+    """INSERT 한 번, run id 는 lastrowid 로 (재조회 없음)"""
+    res = await session.execute(
+        insert(JobRun).values(job_id=job_id, scheduled_time=scheduled_time, start_time=utcnow_naive(), status="running")
+    )
+    return int(res.inserted_primary_key[0])
 
 
 async def finish_job_run(session: AsyncSession, run_id: int, status: str, result: Optional[Dict], error_text: Optional[str]):
-    res = await session.execute(select(JobRun).where(JobRun.id == run_id))
-    run = res.scalar_one()
-    now = datetime.now(timezone.utc).replace(tzinfo=None)
-    run.end_time = now
-    run.status = status
-    run.result_json = result
-    run.error_text = error_text
-    await session.flush()
+    """UPDATE ... WHERE id= 한 번 (행을 먼저 읽지 않음)"""
+    await session.execute(
+        update(JobRun)
+        .where(JobRun.id == run_id)
+        .values(end_time=utcnow_naive(), status=status, result_json=result, error_text=error_text)
+    )
+
+
+async def insert_finished_runs(session: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """끝난 실행 여러 건을 다건 INSERT 한 번으로 (rows: job_id, scheduled_time, start_time, end_time, status, result_json, error_text)"""
+    if rows:
+        await session.execute(insert(JobRun), rows)
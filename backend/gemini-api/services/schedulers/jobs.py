@@ -23,3 +23,32 @@ async def image_cleanup(params: Dict) -> Dict:
     result = {"status": "ok", "deleted": deleted, "older_than_days": days}
     logger.info("[DONE] image_cleanup result=%s", result)
     return result
+
+async def content_init_batch(params: Dict) -> Dict:
+    """여러 토픽의 init_content 파이프라인을 배치 모드로 실행 (params: topics, pipeline_id, ...)"""
+    # 스케줄러 기동 시 생성 서비스/DB 모듈을 끌어오지 않도록 지연 import
+    from services.db_service import get_db
+    from operators.init_content import run_init_content_batch
+
+    topics = [str(t) for t in (params.get("topics") or []) if str(t).strip()]
+    if not topics:
+        return {"status": "skipped", "reason": "no topics"}
+    logger.info("[START] content_init_batch topics=%s", len(topics))
+    db_gen = get_db()
+    db = next(db_gen)
+    try:
+        result = await run_init_content_batch(
+            db,
+            topics=topics,
+            photo_count=int(params.get("photo_count", 1)),
+            llm_model=params.get("llm_model"),
+            pipeline_id=int(params.get("pipeline_id", 1)),
+            target_chars=params.get("target_chars"),
+        )
+    finally:
+        try:
+            next(db_gen)
+        except StopIteration:
+            pass
+    logger.info("[DONE] content_init_batch ok=%s failed=%s", result["ok"], result["failed"])
+    return {"status": "ok", **result}
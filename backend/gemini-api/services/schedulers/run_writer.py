@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from db import get_async_session_factory
+from services.schedulers.job_repos import create_job_run, finish_job_run, insert_finished_runs, utcnow_naive
+
+logger = logging.getLogger(__name__)
+
+
+# ──────────────────────────────────────────────────────────────
+# job_runs 기록기
+#   - direct(기본): 시작 시 INSERT 1회(run id = lastrowid), 종료 시 UPDATE ... WHERE id= 1회
+#     실행 전에 건너뛴 경우(비활성/미등록 함수/락)는 끝난 행 INSERT 1회
+#   - buffered: 시작 행은 쓰지 않고, 끝난 실행을 모아 flush_sec 마다(또는 max_pending 건) 다건 INSERT 1회
+#     → 고빈도 잡의 DB 왕복이 실행당 2회에서 배치당 1회로. 대신 실행 중인 run 은 job_runs 에 보이지 않음
+# ──────────────────────────────────────────────────────────────
+class JobRunWriter:
+    def __init__(self, *, buffered: bool = False, flush_sec: float = 2.0, max_pending: int = 100):
+        self.buffered = buffered
+        self.flush_sec = flush_sec
+        self.max_pending = max(1, max_pending)
+        self._pending: List[Dict[str, Any]] = []
+        self._flush_lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self.writes = 0
+        self.flushed_rows = 0
+
+    async def start(self, job_id: str, scheduled_time: Optional[datetime]) -> Dict[str, Any]:
+        """실행 시작 → 종료 때 finish 에 넘길 핸들"""
+        run = {"job_id": job_id, "scheduled_time": scheduled_time, "start_time": utcnow_naive(), "id": None}
+        if not self.buffered:
+            AsyncSessionLocal = get_async_session_factory()
+            async with AsyncSessionLocal() as session:
+                run["id"] = await create_job_run(session, job_id, scheduled_time)
+                await session.commit()
+            self.writes += 1
+        return run
+
+    async def finish(self, run: Dict[str, Any], status: str, result: Optional[Dict], error_text: Optional[str]) -> None:
+        if run.get("id") is not None:
+            AsyncSessionLocal = get_async_session_factory()
+            async with AsyncSessionLocal() as session:
+                await finish_job_run(session, run["id"], status, result, error_text)
+                await session.commit()
+            self.writes += 1
+            return
+        await self._write_finished({
+            "job_id": run["job_id"],
+            "scheduled_time": run["scheduled_time"],
+            "start_time": run["start_time"],
+            "end_time": utcnow_naive(),
+            "status": status,
+            "result_json": result,
+            "error_text": error_text,
+        })
+
+    async def record(
+        self, job_id: str, scheduled_time: Optional[datetime], status: str,
+        result: Optional[Dict], error_text: Optional[str],
+    ) -> None:
+        """실행 전에 끝난 run(skipped/error) 한 건"""
+        now = utcnow_naive()
+        await self._write_finished({
+            "job_id": job_id, "scheduled_time": scheduled_time, "start_time": now, "end_time": now,
+            "status": status, "result_json": result, "error_text": error_text,
+        })
+
+    async def _write_finished(self, row: Dict[str, Any]) -> None:
+        if not self.buffered:
+            AsyncSessionLocal = get_async_session_factory()
+            async with AsyncSessionLocal() as session:
+                await insert_finished_runs(session, [row])
+                await session.commit()
+            self.writes += 1
+            return
+        self._pending.append(row)
+        if len(self._pending) >= self.max_pending:
+            await self.flush()
+        elif self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_sec)
+        await self.flush()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            rows, self._pending = self._pending, []
+            try:
+                AsyncSessionLocal = get_async_session_factory()
+                async with AsyncSessionLocal() as session:
+                    await insert_finished_runs(session, rows)
+                    await session.commit()
+                self.writes += 1
+                self.flushed_rows += len(rows)
+            except Exception:
+                logger.exception("job_runs flush failed (%s rows), retrying on next flush", len(rows))
+                self._pending[:0] = rows
+                overflow = len(self._pending) - self.max_pending * 10
+                if overflow > 0:
+                    del self._pending[:overflow]
+                    logger.warning("job_runs buffer full, dropped %s oldest rows", overflow)
+
+    async def aclose(self) -> None:
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+        await self.flush()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "buffered": self.buffered,
+            "pending": len(self._pending),
+            "writes": self.writes,
+            "flushed_rows": self.flushed_rows,
+        }
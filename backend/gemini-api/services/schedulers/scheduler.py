@@ -1,4 +1,5 @@
 import logging
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
@@ -9,7 +10,8 @@ from settings import settings
 from services.schedulers.locking import acquire_lock
 from services.schedulers.job_registery import REGISTRY
 from db import get_async_session_factory
-from services.schedulers.job_repos import fetch_enabled_jobs, create_job_run, finish_job_run, get_job
+from services.schedulers.job_repos import fetch_enabled_jobs, get_job
+from services.schedulers.run_writer import JobRunWriter
 
 logger = logging.getLogger(__name__)
 
@@ -17,62 +19,85 @@ _scheduler: Optional[AsyncIOScheduler] = None
 _registered_versions: Dict[str, int] = {}
 
 
-async def _execute_job(job_id: str, params: Dict[str, Any], scheduled_time: Optional[datetime]):
-    # 실행 이력 생성
+@dataclass(frozen=True)
+class CachedJob:
+    """실행에 필요한 잡 필드만 (reconcile 때 갱신)"""
+    id: str
+    func_key: str
+    lock_key: str
+    version: int
+
+    @classmethod
+    def from_row(cls, j: Any) -> "CachedJob":
+        return cls(id=j.id, func_key=j.func_key, lock_key=j.lock_key or f"lock:{j.id}", version=j.version)
+
+
+# enabled 잡 캐시: 실행마다 jobs 를 다시 SELECT 하지 않음 (비활성화는 다음 reconcile(30초) 에 반영)
+_job_cache: Dict[str, CachedJob] = {}
+_run_writer = JobRunWriter(
+    buffered=settings.SCHEDULER_RUN_BUFFERED,
+    flush_sec=settings.SCHEDULER_RUN_FLUSH_SEC,
+    max_pending=settings.SCHEDULER_RUN_FLUSH_MAX,
+)
+
+
+async def _lookup_job(job_id: str) -> Optional[CachedJob]:
+    """reconcile 캐시에서 조회. 캐시에 없을 때만(run_now, 스케줄러 미기동, 막 켜진 잡) DB 1회"""
+    cached = _job_cache.get(job_id)
+    if cached is not None:
+        return cached
     AsyncSessionLocal = get_async_session_factory()
     async with AsyncSessionLocal() as session:
-        run_id = await create_job_run(session, job_id, scheduled_time)
-        await session.commit()
+        job = await get_job(session, job_id)
+    if not job or not job.enabled:
+        return None
+    return CachedJob.from_row(job)
+
 
+async def _execute_job(job_id: str, params: Dict[str, Any], scheduled_time: Optional[datetime]):
+    # 실행 전 상태/함수/락 확인 → 건너뛰면 끝난 run 한 건만 기록
     try:
-        # 실행 전 DB 상태/락/함수 확인
-        async with AsyncSessionLocal() as session:
-            job = await get_job(session, job_id)
-            if not job or not job.enabled:
-                status = {"status": "skipped", "reason": "disabled-or-missing", "job_id": job_id}
-                async with AsyncSessionLocal() as s2:
-                    await finish_job_run(s2, run_id, "skipped", status, None)
-                    await s2.commit()
-                return status
-
-            func = REGISTRY.get(job.func_key)
-            if not func:
-                msg = f"unknown func_key={job.func_key}"
-                async with AsyncSessionLocal() as s2:
-                    await finish_job_run(s2, run_id, "error", None, msg)
-                    await s2.commit()
-                return {"status": "error", "reason": msg, "job_id": job_id}
-
-            lock_key = job.lock_key or f"lock:{job.id}"
-
-        async with acquire_lock(settings.redis_url, lock_key) as lock:
+        job = await _lookup_job(job_id)
+        if job is None:
+            status = {"status": "skipped", "reason": "disabled-or-missing", "job_id": job_id}
+            await _run_writer.record(job_id, scheduled_time, "skipped", status, None)
+            return status
+
+        func = REGISTRY.get(job.func_key)
+        if not func:
+            msg = f"unknown func_key={job.func_key}"
+            await _run_writer.record(job_id, scheduled_time, "error", None, msg)
+            return {"status": "error", "reason": msg, "job_id": job_id}
+    except Exception as e:
+        logger.exception("job outer failed: %s", job_id)
+        return {"status": "error", "reason": f"outer: {e}", "job_id": job_id}
+
+    run = None
+    try:
+        async with acquire_lock(settings.redis_url, job.lock_key) as lock:
             if lock is None:
                 result = {"status": "skipped", "reason": "locked", "job_id": job_id}
-                async with AsyncSessionLocal() as session:
-                    await finish_job_run(session, run_id, "skipped", result, None)
-                    await session.commit()
+                await _run_writer.record(job_id, scheduled_time, "skipped", result, None)
                 return result
 
-            # 실제 잡 실행
+            # 실행 이력(시작) → 실제 잡 실행 → 종료 기록
+            run = await _run_writer.start(job_id, scheduled_time)
             try:
                 result = await func(params)
-                async with AsyncSessionLocal() as session:
-                    await finish_job_run(session, run_id, "ok", result, None)
-                    await session.commit()
-                return result
             except Exception as e:
                 logger.exception("job failed: %s", job_id)
-                async with AsyncSessionLocal() as session:
-                    await finish_job_run(session, run_id, "error", None, str(e))
-                    await session.commit()
+                await _run_writer.finish(run, "error", None, str(e))
                 return {"status": "error", "reason": str(e), "job_id": job_id}
+            await _run_writer.finish(run, "ok", result, None)
+            return result
 
     except Exception as e:
         logger.exception("job outer failed: %s", job_id)
-        AsyncSessionLocal = get_async_session_factory()
-        async with AsyncSessionLocal() as session:
-            await finish_job_run(session, run_id, "error", None, f"outer: {e}")
-            await session.commit()
+        if run is not None:
+            try:
+                await _run_writer.finish(run, "error", None, f"outer: {e}")
+            except Exception:
+                logger.exception("job run finish failed: %s", job_id)
         return {"status": "error", "reason": f"outer: {e}", "job_id": job_id}
 
 
@@ -96,6 +121,7 @@ async def _reconcile_jobs():
         seen = set()
         for j in jobs:
             seen.add(j.id)
+            _job_cache[j.id] = CachedJob.from_row(j)
             trigger = CronTrigger.from_crontab(j.cron_expr)
             params = j.params_json or {}
 
@@ -121,6 +147,7 @@ async def _reconcile_jobs():
                 except Exception:
                     pass
                 _registered_versions.pop(existing, None)
+                _job_cache.pop(existing, None)
                 logger.info("job %s removed (no longer enabled in DB)", existing)
 
     except Exception:
@@ -162,6 +189,8 @@ async def stop_scheduler() -> bool:
     finally:
         _scheduler = None
         _registered_versions.clear()
+        _job_cache.clear()
+        await _run_writer.aclose()
     return True
 
 
@@ -0,0 +1,145 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.content_job import ContentJob
+
+JOB_TYPE = "WRITE_AND_POST"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)  # MySQL DATETIME naive 저장
+
+
+async def enqueue_job(
+    session: AsyncSession,
+    payload: Dict[str, Any],
+    *,
+    max_attempts: int = 3,
+    scheduled_at: Optional[datetime] = None,
+) -> int:
+    now = _utcnow()
+    when = scheduled_at or now
+    job = ContentJob(
+        job_type=JOB_TYPE, payload=payload, scheduled_at=when, available_at=when,
+        status="queued", attempts=0, max_attempts=max_attempts,
+    )
+    session.add(job)
+    await session.flush()
+    return int(job.id)
+
+
+async def get_content_job(session: AsyncSession, job_id: int) -> Optional[ContentJob]:
+    res = await session.execute(select(ContentJob).where(ContentJob.id == job_id))
+    return res.scalar_one_or_none()
+
+
+async def claim_jobs(session: AsyncSession, worker_id: str, limit: int, lease_sec: int) -> List[ContentJob]:
+    """
+    실행 가능한 작업을 최대 limit 개 가져와 running 으로 표시 (호출 측에서 commit).
+    대상: queued 이거나, 리스(available_at)가 끝난 running(워커가 죽은 경우)
+    FOR UPDATE SKIP LOCKED: 다른 워커가 잠근 행은 건너뛰므로 워커끼리 같은 작업을 집지 않음
+    """
+    now = _utcnow()
+    res = await session.execute(
+        select(ContentJob)
+        .where(
+            ContentJob.job_type == JOB_TYPE,
+            ContentJob.status.in_(("queued", "running")),
+            ContentJob.available_at <= now,
+            ContentJob.scheduled_at <= now,
+            ContentJob.attempts < ContentJob.max_attempts,
+        )
+        .order_by(ContentJob.available_at, ContentJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    jobs = list(res.scalars().all())
+    for job in jobs:
+        job.status = "running"
+        job.attempts = (job.attempts or 0) + 1
+        job.started_at = now
+        job.available_at = now + timedelta(seconds=lease_sec)
+        job.worker_id = worker_id
+    await session.flush()
+    return jobs
+
+
+async def fail_expired_jobs(session: AsyncSession) -> int:
+    """리스가 끝났는데 재시도 횟수를 다 쓴 running 작업 → failed"""
+    now = _utcnow()
+    res = await session.execute(
+        update(ContentJob)
+        .where(
+            ContentJob.job_type == JOB_TYPE,
+            ContentJob.status == "running",
+            ContentJob.available_at < now,
+            ContentJob.attempts >= ContentJob.max_attempts,
+        )
+        .values(status="failed", finished_at=now, last_error="lease expired (worker lost)")
+    )
+    return int(res.rowcount or 0)
+
+
+async def extend_leases(session: AsyncSession, worker_id: str, job_ids: List[int], lease_sec: int) -> List[int]:
+    """하트비트: 아직 이 워커 소유인 작업의 리스 연장 → 소유가 유지된 id 목록"""
+    if not job_ids:
+        return []
+    owned = and_(
+        ContentJob.id.in_(job_ids),
+        ContentJob.worker_id == worker_id,
+        ContentJob.status == "running",
+    )
+    await session.execute(
+        update(ContentJob).where(owned).values(available_at=_utcnow() + timedelta(seconds=lease_sec))
+    )
+    res = await session.execute(select(ContentJob.id).where(owned))
+    return [int(i) for i in res.scalars().all()]
+
+
+async def complete_job(session: AsyncSession, job_id: int, worker_id: str, result: Optional[Dict]) -> bool:
+    res = await session.execute(
+        update(ContentJob)
+        .where(ContentJob.id == job_id, ContentJob.worker_id == worker_id, ContentJob.status == "running")
+        .values(status="done", finished_at=_utcnow(), result=result, last_error=None)
+    )
+    return bool(res.rowcount)
+
+
+async def fail_job(
+    session: AsyncSession,
+    job_id: int,
+    worker_id: str,
+    error_text: str,
+    *,
+    backoff_base_sec: int,
+    backoff_max_sec: int,
+    retry: bool = True,
+    result: Optional[Dict] = None,
+) -> Optional[str]:
+    """
+    실패 처리: 재시도가 남았으면 queued + available_at 지수 백오프, 아니면 failed.
+    → 새 status (이미 다른 워커가 가져간 작업이면 None)
+    """
+    res = await session.execute(
+        select(ContentJob).where(ContentJob.id == job_id, ContentJob.worker_id == worker_id, ContentJob.status == "running")
+    )
+    job = res.scalar_one_or_none()
+    if job is None:
+        return None
+    now = _utcnow()
+    job.last_error = (error_text or "")[:4000]
+    if result is not None:
+        job.result = result
+    if retry and job.attempts < job.max_attempts:
+        delay = min(backoff_max_sec, backoff_base_sec * (2 ** max(0, job.attempts - 1)))
+        job.status = "queued"
+        job.available_at = now + timedelta(seconds=delay)
+        job.worker_id = None
+    else:
+        job.status = "failed"
+        job.finished_at = now
+    await session.flush()
+    return job.status
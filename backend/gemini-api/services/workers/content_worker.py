@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from db import get_async_session_factory
+from operators.job_store import JobState, job_store
+from operators.topic_batch import RUNNERS
+from services.db_service import get_db
+from services.prompt_repository import prompt_repository
+from services.workers.content_job_repos import (
+    claim_jobs,
+    complete_job,
+    enqueue_job,
+    extend_leases,
+    fail_expired_jobs,
+    fail_job,
+)
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def enqueue_content_job(payload: Dict[str, Any], *, max_attempts: Optional[int] = None) -> int:
+    """API 용: content_jobs 에 작업 적재 → job id (워커가 가져가 실행)"""
+    AsyncSessionLocal = get_async_session_factory()
+    async with AsyncSessionLocal() as session:
+        jid = await enqueue_job(session, payload, max_attempts=max_attempts or settings.CONTENT_JOB_MAX_ATTEMPTS)
+        await session.commit()
+    return jid
+
+
+def _step_errors(result: Dict[str, Any]) -> Dict[str, str]:
+    return {k: v for k, v in (result.get("steps") or {}).items() if isinstance(v, str) and v.startswith("error:")}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# content_jobs 테이블 기반 워커
+#   - 빈 슬롯만큼 SELECT ... FOR UPDATE SKIP LOCKED 로 작업을 집어 running + 리스(available_at=now+lease)
+#     → 워커(레플리카)를 늘리면 처리량이 늘고, 같은 작업을 두 워커가 집지 않음
+#   - 하트비트: 실행 중 작업의 리스를 주기적으로 연장. 워커가 죽으면 리스가 끝난 작업을 다른 워커가 다시 집음
+#     (소유를 잃은 작업은 이중 포스팅을 막기 위해 취소. 연장이 계속 실패해 리스가 곧 끝날 작업도
+#      다른 워커가 다시 집기 전에 취소 — 마지막 연장 성공 후 lease_sec - heartbeat_sec 경과 기준)
+#   - 실패: 재시도가 남았으면 available_at 지수 백오프로 queued, 아니면 failed
+#     재시도는 같은 run_id + resume 이라 체크포인트된 단계는 건너뜀
+#   - 진행(단계 시작/종료, 부분 출력, 계측)은 job_store 에 job id 로 기록 → /post/status/{id}, /post/events/{id}
+# ──────────────────────────────────────────────────────────────────────────────
+class ContentWorker:
+    def __init__(
+        self,
+        *,
+        worker_id: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        poll_sec: Optional[float] = None,
+        lease_sec: Optional[int] = None,
+        heartbeat_sec: Optional[float] = None,
+        listen_prompts: bool = True,
+    ):
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.concurrency = max(1, concurrency or settings.CONTENT_WORKER_CONCURRENCY)
+        self.poll_sec = poll_sec or settings.CONTENT_WORKER_POLL_SEC
+        self.lease_sec = lease_sec or settings.CONTENT_WORKER_LEASE_SEC
+        self.heartbeat_sec = heartbeat_sec or settings.CONTENT_WORKER_HEARTBEAT_SEC
+        self.listen_prompts = listen_prompts  # API 프로세스 안에서 돌면 main 이 이미 구독 중
+        self._active: Dict[int, asyncio.Task] = {}
+        self._lease_ok: Dict[int, float] = {}   # job id → 마지막 리스 확보/연장 성공 시각(monotonic)
+        self._stopping = asyncio.Event()
+        self.claimed = 0
+        self.done = 0
+        self.failed = 0
+        self.retried = 0
+        self.lost = 0
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def _forget(self, jid: int) -> None:
+        self._active.pop(jid, None)
+        self._lease_ok.pop(jid, None)
+
+    # --- 큐 ---
+    async def _claim(self, limit: int):
+        AsyncSessionLocal = get_async_session_factory()
+        async with AsyncSessionLocal() as session:
+            expired = await fail_expired_jobs(session)
+            jobs = await claim_jobs(session, self.worker_id, limit, self.lease_sec)
+            snap = [(j.id, dict(j.payload or {}), j.attempts, j.max_attempts) for j in jobs]
+            await session.commit()
+        if expired:
+            logger.warning(f"[content-worker] {expired} expired job(s) marked failed")
+        return snap
+
+    async def _heartbeat_loop(self) -> None:
+        AsyncSessionLocal = get_async_session_factory()
+        while not self._stopping.is_set() or self._active:
+            await asyncio.sleep(self.heartbeat_sec)
+            ids = list(self._active)
+            if not ids:
+                continue
+            owned, attempted_at = None, time.monotonic()
+            try:
+                async with AsyncSessionLocal() as session:
+                    owned = set(await extend_leases(session, self.worker_id, ids, self.lease_sec))
+                    await session.commit()
+            except Exception as e:
+                logger.warning(f"[content-worker] heartbeat failed: {e}")
+            now = time.monotonic()
+            for jid in ids:
+                if owned is not None and jid in owned:
+                    self._lease_ok[jid] = attempted_at
+                    continue
+                task = self._active.get(jid)
+                if task is None or task.done():
+                    continue
+                if owned is not None:
+                    reason = "lost lease"
+                elif now - self._lease_ok.get(jid, now) >= self.lease_sec - self.heartbeat_sec:
+                    reason = "lease about to expire without heartbeat"
+                else:
+                    continue
+                logger.error(f"[content-worker] {reason} on job {jid}, cancelling")
+                self.lost += 1
+                task.cancel()
+
+    # --- 실행 ---
+    async def _execute(self, jid: int, payload: Dict[str, Any], attempts: int, max_attempts: int) -> None:
+        key = str(jid)
+        kind = payload.get("kind", "init")
+        AsyncSessionLocal = get_async_session_factory()
+        await job_store.set(key, JobState(status="running"))
+
+        result: Optional[Dict[str, Any]] = None
+        error: Optional[str] = None
+        retry = True
+        if kind not in RUNNERS or not payload.get("topic"):
+            error, retry = f"invalid payload (kind={kind})", False
+        else:
+            runner, default_pipeline, accepted = RUNNERS[kind]
+            opts = {k: v for k, v in payload.items() if v is not None and k in accepted}
+            opts.setdefault("pipeline_id", default_pipeline)
+            db_gen = get_db()
+            db = next(db_gen)
+            try:
+                result = await runner(
+                    db,
+                    topic=payload["topic"],
+                    on_progress=job_store.progress_writer(key),
+                    on_metrics=lambda m: job_store.update_nowait(key, metrics=m),
+                    on_step_event=job_store.step_event_writer(key),
+                    run_id=payload.get("run_id") or f"cj-{jid}",
+                    resume=bool(payload.get("resume")) or attempts > 1,
+                    **opts,
+                )
+                # 포스팅까지 된 실행은 재시도하지 않음(이중 포스팅 방지). 아니면 실패 단계가 있을 때 재시도
+                errors = _step_errors(result)
+                if errors and not result.get("post"):
+                    error = "steps failed: " + ", ".join(f"{k}={v}" for k, v in errors.items())
+            except asyncio.CancelledError:
+                # 최종 상태는 쓰지 않음: 리스를 잃었으면 새 소유 워커가, 아니면 재시도한 워커가 결과를 기록
+                job_store.emit_nowait(key, {"type": "interrupted", "worker_id": self.worker_id})
+                raise
+            except Exception as e:
+                logger.exception("[content-worker] job %s failed", jid)
+                error = str(e)
+            finally:
+                try:
+                    next(db_gen)
+                except StopIteration:
+                    pass
+
+        async with AsyncSessionLocal() as session:
+            if error is None:
+                owned = await complete_job(session, jid, self.worker_id, result)
+                status = "done" if owned else None
+            else:
+                status = await fail_job(
+                    session, jid, self.worker_id, error,
+                    backoff_base_sec=settings.CONTENT_WORKER_BACKOFF_BASE_SEC,
+                    backoff_max_sec=settings.CONTENT_WORKER_BACKOFF_MAX_SEC,
+                    retry=retry, result=result,
+                )
+            await session.commit()
+
+        if status is None:
+            logger.warning(f"[content-worker] job {jid} no longer owned, result discarded")
+            return
+        if status == "done":
+            self.done += 1
+            await job_store.update(
+                key, status="done", result=result, steps=(result or {}).get("steps", {}),
+                metrics=(result or {}).get("metrics"), finished_at=time.time(),
+            )
+        elif status == "queued":
+            self.retried += 1
+            await job_store.update(key, status="queued", error=error)
+            logger.info(f"[content-worker] job {jid} attempt {attempts}/{max_attempts} failed, requeued")
+        else:
+            self.failed += 1
+            await job_store.update(key, status="error", error=error, result=result, finished_at=time.time())
+
+    # --- 루프 ---
+    async def run_forever(self) -> None:
+        logger.info(f"[content-worker] {self.worker_id} started (concurrency={self.concurrency})")
+        hb = asyncio.create_task(self._heartbeat_loop())
+        # API 레플리카의 프롬프트/파이프라인 수정 → 이 워커의 캐시 무효화 (redis_url 이 없으면 바로 끝남)
+        listener = asyncio.create_task(prompt_repository.listen()) if self.listen_prompts else None
+        try:
+            while not self._stopping.is_set():
+                free = self.concurrency - len(self._active)
+                claimed = []
+                leased_at = time.monotonic()   # 리스 시작은 claim 안에서 → 그 직전 시각으로 보수적으로 계산
+                if free > 0:
+                    try:
+                        claimed = await self._claim(free)
+                    except Exception as e:
+                        logger.warning(f"[content-worker] claim failed: {e}")
+                for jid, payload, attempts, max_attempts in claimed:
+                    self.claimed += 1
+                    task = asyncio.create_task(self._execute(jid, payload, attempts, max_attempts))
+                    self._active[jid] = task
+                    self._lease_ok[jid] = leased_at
+                    task.add_done_callback(lambda _t, _jid=jid: self._forget(_jid))
+                # 작업 하나가 끝나거나(빈 슬롯), 폴링 주기가 지나거나, 종료 요청이 올 때까지 대기
+                waiters = [asyncio.ensure_future(self._stopping.wait())] + list(self._active.values())
+                await asyncio.wait(waiters, timeout=self.poll_sec, return_when=asyncio.FIRST_COMPLETED)
+                waiters[0].cancel()
+        finally:
+            # 종료: 새 작업은 집지 않고 실행 중인 작업은 끝까지 (강제 종료되면 리스 만료 후 다른 워커가 재실행)
+            if self._active:
+                logger.info(f"[content-worker] draining {len(self._active)} job(s)")
+                await asyncio.gather(*self._active.values(), return_exceptions=True)
+            hb.cancel()
+            if listener is not None:
+                listener.cancel()
+            logger.info(f"[content-worker] {self.worker_id} stopped {self.snapshot()}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "active": sorted(self._active),
+            "claimed": self.claimed,
+            "done": self.done,
+            "failed": self.failed,
+            "retried": self.retried,
+            "lost": self.lost,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    import log_config  # noqa: F401
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--worker-id", type=str, default=None)
+    args = parser.parse_args()
+
+    async def _main():
+        worker = ContentWorker(worker_id=args.worker_id, concurrency=args.concurrency)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, worker.stop)
+        await worker.run_forever()
+
+    asyncio.run(_main())
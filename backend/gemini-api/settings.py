@@ -35,6 +35,83 @@ class Settings(BaseSettings):
     STEP_MAX_BACKOFF: int = 20
     HTTP_TIMEOUT_SEC: float = 180.0
 
+    # 파이프라인 1회 실행 전체의 재시도 예산(LLM/HTTP 외부 호출 총합) + 절대 마감(초, 0이면 없음)
+    RUN_MAX_ATTEMPTS: int = 40
+    RUN_DEADLINE_SEC: float = 1800.0
+
+    # 파이프라인 단계 체크포인트(redis_url 이 있으면 Redis, 없으면 프로세스 메모리). resume 시 완료 단계 건너뜀
+    CHECKPOINT_ENABLED: bool = True
+    CHECKPOINT_TTL_SEC: int = 604800
+
+    # 프롬프트/파이프라인 프로세스 내 캐시(쓰기 시 무효화, redis_url 이 있으면 pub/sub 로 레플리카 전파)
+    PROMPT_CACHE_TTL_SEC: float = 300.0
+    PROMPT_CACHE_CHANNEL: str = "prompt-cache:invalidate"
+
+    # 오프라인 배치 모드(스케줄 잡): gemini | local
+    BATCH_BACKEND: str = "gemini"
+    BATCH_LOCAL_DIR: str = "/app/batches"
+    BATCH_MAX_SIZE: int = 100          # 모델별 잡 1개에 담을 최대 요청 수
+    BATCH_FLUSH_SEC: float = 2.0       # 첫 요청 후 이 시간 동안 더 모아서 제출
+    BATCH_POLL_SEC: float = 30.0
+    BATCH_TIMEOUT_SEC: float = 86400.0
+
+    # 다중 토픽 실행(/post/run-batch) 공유 예산: 동시 기사 수, LLM 동시 호출, WordPress 포스팅 분당 횟수
+    BATCH_RUN_MAX_TOPICS: int = 100
+    BATCH_RUN_MAX_PARALLEL: int = 4
+    BATCH_RUN_LLM_CONCURRENCY: int = 8
+    BATCH_RUN_PUBLISH_PER_MIN: int = 6
+
+    # 다단계 대화 컨텍스트 예산(근사 토큰). 단계별 override 는 JSON: CONTEXT_STEP_BUDGETS='{"18": 24000}'
+    CONTEXT_BUDGET_TOKENS: int = 32000
+    CONTEXT_STEP_BUDGETS: Dict[str, int] = {}
+    CONTEXT_SUMMARY_MODEL: Optional[str] = "gemini-2.5-flash-lite"  # 비우면 요약 없이 잘라내기만
+    CONTEXT_DEDUP_MIN_CHARS: int = 200
+
+    # 업로드 전 이미지 최적화(프로세스 풀): 긴 변 리사이즈 + webp|avif|jpeg 재인코딩 + 메타데이터 제거
+    IMG_OPTIMIZE_ENABLED: bool = True
+    IMG_MAX_DIMENSION: int = 1600
+    IMG_OUTPUT_FORMAT: str = "webp"
+    IMG_QUALITY: int = 80
+    IMG_OPTIMIZE_WORKERS: int = 2
+
+    # 생성 이미지 라이브러리(비슷한 image_prompt 면 업로드된 이미지 재사용)
+    IMG_LIBRARY_ENABLED: bool = True
+    IMG_LIBRARY_FUZZY_ENABLED: bool = False        # 기본은 완전 일치만 재사용
+    IMG_LIBRARY_FUZZY_THRESHOLD: float = 0.9       # 단어/문자 bigram Jaccard 둘 다 이 값 이상 + 숫자 토큰 동일
+    IMG_LIBRARY_PHASH_MAX_DISTANCE: int = 6        # dHash 해밍거리(64bit) 이하면 같은 이미지로 간주
+    IMG_LIBRARY_MAX_ENTRIES: int = 5000
+    IMG_LIBRARY_REFRESH_SEC: float = 300.0
+
+    # 시각 자료 컴포넌트 이미지 생성/업로드 동시 처리 수 + 컴포넌트별 타임아웃(초, 0이면 없음)
+    VISUAL_IMAGE_CONCURRENCY: int = 3
+    VISUAL_IMAGE_TIMEOUT_SEC: float = 240.0
+
+    # content_jobs 워커(python -m services.workers.content_worker): 워커당 동시 실행, 폴링, 리스/하트비트, 재시도 백오프
+    CONTENT_WORKER_CONCURRENCY: int = 2
+    CONTENT_WORKER_POLL_SEC: float = 2.0
+    CONTENT_WORKER_LEASE_SEC: int = 300
+    CONTENT_WORKER_HEARTBEAT_SEC: float = 60.0
+    CONTENT_WORKER_BACKOFF_BASE_SEC: int = 60
+    CONTENT_WORKER_BACKOFF_MAX_SEC: int = 3600
+    CONTENT_JOB_MAX_ATTEMPTS: int = 3
+    CONTENT_WORKER_EMBEDDED: bool = False  # 별도 워커 컨테이너 없이 API 프로세스 안에서 워커 실행
+
+    # Redis 없을 때 작업 상태 메모리 상한: 작업 수, 결과 총 바이트, 큰 결과는 디스크로(경로만 보관, 비우면 버림)
+    # JOB_STORE_SPILL_DIR: 소스 트리 밖의 프로세스 전용 데이터 경로(예: /var/lib/gemini-api/job_results).
+    #   시작할 때 안의 *.json 을 지움
+    JOB_STORE_MAX_JOBS: int = 1000
+    JOB_STORE_MAX_RESULT_BYTES: int = 32 * 1024 * 1024
+    JOB_STORE_SPILL_DIR: Optional[str] = None
+    JOB_STORE_SPILL_MIN_BYTES: int = 256 * 1024
+
+    # 작업 진행 스트림(/post/events, /post/ws): 이벤트가 없을 때 keepalive + 상태 재확인 주기(초)
+    JOB_EVENTS_KEEPALIVE_SEC: float = 15.0
+
+    # 스케줄러 job_runs 기록: buffered 면 끝난 실행만 모아 SCHEDULER_RUN_FLUSH_SEC 마다(또는 MAX 건) 다건 INSERT
+    SCHEDULER_RUN_BUFFERED: bool = False
+    SCHEDULER_RUN_FLUSH_SEC: float = 2.0
+    SCHEDULER_RUN_FLUSH_MAX: int = 100
+
     model_config = SettingsConfigDict(
         env_prefix="",
         env_file=".env",
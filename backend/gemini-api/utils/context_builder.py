@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from common.llm import generate_text_with_retry
+from models.content_request import ContentMessage
+from services.content_generate_service import GENAI_CHARS_PER_TOKEN
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+DEDUP_PLACEHOLDER = "(앞선 model 응답과 동일한 내용이므로 생략 — 해당 응답을 그대로 참고)"
+TRIM_MARKER = "\n…(중략)…\n"
+
+SUMMARY_PROMPT = (
+    "다음 글을 핵심 사실·수치·고유명사·문단 구조를 유지하면서 약 {max_chars}자 이내로 압축하세요. "
+    "설명 없이 압축한 글만 출력하세요.\n\n{text}"
+)
+
+
+def _message_text(m: ContentMessage) -> str:
+    out: List[str] = []
+    for p in m.parts or []:
+        if isinstance(p, str):
+            out.append(p)
+        elif isinstance(p, dict) and isinstance(p.get("text"), str):
+            out.append(p["text"])
+    return "\n".join(out)
+
+
+def _with_text(m: ContentMessage, text: str) -> ContentMessage:
+    """텍스트 part 를 하나로 합쳐 교체(비텍스트 part 는 유지)"""
+    others = [p for p in (m.parts or []) if isinstance(p, dict) and "text" not in p]
+    return ContentMessage(role=m.role, parts=[text, *others])
+
+
+@dataclass
+class BuiltContext:
+    messages: List[ContentMessage]
+    budget_tokens: int
+    tokens_before: int
+    tokens_after: int
+    actions: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        return f"ctx_tokens={self.tokens_before}->{self.tokens_after}/{self.budget_tokens} {','.join(self.actions)}".strip()
+
+
+# ──────────────────────────────────────────────────────────────
+# 다단계 파이프라인용 대화 컨텍스트 빌더
+#   1) 중복 제거: 앞선 model 응답 전문이 뒤의 user 프롬프트(previous_step_output)에 그대로 들어가면 치환
+#   2) 토큰 계산: 문자수 기반 근사(GENAI_CHARS_PER_TOKEN)
+#   3) 단계별 예산(CONTEXT_STEP_BUDGETS, 없으면 CONTEXT_BUDGET_TOKENS) 초과 시 오래된 턴부터
+#      저가 모델(CONTEXT_SUMMARY_MODEL)로 요약 → 실패/미설정이면 앞뒤만 남기고 잘라냄
+#   protect_prefix 개의 앞 메시지(컨텍스트 캐시 대상 템플릿)와 마지막 메시지는 건드리지 않음
+# ──────────────────────────────────────────────────────────────
+class ContextBuilder:
+    def __init__(
+        self,
+        service: Any = None,
+        *,
+        summary_model: Optional[str] = None,
+        default_budget: Optional[int] = None,
+        step_budgets: Optional[Dict[str, int]] = None,
+        dedup_min_chars: Optional[int] = None,
+        min_turn_tokens: int = 256,
+        chars_per_token: float = GENAI_CHARS_PER_TOKEN,
+    ):
+        self.service = service
+        self.summary_model = summary_model if summary_model is not None else settings.CONTEXT_SUMMARY_MODEL
+        self.default_budget = default_budget or settings.CONTEXT_BUDGET_TOKENS
+        self.step_budgets = step_budgets if step_budgets is not None else settings.CONTEXT_STEP_BUDGETS
+        self.dedup_min_chars = dedup_min_chars if dedup_min_chars is not None else settings.CONTEXT_DEDUP_MIN_CHARS
+        self.min_turn_tokens = min_turn_tokens
+        self.chars_per_token = max(chars_per_token, 0.1)
+
+    # --- 토큰 ---
+    def count_text(self, text: str) -> int:
+        return int(len(text) / self.chars_per_token) + 1
+
+    def count_tokens(self, messages: List[ContentMessage]) -> int:
+        return sum(self.count_text(_message_text(m)) for m in messages)
+
+    def budget_for(self, step: Optional[str]) -> int:
+        if step is not None and str(step) in self.step_budgets:
+            return int(self.step_budgets[str(step)])
+        return self.default_budget
+
+    # --- 중복 제거 ---
+    def _dedup(self, messages: List[ContentMessage], protect_prefix: int, actions: List[str]) -> List[ContentMessage]:
+        out = list(messages)
+        outputs = [
+            (j, t) for j, t in ((j, _message_text(m).strip()) for j, m in enumerate(out) if m.role == "model")
+            if len(t) >= self.dedup_min_chars
+        ]
+        for i in range(max(protect_prefix, 1), len(out)):
+            if out[i].role != "user":
+                continue
+            cur = _message_text(out[i])
+            changed = False
+            for j, prev in outputs:
+                if j < i and prev in cur:
+                    cur = cur.replace(prev, DEDUP_PLACEHOLDER)
+                    changed = True
+            if changed:
+                out[i] = _with_text(out[i], cur)
+                actions.append(f"dedup[{i}]")
+        return out
+
+    # --- 축소 ---
+    def _truncate(self, text: str, max_chars: int) -> str:
+        if len(text) <= max_chars:
+            return text
+        keep = max(0, max_chars - len(TRIM_MARKER))
+        head = keep * 2 // 3
+        return text[:head] + TRIM_MARKER + text[len(text) - (keep - head):]
+
+    async def _shrink(self, text: str, max_chars: int) -> tuple[str, str]:
+        if self.summary_model and self.service is not None:
+            try:
+                summary = await generate_text_with_retry(
+                    self.service,
+                    self.summary_model,
+                    SUMMARY_PROMPT.format(max_chars=max_chars, text=text),
+                    max_retries=1,
+                )
+                if summary and len(summary) < len(text):
+                    return self._truncate(summary, max_chars), "summarize"
+            except Exception as e:
+                logger.warning(f"[context] summarize failed, falling back to trim: {e}")
+        return self._truncate(text, max_chars), "trim"
+
+    async def build(
+        self,
+        messages: List[ContentMessage],
+        *,
+        step: Optional[str] = None,
+        protect_prefix: int = 0,
+    ) -> BuiltContext:
+        budget = self.budget_for(step)
+        actions: List[str] = []
+        before = self.count_tokens(messages)
+
+        out = self._dedup(messages, protect_prefix, actions)
+        total = self.count_tokens(out)
+
+        # 오래된 턴부터 (보호된 앞부분과 마지막 지시문은 제외)
+        for i in range(protect_prefix, len(out) - 1):
+            if total <= budget:
+                break
+            text = _message_text(out[i])
+            turn_tokens = self.count_text(text)
+            target_tokens = max(self.min_turn_tokens, turn_tokens - (total - budget))
+            if target_tokens >= turn_tokens:
+                continue
+            new_text, how = await self._shrink(text, int((target_tokens - 1) * self.chars_per_token))
+            out[i] = _with_text(out[i], new_text)
+            total = self.count_tokens(out)
+            actions.append(f"{how}[{i}]")
+
+        if total > budget:
+            logger.warning(f"[context] step {step}: {total} tokens still over budget {budget}")
+        built = BuiltContext(messages=out, budget_tokens=budget, tokens_before=before, tokens_after=total, actions=actions)
+        if actions:
+            logger.info(f"[context] step {step}: {built.summary()}")
+        return built
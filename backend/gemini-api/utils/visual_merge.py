@@ -1,5 +1,6 @@
 
 from __future__ import annotations
+import asyncio
 import json
 import re
 import logging
@@ -7,7 +8,10 @@ from typing import Any, Dict, List, Optional, Union
 
 from common.llm import generate_images_with_retry
 from common.http import robust_upload_images
+from common.image_optimize import optimize_images
+from services.image_library_service import image_library
 from models.content_request import ContentMessage, ContentRequest
+from settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -106,56 +110,89 @@ def parse_visual_components(
     raise json.JSONDecodeError(f"Could not parse JSON from input (preview: {preview} ...)", s, 0)
 
 
-async def enrich_visual_components_with_images(
-    visual_components: List[Dict[str, Any]],
+async def _enrich_one(
+    comp: Dict[str, Any],
     content_generate_service: Any,
     upload_url: str,
-    use_first_image_only: bool = True,
-) -> List[Dict[str, Any]]:
-    result: List[Dict[str, Any]] = [dict(comp) for comp in visual_components]
-
-    for comp in result:
-        comp_type = str(comp.get("type", "")).strip()
-
-        if comp_type == "표":
-            continue
-
-        image_prompt = (comp.get("image_prompt") or comp.get("prompt") or "").strip()
-        if not image_prompt:
-            continue
-
-        content = [ContentMessage(role="user", parts=[image_prompt])]
-        req = ContentRequest(content=content)
-        image_model = getattr(req, "image_model", None)
-
-        try:
-            saved_image_paths = await generate_images_with_retry(
-                content_generate_service,
-                image_model,
-                image_prompt,
-            )
-        except Exception:
-            continue
-
-        if not saved_image_paths:
-            continue
+    use_first_image_only: bool,
+) -> Optional[Any]:
+    """컴포넌트 1개: 라이브러리 조회 → 이미지 생성 → 최적화 → 업로드. comp 를 직접 갱신하고 첫 media id 반환"""
+    image_prompt = (comp.get("image_prompt") or comp.get("prompt") or "").strip()
+
+    # 비슷한 프롬프트로 이미 업로드한 이미지가 있으면 생성/업로드 생략
+    hit = await image_library.lookup(image_prompt)
+    if hit is not None:
+        comp["image_urls"] = [hit.image_url]
+        return hit.media_id
+
+    content = [ContentMessage(role="user", parts=[image_prompt])]
+    req = ContentRequest(content=content)
+    image_model = getattr(req, "image_model", None)
+
+    saved_image_paths = await generate_images_with_retry(
+        content_generate_service,
+        image_model,
+        image_prompt,
+    )
+    if not saved_image_paths:
+        return None
 
-        paths_to_upload = [saved_image_paths[0]] if use_first_image_only else list(saved_image_paths)
-        try:
-            uploaded_url = await robust_upload_images(paths_to_upload, upload_url)
-        except Exception:
-            continue
+    paths_to_upload = [saved_image_paths[0]] if use_first_image_only else list(saved_image_paths)
+    paths_to_upload, _ = await optimize_images(paths_to_upload)
+    uploaded_url = await robust_upload_images(paths_to_upload, upload_url)
 
-        clean_url = extract_image_urls(uploaded_url)
+    clean_url = extract_image_urls(uploaded_url)
+    image_ids = extract_image_ids(uploaded_url)
+    first_id = image_ids[0] if image_ids else None
 
-        image_ids = extract_image_ids(uploaded_url)
-        first_id = image_ids[0] if image_ids else None
+    if not clean_url:
+        return None
 
-        if not clean_url:
-            continue
+    comp["image_urls"] = clean_url
+    if first_id is not None:
+        await image_library.record(image_prompt, paths_to_upload[0], first_id, clean_url[0])
+    return first_id
 
-        comp["image_urls"] = clean_url
 
+async def enrich_visual_components_with_images(
+    visual_components: List[Dict[str, Any]],
+    content_generate_service: Any,
+    upload_url: str,
+    use_first_image_only: bool = True,
+    *,
+    max_concurrency: Optional[int] = None,
+    timeout_sec: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    이미지가 필요한 컴포넌트를 동시에 처리(최대 max_concurrency 개, 컴포넌트별 timeout_sec).
+    Gemini 호출은 서비스 계층의 전역 리미터를 그대로 거치므로 동시성 상한은 그쪽에서도 지켜짐.
+    실패/타임아웃된 컴포넌트는 이미지 없이 원래 순서대로 남고, first_id 는 원래 순서상 첫 media id
+    """
+    result: List[Dict[str, Any]] = [dict(comp) for comp in visual_components]
+    limit = max(1, max_concurrency or settings.VISUAL_IMAGE_CONCURRENCY)
+    timeout = timeout_sec if timeout_sec is not None else settings.VISUAL_IMAGE_TIMEOUT_SEC
+    sem = asyncio.Semaphore(limit)
+
+    async def run(idx: int, comp: Dict[str, Any]) -> Optional[Any]:
+        async with sem:
+            try:
+                return await asyncio.wait_for(
+                    _enrich_one(comp, content_generate_service, upload_url, use_first_image_only),
+                    timeout=timeout if timeout and timeout > 0 else None,
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"[visual] component {idx} timed out after {timeout}s")
+            except Exception as e:
+                logger.warning(f"[visual] component {idx} failed: {e}")
+            return None
+
+    targets = [
+        (i, comp) for i, comp in enumerate(result)
+        if str(comp.get("type", "")).strip() != "표"
+        and (comp.get("image_prompt") or comp.get("prompt") or "").strip()
+    ]
+    ids = await asyncio.gather(*(run(i, comp) for i, comp in targets))
+    first_id = next((x for x in ids if x is not None), None)
     return result, first_id
 
 async def process_visual_components_from_str(
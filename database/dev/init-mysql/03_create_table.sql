@@ -95,4 +95,23 @@ CREATE TABLE job_runs (
   error_text     TEXT        NULL,
   INDEX idx_job_runs_jobid (job_id),
   CONSTRAINT fk_job_runs_job FOREIGN KEY (job_id) REFERENCES jobs(id) ON DELETE CASCADE
-);
\ No newline at end of file
+);
+-- 생성 이미지 라이브러리(비슷한 image_prompt 재사용): 정규화 프롬프트 + dHash + 업로드된 미디어
+CREATE TABLE IF NOT EXISTS image_library (
+  id           BIGINT AUTO_INCREMENT PRIMARY KEY,
+  prompt       TEXT         NOT NULL,
+  prompt_norm  TEXT         NOT NULL,
+  prompt_hash  CHAR(64)     NOT NULL,      -- sha256(prompt_norm)
+  phash        CHAR(16)     NULL,          -- 64bit dHash(hex)
+  media_id     INT          NOT NULL,      -- WordPress media id (/posts/upload-image/ 의 image_id)
+  image_url    VARCHAR(512) NOT NULL,
+  hits         INT          NOT NULL DEFAULT 0,
+  last_used_at DATETIME     NULL,
+  created_at   TIMESTAMP    DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE KEY uq_image_library_prompt (prompt_hash),
+  KEY idx_image_library_phash (phash)
+);
+-- content_jobs 워커 큐: 처리 중인 워커 + 완료 결과 (리스는 available_at 으로 표시)
+ALTER TABLE content_jobs
+    ADD COLUMN worker_id VARCHAR(64) NULL,
+    ADD COLUMN result JSON NULL;
@@ -30,7 +30,9 @@ export default function PostRunner() {
   const [result, setResult] = useState(null);
   const [error, setError] = useState("");
   const [clientLogs, setClientLogs] = useState([]);
+  const [partial, setPartial] = useState(null); // { step, text } 스트리밍 중인 단계 출력
   const pollRef = useRef(null);
+  const esRef = useRef(null);
 
   const log = (line) =>
     setClientLogs((prev) => [...prev, `[${new Date().toLocaleTimeString()}] ${line}`]);
@@ -39,6 +41,7 @@ export default function PostRunner() {
     setError("");
     setResult(null);
     setClientLogs([]);
+    setPartial(null);
     setJobId("");
 
     if (!topic.trim()) {
@@ -82,39 +85,55 @@ export default function PostRunner() {
   }
 
   useEffect(() => {
+    if (!jobId) return undefined;
+    const steps = {};
+    let finished = false;
+
+    // step 로그 갱신 (진행 스트림/폴링 공용)
+    function applySteps(next) {
+      Object.assign(steps, next || {});
+      const lines = Object.keys(steps)
+        .sort((a, b) => Number(a) - Number(b))
+        .map((k) => `Step ${k}: ${steps[k]}`);
+      setClientLogs((prev) => prev.filter((line) => !line.startsWith("Step ")).concat(lines));
+    }
+
+    function finish(ok, payload) {
+      if (finished) return;
+      finished = true;
+      if (ok) {
+        setResult(payload || null);
+        log("작업 완료");
+      } else {
+        setError(payload || "서버에서 오류가 발생했습니다.");
+        log("작업 실패");
+      }
+      setPartial(null);
+      setRunning(false);
+      stop();
+    }
+
+    function stop() {
+      if (esRef.current) {
+        esRef.current.close();
+        esRef.current = null;
+      }
+      if (pollRef.current) {
+        clearInterval(pollRef.current);
+        pollRef.current = null;
+      }
+    }
+
     async function poll() {
-      if (!jobId) return;
       try {
         const st = await fetchJobStatus(jobId);
-
-        // step 로그 갱신
-        if (st && st.steps) {
-          const lines = Object.keys(st.steps)
-            .sort((a, b) => Number(a) - Number(b))
-            .map((k) => `Step ${k}: ${st.steps[k]}`);
-          setClientLogs((prev) => {
-            const base = prev.filter((line) => !line.startsWith("Step "));
-            return base.concat(lines);
-          });
-        }
+        if (st && st.steps) applySteps(st.steps);
 
         if (st.status === "done") {
           const r = await fetchJobResult(jobId);
-          if (r && r.status === "ok") setResult(r.result || null);
-          setRunning(false);
-          if (pollRef.current) {
-            clearInterval(pollRef.current);
-            pollRef.current = null;
-          }
-          log("작업 완료");
+          finish(true, r && r.status === "ok" ? r.result : null);
         } else if (st.status === "error") {
-          setError(st.error || "서버에서 오류가 발생했습니다.");
-          setRunning(false);
-          if (pollRef.current) {
-            clearInterval(pollRef.current);
-            pollRef.current = null;
-          }
-          log("작업 실패");
+          finish(false, st.error);
         }
       } catch (e) {
         // 일시적 네트워크 오류는 폴링 유지
@@ -122,16 +141,40 @@ export default function PostRunner() {
       }
     }
 
-    if (jobId && !pollRef.current) {
+    function startPolling() {
+      if (finished || pollRef.current) return;
+      log("진행 스트림을 쓸 수 없어 상태 폴링으로 전환");
       pollRef.current = setInterval(poll, 2000); // 2초 간격
       poll(); // 즉시 1회
     }
-    return () => {
-      if (pollRef.current) {
-        clearInterval(pollRef.current);
-        pollRef.current = null;
+
+    // 진행 스트림(SSE): 단계 시작/종료, 스트리밍 부분 출력, 최종 결과를 서버가 밀어줌
+    if (typeof EventSource === "undefined") {
+      startPolling();
+      return stop;
+    }
+    const es = new EventSource(`${POST_BASE}/events/${encodeURIComponent(jobId)}`);
+    esRef.current = es;
+    const on = (type, fn) => es.addEventListener(type, (e) => fn(JSON.parse(e.data)));
+
+    on("snapshot", (ev) => applySteps(ev.steps));
+    on("update", (ev) => ev.steps && applySteps(ev.steps));
+    on("step_started", (ev) => applySteps({ [ev.step]: "running…" }));
+    on("step_finished", (ev) => applySteps({ [ev.step]: `${ev.note} (${ev.elapsed_sec}s)` }));
+    on("partial", (ev) => ev.partial && setPartial({ step: ev.step, text: ev.partial[ev.step] || "" }));
+    on("result", (ev) => finish(true, ev.result));
+    on("failed", (ev) => finish(false, ev.error));
+    es.onerror = () => {
+      // 연결 오류: 끝나기 전이면 폴링으로 대체 (EventSource 자동 재연결 대신)
+      if (finished) return;
+      if (esRef.current) {
+        esRef.current.close();
+        esRef.current = null;
       }
+      startPolling();
     };
+
+    return stop;
   }, [jobId]);
 
   const stepLogs = useMemo(() => {
@@ -194,8 +237,8 @@ export default function PostRunner() {
 
         <div className={styles.helper}>
           호출 흐름: <code>POST /gemini-api/post/run-async</code> →{" "}
-          <code>GET /gemini-api/post/status/:job_id</code> →{" "}
-          <code>GET /gemini-api/post/result/:job_id</code>
+          <code>GET /gemini-api/post/events/:job_id</code> (SSE, 실패 시{" "}
+          <code>/status</code> 폴링 → <code>/result</code>)
         </div>
         {error ? (
           <div
@@ -247,6 +290,15 @@ export default function PostRunner() {
             </li>
           )}
         </ul>
+
+        {running && partial ? (
+          <>
+            <div className={styles.helper} style={{ margin: "12px 0 6px" }}>
+              Streaming (Step {partial.step})
+            </div>
+            <pre className={styles.pre}>{partial.text.slice(-1500)}</pre>
+          </>
+        ) : null}
       </div>
 
       {/* 결과 요약 */}